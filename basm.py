@@ -1,19 +1,68 @@
 #!/usr/bin/env python
 
-from sys import argv
+"""
+Assemble BasicML source into the numeric words `UVSim.load` reads, or disassemble a program back into mnemonics.
+
+Source is one statement per line, anything after a `;` is a comment:
+
+    ;; Adds two numbers
+            READ first
+            READ second
+    top:    LOAD first
+            ADD second
+            STORE first
+            WRITE first
+            HALT
+    first:  .data 0
+    second: .data 0
+
+A statement is an instruction with its operand, a `.data` directive with zero or more values,
+or a raw word like `+1007`. Operands and data values are numbers or labels, optionally with an
+offset like `table+2`. A line can start with the address it is assembled at, like the lines
+`disassemble` writes, and assembly carries on from there.
+"""
+
+import argparse
+import sys
 from src.opcodes import Opcode
+from src.memory import Memory
+from src.listing import listing
+
+MNEMONICS = {name: operation for operation, name in Opcode.OPERATIONS.items()}
+
+class AssemblyError(ValueError):
+    """
+    Raised when a source has errors, with every one of them rather than just the first.
+
+    Attributes:
+        errors (list): (line number, message) pairs in the order they appear in the source.
+    """
+    def __init__(self, errors, filename="<source>"):
+        self.errors = errors
+        self.filename = filename
+        super().__init__("\n".join(f"{filename}:{line}: {message}" for line, message in errors))
 
 def main():
     """
-    Read a BasicML program and assemble it into executable machine code for the UVUSim CPU
+    Assemble a BasicML source file, or disassemble a program with --disassemble
     """
-    if len(argv) != 2:
-        print("Please specify a BasicML program to assemble")
-        exit(1)
+    parser = argparse.ArgumentParser(description="Assemble BasicML source into a program UVSim can load.")
+    parser.add_argument("source", help="BasicML source to assemble, or a program to disassemble")
+    parser.add_argument("-o", "--output", default=None,
+                        help="where to write the result (default: a.out.txt, or a.out.basm when disassembling)")
+    parser.add_argument("-d", "--disassemble", action="store_true",
+                        help="turn a program of numeric words back into mnemonics")
+    args = parser.parse_args()
 
-    input_filename = argv[1]
-    program = read_file(input_filename)
-    assemble(program, "a.out.basm")
+    if args.disassemble:
+        disassemble(read_file(args.source), args.output or "a.out.basm")
+        return
+
+    try:
+        assemble_file(args.source, args.output or "a.out.txt")
+    except AssemblyError as e:
+        print(e, file=sys.stderr)
+        exit(1)
 
 def read_file(filename):
     """
@@ -27,19 +76,154 @@ def read_file(filename):
 
     return code
 
+##############
+# Assembling #
+##############
 
-def assemble(program, filename):
+def assemble(source, filename="<source>"):
     """
-    Walk through a program in BasicML and translate each instruction into its machine code equivalent
+    Assemble BasicML source into a list of words, starting at address 00.
+
+    The first pass splits every line into its address, label and statement and builds the
+    symbol table. The second resolves the operands and emits the words. Addresses that no
+    statement was assembled at are left as +000000.
+
+    Args:
+        source: The source as a string or an iterable of lines.
+        filename (str): Name used in error messages.
+
+    Returns:
+        list: The words as integers.
+
+    Raises:
+        AssemblyError: With every error in the source.
     """
-    with open(filename, 'w') as output_file:
-        counter = 0
-        for opcode in program:
-            if opcode.name == "NOOP":
-                output_file.write(f"{counter:02d} {opcode}\n")
+    lines = source.splitlines() if isinstance(source, str) else source
+    symbols = {}
+    statements = [] ## (line number, address, operation or None for data, operand or word)
+    owners = {} ## address -> line number of the statement assembled there
+    errors = []
+    address = 0
+
+    for number, line in enumerate(lines, 1):
+        if ";" in line:
+            line = line[:line.index(";")]
+        tokens = line.replace(",", " ").split()
+        if not tokens:
+            continue
+
+        if len(tokens) > 1 and tokens[0].isdigit():
+            address = int(tokens[0])
+            tokens = tokens[1:]
+
+        if tokens[0][-1] == ":":
+            label = tokens[0][:-1]
+            if not label.isidentifier():
+                errors.append((number, f"invalid label {label!r}"))
+            elif label in symbols:
+                errors.append((number, f"label {label!r} is already defined"))
+            else:
+                symbols[label] = address
+            tokens = tokens[1:]
+            if not tokens:
+                continue
+
+        keyword = tokens[0].upper()
+        operation = MNEMONICS.get(keyword)
+        if operation is not None:
+            if len(tokens) == 2:
+                operands = tokens[1:]
+            elif len(tokens) == 1 and operation == Opcode.HALT:
+                operands = ["0"]
+            else:
+                errors.append((number, f"{keyword} takes {'at most ' if keyword == 'HALT' else ''}one operand"))
+                continue
+        elif keyword == ".DATA":
+            operands = tokens[1:] or ["0"]
+        elif len(tokens) == 1:
+            try:
+                operands = [Opcode(tokens[0]).numeric]
+            except ValueError:
+                errors.append((number, f"unknown instruction or invalid word {tokens[0]!r}"))
+                continue
+        else:
+            errors.append((number, f"unknown instruction {tokens[0]!r}"))
+            continue
+
+        for operand in operands:
+            if address > Memory.LAST_ADDRESS:
+                errors.append((number, f"address {address} is past the end of memory"))
+                break
+            if address in owners:
+                errors.append((number, f"address {address:02d} is already used by line {owners[address]}"))
+            owners[address] = number
+            statements.append((number, address, operation, operand))
+            address += 1
+
+    words = [0] * (max(owners) + 1 if owners else 0)
+    for number, address, operation, operand in statements:
+        value = resolve(operand, symbols) if isinstance(operand, str) else operand
+
+        if value is None:
+            errors.append((number, f"undefined label or invalid number {operand!r}"))
+        elif operation is None:
+            if -Opcode.LARGEST <= value <= Opcode.LARGEST:
+                words[address] = value
             else:
-                output_file.write(f"{counter:02d} {opcode.name} {opcode.operand}\n")
-            counter += 1
+                errors.append((number, f"data {value} does not fit in a word"))
+        elif 0 <= value <= Memory.LAST_ADDRESS:
+            words[address] = operation * 1000 + value
+        else:
+            errors.append((number, f"operand {value} is not an address between 0 and {Memory.LAST_ADDRESS}"))
+
+    if errors:
+        errors.sort()
+        raise AssemblyError(errors, filename)
+
+    return words
+
+def resolve(operand, symbols):
+    """
+    Returns the value of a number, a label or a label with an offset like `table+2`, or None if it is neither.
+    """
+    label, plus, offset = operand.partition("+")
+    if not label: ## A number with an explicit sign
+        return int(offset) if offset.isdigit() else None
+    if label.lstrip("-").isdigit():
+        return int(label) if not plus else None
+
+    base = symbols.get(label)
+    if base is None:
+        return None
+    if not plus:
+        return base
+    if not offset.isdigit():
+        return None
+    return base + int(offset)
+
+def assemble_file(source, output):
+    """
+    Assemble a source file and write the program where `UVSim.load` can read it, one word per line
+    """
+    with open(source) as lines:
+        words = assemble(lines, source)
+
+    with open(output, "w") as program:
+        program.write("".join(f"{word:+07d}\n" for word in words))
+
+    print(f"Wrote assembled program to {output}")
+
+#################
+# Disassembling #
+#################
+
+def disassemble(program, filename):
+    """
+    Walk through a program in BasicML and translate each word into its mnemonic, which `assemble` reads back
+    """
+    with open(filename, 'w') as output_file:
+        for line in listing(program):
+            output_file.write(f"{line}\n")
 
     print(f"Wrote disassembled program to {filename}")
 
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+"""
+Run many BasicML programs across a pool of worker processes and stream the results as JSON lines.
+
+Programs come from either a directory, where `program.txt` takes its input from `program.in`
+when that file exists, or a manifest with one JSON object per line:
+
+    {"program": "bml_examples/Test1.txt", "input": "inputs/test1.in"}
+    {"program": "bml_examples/Test2.txt", "inputs": ["+0005", "+0007"]}
+
+Relative paths in a manifest are relative to the manifest itself.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from time import perf_counter
+
+from uvsim import UVSim
+from src.cpu import ExecutionLimitExceeded
+from src.memory import ArrayMemory
+from src.io_device import ScriptedIODevice
+from src.program_cache import ProgramCache
+from src.analysis import Analysis, NonTerminating
+from src.diagnostics import diagnostics
+
+## One VM per worker process, reused for every job the worker is handed
+_uvsim = None
+_limits = {"max_steps": None, "timeout": None}
+_analyze = False
+
+def init_worker(max_steps=None, timeout=None, cache_dir=None, analyze=False):
+    """
+    Create the VM this process will reuse for every job, and the limits every job runs under
+
+    Programs are cached by content, so a program that comes up again is only parsed once per worker,
+    or once across workers and runs with a `cache_dir`. With `analyze`, programs that static analysis
+    shows can never stop are rejected without running them.
+    """
+    global _uvsim, _analyze
+    _analyze = analyze
+    _limits["max_steps"] = max_steps
+    _limits["timeout"] = timeout
+    _uvsim = UVSim(memory=ArrayMemory(), io_device=ScriptedIODevice(err=lambda data: None), ## Nobody is there to read parse errors
+                   cache=ProgramCache(directory=cache_dir))
+    diagnostics.sink = lambda message: None ## Only the counts are reported, with each result
+
+def run_job(job):
+    """
+    Load and execute one program on this worker's VM and return its result as a dictionary
+    """
+    if _uvsim is None:
+        init_worker()
+
+    program, inputs = job
+    result = {"program": program, "outputs": [], "acc": None, "pc": None, "steps": 0, "elapsed": 0.0, "error": None, "diagnostics": {}}
+
+    _uvsim.io_device.reset()
+    start = perf_counter()
+    try:
+        if isinstance(inputs, str):
+            with open(inputs) as script:
+                inputs = [line.strip() for line in script if line.strip()]
+
+        _uvsim.io_device.provide(*inputs)
+        _uvsim.cpu.reset()
+        diagnostics.reset()
+        _uvsim.load(program)
+        if _analyze:
+            analysis = Analysis.of(_uvsim.mem)
+            if not analysis.terminates:
+                raise NonTerminating("; ".join(analysis.report()))
+        result["steps"] = _uvsim.execute(preview=False, **_limits)
+    except ExecutionLimitExceeded as e:
+        ## The worker stays healthy, the runaway program is just abandoned
+        result["steps"] = e.steps
+        result["error"] = f"{type(e).__name__}: {e}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["elapsed"] = perf_counter() - start
+    result["outputs"] = list(_uvsim.io_device.outputs)
+    result["diagnostics"] = dict(diagnostics.counts)
+    result["acc"] = _uvsim.cpu.acc.numeric
+    result["pc"] = _uvsim.cpu.current
+
+    return result
+
+def jobs_from_directory(directory, pattern="*.txt"):
+    """
+    Pair every program in a directory with the input script next to it, if there is one
+    """
+    jobs = []
+    for program in sorted(glob(os.path.join(directory, pattern))):
+        script = os.path.splitext(program)[0] + ".in"
+        jobs.append((program, script if os.path.exists(script) else []))
+
+    return jobs
+
+def jobs_from_manifest(manifest):
+    """
+    Read (program, inputs) pairs from a JSON lines manifest
+    """
+    base = os.path.dirname(os.path.abspath(manifest))
+    jobs = []
+    with open(manifest) as entries:
+        for number, line in enumerate(entries, start=1):
+            if not line.strip():
+                continue
+
+            entry = json.loads(line)
+            if "program" not in entry:
+                raise ValueError(f"{manifest}:{number}: entry has no program")
+
+            program = os.path.join(base, entry["program"])
+            if "input" in entry:
+                inputs = os.path.join(base, entry["input"])
+            else:
+                inputs = [str(value) for value in entry.get("inputs", [])]
+            jobs.append((program, inputs))
+
+    return jobs
+
+def run_batch(jobs, workers=None, chunksize=16, max_steps=None, timeout=None, cache_dir=None, analyze=False):
+    """
+    Fan the jobs out across a process pool, yielding each result in job order as soon as it is ready
+
+    `max_steps` and `timeout` limit every program, see `CPU.run`. `cache_dir` keeps parsed programs on disk, see `ProgramCache`.
+    `analyze` rejects programs that can never stop, see `init_worker`.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(max_steps, timeout, cache_dir, analyze)) as executor:
+        yield from executor.map(run_job, jobs, chunksize=chunksize)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many BasicML programs in parallel and print JSON lines results.")
+    parser.add_argument("path", help="directory of programs or a JSON lines manifest")
+    parser.add_argument("--pattern", default="*.txt", help="programs to pick up from a directory (default: *.txt)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-o", "--output", default=None, help="write results here instead of stdout")
+    parser.add_argument("--max-steps", type=int, default=None, help="stop any program after this many instructions")
+    parser.add_argument("--timeout", type=float, default=None, help="stop any program after roughly this many seconds")
+    parser.add_argument("--cache-dir", default=None, help="keep parsed programs here to skip parsing them in later runs")
+    parser.add_argument("--reject-non-terminating", action="store_true",
+                        help="don't run programs that static analysis shows can never stop, report them as errors")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        jobs = jobs_from_directory(args.path, args.pattern)
+    else:
+        jobs = jobs_from_manifest(args.path)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in run_batch(jobs, args.workers, max_steps=args.max_steps, timeout=args.timeout, cache_dir=args.cache_dir, analyze=args.reject_non_terminating):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Measure how long the static analyzer takes on full memory images, to check it stays within its budget
+of a millisecond per program, which is what lets batch runs analyze every program before running it.
+
+Usage: python bench/bench_analysis.py [repeats]
+
+Exits with status 1 if any image takes longer than the budget.
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analysis import Analysis
+from src.memory import Memory
+from src.opcodes import Opcode
+
+BUDGET_MS = 1.0
+
+def random_image(rng, operations):
+    """
+    A 249-word image of random instructions, with operands anywhere in memory
+    """
+    return [rng.choice(operations) * 1000 + rng.randrange(Memory.ADDRESSABLE_SPACE.stop) for _ in range(Memory.LAST_ADDRESS)]
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(1)
+    images = [
+        ("random", random_image(rng, list(Opcode.OPERATIONS) + [0])),
+        ## Few HALTs and unconditional branches, so nearly every word is reachable and most blocks are short
+        ("dense", random_image(rng, [Opcode.WRITE, Opcode.LOAD, Opcode.STORE, Opcode.ADD, Opcode.SUBTRACT,
+                                     Opcode.MULTIPLY, Opcode.BRANCHNEG, Opcode.BRANCHZERO])),
+    ]
+
+    over = False
+    print(f"{'image':<10}{'reachable':>10}{'ms per analysis':>18}")
+    for label, words in images:
+        reachable = len(Analysis.of(words).reachable)
+        best = min(timeit.repeat(lambda: Analysis.of(words), number=repeats, repeat=5)) / repeats
+        over = over or best * 1000 > BUDGET_MS
+        print(f"{label:<10}{reachable:>10}{best * 1000:>18.3f}")
+
+    if over:
+        print(f"Over the budget of {BUDGET_MS} ms per analysis")
+        exit(1)
+
+if __name__ == '__main__':
+    main()
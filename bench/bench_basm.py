@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+"""
+Measure how long the assembler takes on a program that fills memory, to check it is fast enough to rerun on every keystroke.
+
+Usage: python bench/bench_basm.py [repeats]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from basm import assemble, listing
+from src.memory import Memory
+from src.opcodes import Opcode
+
+def labelled_source():
+    """
+    A program of counting loops with a label on every loop, followed by its data
+    """
+    lines = []
+    for loop in range((Memory.LAST_ADDRESS - 3) // 6):
+        lines += [f"start{loop}: READ count ;; how many times to go round",
+                  f"loop{loop}:  LOAD count",
+                  "        SUBTRACT one",
+                  "        STORE count",
+                  f"        BRANCHNEG loop{loop}",
+                  "        WRITE count"]
+    lines += ["        HALT", "count:  .data 0", "one:    .data 1"]
+    return lines
+
+def disassembled_source():
+    """
+    The listing `disassemble` writes for a full memory of words, with an address on every line
+    """
+    return listing([Opcode.from_int((address % 44) * 1000 + address % 100) for address in Memory.ADDRESSABLE_SPACE])
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"{'source':<16}{'words':>8}{'ms per assembly':>18}")
+    for label, source in [("labelled", labelled_source()), ("disassembled", disassembled_source())]:
+        words = len(assemble(source))
+        best = min(timeit.repeat(lambda: assemble(source), number=repeats, repeat=5)) / repeats
+        print(f"{label:<16}{words:>8}{best * 1000:>18.3f}")
+
+if __name__ == '__main__':
+    main()
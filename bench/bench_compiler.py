@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark comparing the CPU interpreter with the basic-block compiler.
+
+Usage: python bench/bench_compiler.py [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.compiler import BlockCompiler
+from src.cpu import CPU
+from src.memory import Memory
+from src.io_device import IODevice
+from src.opcodes import Opcode
+
+## Sums 1..N in a loop, N is read from input
+LOOP = ["+1020", "+2021", "+3020", "+2121", "+2020", "+3122", "+2120", "+4209", "+4000", "+1121", "+4300"] \
+     + ["+0000"] * 9 + ["+0000", "+0000", "+0001"]
+
+def measure(engine, code, repeats):
+    compiler = BlockCompiler()
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        memory = Memory(code)
+        io_device = IODevice(reader=lambda: "+001000", writer=lambda x: None, err=lambda x: None)
+        cpu = CPU()
+        if engine == "compiled":
+            steps += compiler.run(cpu, memory, io_device)
+        else:
+            steps += cpu.run(memory, io_device)
+    elapsed = time.perf_counter() - start
+
+    return steps / elapsed
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    code = [Opcode(word) for word in LOOP]
+
+    rates = {engine: measure(engine, code, repeats) for engine in ["interpreter", "compiled"]}
+
+    print(f"{'engine':<14}{'steps/s':>16}")
+    for engine, rate in rates.items():
+        print(f"{engine:<14}{rate:>16,.0f}")
+    print(f"speedup: {rates['compiled'] / rates['interpreter']:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark comparing the "match" and "table" dispatch modes of the CPU.
+
+Usage: python bench/bench_dispatch.py [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cpu import CPU
+from src.memory import Memory
+from src.io_device import IODevice
+from src.opcodes import Opcode
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'bml_examples')
+PROGRAMS = ["Test1.txt", "Test2.txt", "Test3.txt", "Test4.txt"]
+
+def read_program(filename):
+    with open(os.path.join(EXAMPLES, filename)) as program:
+        return [Opcode(line) for line in program]
+
+def run_once(code, mode):
+    """
+    Run a program to completion and return how many instructions were executed
+    """
+    memory = Memory(code)
+    io_device = IODevice(reader=lambda: "+0042", writer=lambda x: None, err=lambda x: None)
+    cpu = CPU(dispatch=mode)
+
+    steps = 0
+    while not cpu.halted:
+        cpu.step(memory, io_device)
+        steps += 1
+
+    return steps
+
+def measure(code, mode, repeats):
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        steps += run_once(code, mode)
+    elapsed = time.perf_counter() - start
+
+    return steps / elapsed
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    results = []
+    for filename in PROGRAMS:
+        code = read_program(filename)
+        rates = {mode: measure(code, mode, repeats) for mode in CPU.DISPATCH_MODES}
+        results.append((filename, rates))
+
+    print(f"{'program':<12}{'match steps/s':>16}{'table steps/s':>16}{'speedup':>10}")
+    for filename, rates in results:
+        print(f"{filename:<12}{rates['match']:>16,.0f}{rates['table']:>16,.0f}{rates['table'] / rates['match']:>9.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+"""
+Compare running a program against many input vectors one UVSim at a time with the LockstepVM.
+
+Usage: python bench/bench_lockstep.py [lanes]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from uvsim import UVSim
+from src.memory import Memory
+from src.lockstep import LockstepVM
+from src.opcodes import Opcode
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'bml_examples')
+PROGRAMS = ["Test1.txt", "Test2.txt", "Test3.txt", "Test4.txt"]
+
+def read_program(filename):
+    with open(os.path.join(EXAMPLES, filename)) as program:
+        return [Opcode(line) for line in program]
+
+def one_at_a_time(code, inputs):
+    results = []
+    for values in inputs:
+        queue = iter(values)
+        outputs = []
+        uvsim = UVSim(reader=lambda: next(queue), writer=outputs.append, memory=Memory(code))
+        uvsim.execute(preview=False)
+        results.append(outputs)
+    return results
+
+def main():
+    lanes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(0)
+
+    print(f"{'program':<12}{'UVSim loop (s)':>16}{'lockstep (s)':>14}{'speedup':>10}")
+    for filename in PROGRAMS:
+        code = read_program(filename)
+        inputs = [[rng.randint(-9999, 9999), rng.randint(-9999, 9999)] for _ in range(lanes)]
+
+        start = time.perf_counter()
+        one_at_a_time(code, inputs)
+        looped = time.perf_counter() - start
+
+        start = time.perf_counter()
+        LockstepVM(code, lanes).run(inputs).outputs
+        lockstep = time.perf_counter() - start
+
+        print(f"{filename:<12}{looped:>16.3f}{lockstep:>14.3f}{looped / lockstep:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
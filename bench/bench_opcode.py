@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""
+Measure the memory cost of Opcode objects with tracemalloc.
+
+Compares building arithmetic results the old way, by formatting them and going back through
+the validating string constructor, against the integer path used by the arithmetic operators now.
+
+Usage: python bench/bench_opcode.py [vms]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.memory import Memory
+from src.opcodes import Opcode
+
+def traced(build):
+    """
+    Return how many bytes are still allocated by whatever `build` returns
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = build()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del kept
+    return after - before, peak - before
+
+def arithmetic_by_string(count):
+    acc = Opcode("+0000")
+    one = Opcode("+0001")
+    results = []
+    for _ in range(count):
+        acc = Opcode(f"{acc.numeric + one.numeric:+07d}")
+        results.append(acc)
+    return results
+
+def arithmetic_by_int(count):
+    acc = Opcode("+0000")
+    one = Opcode("+0001")
+    results = []
+    for _ in range(count):
+        acc = acc + one
+        results.append(acc)
+    return results
+
+def vms_by_string(vms, words):
+    return [Memory([Opcode(f"{word:+07d}") for word in words]) for _ in range(vms)]
+
+def vms_by_int(vms, words):
+    return [Memory([Opcode.from_int(word) for word in words]) for _ in range(vms)]
+
+def main():
+    vms = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    count = 100000
+    words = [(i % 44) * 1000 + (i % 100) for i in range(Memory.LAST_ADDRESS)] ## a full program of instruction words
+
+    print(f"{'case':<36}{'retained bytes':>16}{'peak bytes':>14}")
+    for label, build in [
+        (f"{count} ADDs via string", lambda: arithmetic_by_string(count)),
+        (f"{count} ADDs via int", lambda: arithmetic_by_int(count)),
+        (f"{vms} resident VMs via string", lambda: vms_by_string(vms, words)),
+        (f"{vms} resident VMs via int", lambda: vms_by_int(vms, words)),
+    ]:
+        retained, peak = traced(build)
+        print(f"{label:<36}{retained:>16,}{peak:>14,}")
+
+if __name__ == '__main__':
+    main()
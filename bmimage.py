@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""
+Convert BasicML programs between the text format and the binary image format, see `src/image.py`.
+
+Text programs become `program.bmi` next to `program.txt`, images become text with `--text`.
+"""
+
+import argparse
+import os
+import sys
+
+from src.image import ProgramImage
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert BasicML text programs to binary images and back.")
+    parser.add_argument("programs", nargs="+", help="programs to convert")
+    parser.add_argument("--text", action="store_true", help="convert images back to the text format")
+    parser.add_argument("-o", "--output", default=None,
+                        help="where to write the result, only with a single program (default: next to the program)")
+    args = parser.parse_args()
+
+    if args.output and len(args.programs) > 1:
+        parser.error("--output needs exactly one program")
+
+    failed = False
+    for program in args.programs:
+        try:
+            output = convert(program, args.output, args.text)
+            print(f"{program} -> {output}")
+        except (OSError, ValueError, IndexError) as e:
+            print(f"{program}: {e}", file=sys.stderr)
+            failed = True
+
+    if failed:
+        exit(1)
+
+def convert(program, output=None, to_text=False):
+    """
+    Convert one program, returning where the result was written
+
+    Raises:
+        ImageError: If an image to convert back is not valid.
+        ValueError, IndexError: If a text program is not, see `ProgramImage.from_text`.
+    """
+    base = os.path.splitext(program)[0]
+    if to_text:
+        output = output or base + ".txt"
+        ProgramImage.load(program).to_text(output)
+    else:
+        output = output or base + ProgramImage.EXTENSION
+        ProgramImage.from_text(program).save(output)
+
+    return output
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+"""
+Convert a directory tree of BasicML programs from the 4-digit word format to the 6-digit one, in parallel.
+
+Files already in the 6-digit format are skipped, and a file that can't be converted is left as it was.
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+from src.converter import Converter
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert 4-digit BasicML programs to the 6-digit format in place.")
+    parser.add_argument("root", help="directory to search for programs")
+    parser.add_argument("--pattern", default="*.txt", help="programs to convert (default: *.txt)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list every file, not just the ones that failed")
+    args = parser.parse_args()
+
+    counts = {Converter.CONVERTED: 0, Converter.SKIPPED: 0, Converter.FAILED: 0}
+    words = 0
+    start = perf_counter()
+
+    for filename, status, converted, error in Converter.convert_tree(args.root, args.pattern, args.workers):
+        counts[status] += 1
+        words += converted
+        if status == Converter.FAILED:
+            print(f"failed: {error}", file=sys.stderr)
+        elif args.verbose:
+            print(f"{status}: {filename}")
+
+    summary(counts, words, perf_counter() - start)
+    if counts[Converter.FAILED]:
+        exit(1)
+
+def summary(counts, words, elapsed):
+    """
+    Report how many files were converted and how fast
+    """
+    files = sum(counts.values())
+    rate = files / elapsed if elapsed > 0 else float("inf")
+    print(f"Converted {counts[Converter.CONVERTED]} files ({words} words), skipped {counts[Converter.SKIPPED]}, "
+          f"failed {counts[Converter.FAILED]} in {elapsed:.3f}s ({rate:,.0f} files/sec)")
+
+if __name__ == '__main__':
+    main()
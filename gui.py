@@ -1,18 +1,212 @@
 import json
 import tkinter as tk
 from tkinter import filedialog, colorchooser, messagebox, ttk
-from uvsim import UVSim, Opcode
+from src.opcodes import Opcode
+from src.sim_worker import SimWorker
+from src.journal import Journal
+from src.profiler import Profiler
+
+class MemoryPanel(tk.Frame):
+    """
+    A scrolling view of memory that only has widgets for the rows on screen.
+
+    The pool of row widgets is created once. Scrolling changes which address each row shows,
+    and `refresh` only rereads the words memory reports as written since the last refresh
+    and only reconfigures the labels whose text or highlight actually changed,
+    so the cost of an update doesn't depend on how big the program is.
+    """
+    ROWS = 19
+    HEAT_COLORS = ["#7A6A2E", "#B5812A", "#D9661F", "#C0392B"] ## From least to most executed, see `heat`
+
+    def __init__(self, parent, primary_color, off_color, on_edit=None, **kwargs):
+        """
+        Args:
+            primary_color, off_color: Colors of the rows, swapped to highlight the current instruction.
+            on_edit: Called with (address, text) when the user edits a word in place.
+        """
+        super().__init__(parent, bg=primary_color, **kwargs)
+        self.primary_color = primary_color
+        self.off_color = off_color
+        self.on_edit = on_edit
+        self.first = 0 ## Address shown in the top row
+        self.count = 0 ## How many addresses there are to scroll through
+        self.current = None
+        self.__memory = None
+        self.__tracker = None ## Addresses written to since the last refresh, see `Memory.subscribe`
+        self.__shown = [None] * MemoryPanel.ROWS ## What each row displayed last time, to skip unchanged rows
+        self.__editing = None
+        self.breakpoints = set() ## Addresses a run stops at, toggled by right-clicking an address
+        self.heat = None ## Optional `Profiler` whose execution counts color the addresses
+
+        rows = tk.Frame(self, bg=primary_color)
+        rows.pack(side=tk.LEFT, fill=tk.BOTH)
+        self.__rows = []
+        for row in range(MemoryPanel.ROWS):
+            address_label = tk.Label(rows, font=("Courier", 10), width=3, bg=primary_color, fg=off_color)
+            address_label.grid(row=row, column=0, padx=10, pady=5)
+            address_label.bind("<Button-3>", lambda event, row=row: self.toggle_breakpoint(row))
+            value_label = tk.Label(rows, font=("Courier", 10), width=7, cursor="xterm", bg=primary_color, fg=off_color)
+            value_label.grid(row=row, column=1, padx=10, pady=5)
+            value_label.bind("<Button-1>", lambda event, row=row: self.start_edit(row))
+            friendly_label = tk.Label(rows, font=("Courier", 10), width=14, anchor="w", bg=primary_color, fg=off_color)
+            friendly_label.grid(row=row, column=2, padx=10, pady=5)
+            self.__rows.append((address_label, value_label, friendly_label))
+
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill="y")
+        for widget in [self, rows] + [label for row in self.__rows for label in row]:
+            widget.bind("<MouseWheel>", lambda event: self.scroll("scroll", -1 if event.delta > 0 else 1, "units"))
+            widget.bind("<Button-4>", lambda event: self.scroll("scroll", -1, "units"))
+            widget.bind("<Button-5>", lambda event: self.scroll("scroll", 1, "units"))
+
+    def scroll(self, action, amount, unit=None):
+        """
+        Scrollbar command, see the Tk scrollbar protocol
+        """
+        if action == "moveto":
+            first = round(float(amount) * self.count)
+        elif unit == "pages":
+            first = self.first + int(amount) * MemoryPanel.ROWS
+        else:
+            first = self.first + int(amount)
+
+        self.show(first)
+
+    def show(self, first):
+        """
+        Scroll so `first` is the top row
+        """
+        self.first = max(0, min(first, self.count - MemoryPanel.ROWS))
+        self.refresh()
+
+    def follow(self, address):
+        """
+        Scroll just enough for `address` to be on screen
+        """
+        if address < self.first:
+            self.show(address)
+        elif address >= self.first + MemoryPanel.ROWS:
+            self.show(address - MemoryPanel.ROWS + 1)
+
+    def reset(self):
+        """
+        Forget what was displayed, e.g. after a different program was loaded
+        """
+        self.cancel_edit()
+        self.first = 0
+        self.__shown = [None] * MemoryPanel.ROWS
+
+    def redraw(self):
+        """
+        Reread every visible word on the next refresh instead of trusting what was shown
+        """
+        self.__shown = [None] * MemoryPanel.ROWS
+        self.refresh()
+
+    def refresh(self, memory=None, current=None):
+        """
+        Bring the visible rows up to date with memory and the current instruction.
+
+        Args:
+            memory (Memory): Memory to display. Defaults to the one from the last call.
+            current (int): Address to highlight. Defaults to the one from the last call.
+        """
+        if memory is not None and memory is not self.__memory:
+            if self.__tracker is not None:
+                self.__memory.unsubscribe(self.__tracker)
+            self.__memory = memory
+            self.__tracker = memory.subscribe()
+            self.__shown = [None] * MemoryPanel.ROWS
+        if current is not None:
+            self.current = current
+        if self.__memory is None:
+            return
+
+        self.count = self.__memory.extent
+        self.first = max(0, min(self.first, self.count - MemoryPanel.ROWS))
+
+        dirty = set(self.__tracker.drain())
+        hottest = max(self.heat.executions) if self.heat is not None else 0
+
+        for row, (address_label, value_label, friendly_label) in enumerate(self.__rows):
+            address = self.first + row
+            previous = self.__shown[row]
+            if address >= self.count:
+                shown = (None, "", "", False, False, 0)
+            else:
+                heat = -(-len(MemoryPanel.HEAT_COLORS) * self.heat.executions[address] // hottest) if hottest else 0 ## 0 when never executed, otherwise 1 up to the number of colors
+                if previous is not None and previous[0] == address and address not in dirty:
+                    shown = previous[:3] + (address == self.current, address in self.breakpoints, heat) ## Same word, only the markers can have moved
+                else:
+                    opcode = self.__memory.read(address)
+                    shown = (address, str(opcode), opcode.human_friendly, address == self.current, address in self.breakpoints, heat)
+
+            if shown == self.__shown[row]:
+                continue
+            self.__shown[row] = shown
+
+            address, value, friendly, highlighted, breakpoint, heat = shown
+            background = MemoryPanel.HEAT_COLORS[heat - 1] if heat else self.primary_color
+            address_label.config(text="" if address is None else f"*{address}" if breakpoint else address,
+                                 bg=self.off_color if highlighted else background,
+                                 fg=self.primary_color if highlighted else self.off_color)
+            value_label.config(text=value)
+            friendly_label.config(text=friendly)
+
+        if self.count > 0:
+            self.scrollbar.set(self.first / self.count, min(1.0, (self.first + MemoryPanel.ROWS) / self.count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def toggle_breakpoint(self, row):
+        """
+        Set or clear a breakpoint on the address shown in a row
+        """
+        address = self.first + row
+        if address >= self.count:
+            return
+
+        self.breakpoints ^= {address}
+        self.refresh()
+
+    def start_edit(self, row):
+        """
+        Replace a word with an entry box so it can be edited in place
+        """
+        address = self.first + row
+        if self.on_edit is None or address >= self.count:
+            return
+
+        self.cancel_edit()
+        value_label = self.__rows[row][1]
+        entry = tk.Entry(value_label.master, font=("Courier", 10), width=7, bg=self.primary_color, fg=self.off_color)
+        entry.insert(0, value_label.cget("text"))
+        entry.grid(row=row, column=1, padx=10, pady=5)
+        entry.bind("<Return>", lambda event: self.finish_edit(address, entry.get()))
+        entry.bind("<Escape>", lambda event: self.cancel_edit())
+        entry.focus()
+        self.__editing = entry
+
+    def finish_edit(self, address, text):
+        self.cancel_edit()
+        self.on_edit(address, text)
+
+    def cancel_edit(self):
+        if self.__editing is not None:
+            self.__editing.destroy()
+            self.__editing = None
 
 class Window:
+    FRAME_MS = 33 ## Time between redraws, about 30 frames per second
+    JOURNAL_DEPTH = 10000 ## How many instructions Step Back can undo
+    SPEEDS = {"Single step": 0, "1 per frame": 1, "10 per frame": 10, "100 per frame": 100, "1000 per frame": 1000, "Run to breakpoint": None}
+
     def __init__(self, root):
-        self.simulation_started = False
-        self.simulation_running = False
         self.tab_reset = False
-        self.uvsim_instances = {}
+        self.workers = {} ## Tab index -> the SimWorker running that tab's UVSim
         self.root = root
-        self.input_var = tk.StringVar()
+        self.speed_var = tk.StringVar(value="10 per frame")
         self.root.title("UVSim - BasicML Simulator")
-        self.output_log = []
 
         self.default_primary_color = "#275D38"
         self.default_off_color = "#FFFFFF"
@@ -29,65 +223,64 @@ class Window:
 
         self.tab_setup()
         self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_change)
+        self.root.after(Window.FRAME_MS, self.poll_workers)
 
     def on_tab_change(self, event):
-        if self.simulation_running:
-            # Revert to the previous tab
-            self.tab_control.select(self.current_tab)
-            messagebox.showwarning("Simulation Running", "You cannot switch tabs while simulation is running.")
-        else:
-            self.current_tab = self.tab_control.select()
-            self.uvsim = self.uvsim_instances[self.tab_control.index("current")]
+        self.current_tab = self.tab_control.select()
+        self.worker = self.workers[self.tab_control.index("current")]
+        self.uvsim = self.worker.uvsim
 
-    
     def tab_setup(self):
-        if not self.simulation_running:
-            tab_index = len(self.uvsim_instances)
-            new_uvsim = UVSim(reader=self.tk_reader, writer=self.tk_writer)
-            self.uvsim_instances[tab_index] = new_uvsim
-
-            newTab = ttk.Frame(self.tab_control)
-            newTab.configure(style='Custom.TFrame')
-
-            self.tab_control.add(newTab, text='New Tab')
-            self.tab_control.pack(expand=1, fill="both")
-            
-            self.title_screen_frame(newTab)
-            self.main_screen_frame(newTab)
-
-            self.tab_control.select(newTab)
-            self.current_tab = self.tab_control.select()
-            self.uvsim = new_uvsim
-        else:
-            messagebox.showwarning("Simulation Running", "You cannot create tabs while simulation is running.")
+        tab_index = len(self.workers)
+        new_worker = SimWorker()
+        new_worker.uvsim.cpu.journal = Journal(Window.JOURNAL_DEPTH)
+        new_worker.uvsim.cpu.profiler = Profiler()
+        self.workers[tab_index] = new_worker
+
+        newTab = ttk.Frame(self.tab_control)
+        newTab.configure(style='Custom.TFrame')
+        newTab.worker = new_worker
+        newTab.simulation_started = False
+        newTab.output_log = []
+
+        self.tab_control.add(newTab, text='New Tab')
+        self.tab_control.pack(expand=1, fill="both")
+        
+        self.title_screen_frame(newTab)
+        self.main_screen_frame(newTab)
+
+        self.tab_control.select(newTab)
+        self.current_tab = self.tab_control.select()
+        self.worker = new_worker
+        self.uvsim = new_worker.uvsim
     
     def close_tab(self):
-        if not self.simulation_running:
-            current_tab_index = self.tab_control.index("current")
-            
-            if len(self.uvsim_instances) <= 1 and not self.tab_reset:
-                self.root.quit()
-                return
-
-            if not self.tab_reset:
-                if current_tab_index == 0:
-                    self.tab_control.select(1)
-                else:
-                    self.tab_control.select(0)
-            
-            self.uvsim_instances.pop(current_tab_index)
+        current_tab_index = self.tab_control.index("current")
+        
+        if len(self.workers) <= 1 and not self.tab_reset:
+            self.worker.halt()
+            self.root.quit()
+            return
+
+        self.workers[current_tab_index].halt()
+
+        if not self.tab_reset:
+            if current_tab_index == 0:
+                self.tab_control.select(1)
+            else:
+                self.tab_control.select(0)
+        
+        self.workers.pop(current_tab_index)
 
-            self.tab_control.forget(current_tab_index)
+        self.tab_control.forget(current_tab_index)
 
-            updated_uvsim_instances = {}
-            for new_index, old_index in enumerate(sorted(self.uvsim_instances.keys())):
-                updated_uvsim_instances[new_index] = self.uvsim_instances[old_index]
+        updated_workers = {}
+        for new_index, old_index in enumerate(sorted(self.workers.keys())):
+            updated_workers[new_index] = self.workers[old_index]
 
-            self.uvsim_instances = updated_uvsim_instances
+        self.workers = updated_workers
 
-            self.current_tab = self.tab_control.select()
-        else:
-            messagebox.showwarning("Simulation Running", "You cannot create tabs while simulation is running.")
+        self.current_tab = self.tab_control.select()
 
 
     def load_config(self):
@@ -122,7 +315,9 @@ class Window:
         help_window.configure(bg=self.primary_color)
         help_label = tk.Label(help_window, text="Instructions\n\n1. Select a test file to load the program.\n"
                                                 "2. Use the Start button to begin simulation.\n"
-                                                "3. Use Step button to execute instructions one at a time.\n"
+                                                "3. Use Step button to execute instructions one at a time, or pick a speed for Start and Play.\n"
+                                                "   Right-click an address to set a breakpoint.\n"
+                                                "   Step Back undoes the last instruction, Run Back undoes instructions back to a breakpoint.\n"
                                                 "4. Use the Halt button to stop the simulation.\n"
                                                 "5. Refer to the opcode definitions for specific actions (e.g., READ, WRITE, LOAD, etc.).",
                               bg=self.primary_color, fg=self.off_color)
@@ -160,6 +355,12 @@ class Window:
                                  highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat")
         close_button.pack(pady=10)
 
+    def tab_frame(self, tab=None):
+        return self.tab_control.nametowidget(tab if tab is not None else self.current_tab)
+
+    def memory_panel(self, tab=None):
+        return self.tab_frame(tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_panel")
+
     def start_program(self):
         self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").pack_forget()
         self.tab_control.nametowidget(self.current_tab).nametowidget("title_frame").pack()
@@ -170,7 +371,8 @@ class Window:
         self.close_tab()
         self.tab_setup()
         self.current_tab = self.tab_control.select()
-        self.uvsim = self.uvsim_instances[self.tab_control.index("current")]
+        self.worker = self.workers[self.tab_control.index("current")]
+        self.uvsim = self.worker.uvsim
         self.tab_reset = False
 
     def browse_files(self):
@@ -187,9 +389,7 @@ class Window:
             self.tab_control.nametowidget(self.current_tab).nametowidget("title_frame").pack_forget()
             self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").pack(padx=20, pady=20)
             self.tab_control.tab(self.tab_control.index(self.tab_control.select()), text=file_path.split('/')[-1])
-            for widget in self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame").winfo_children():
-                widget.destroy()
-            self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").create_window((0, 0), window=self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame"))
+            self.memory_panel().reset()
             self.update_main_control_frame()
             self.root.update_idletasks()  # Force the window to update its size
             self.uvsim.cpu.current = 0
@@ -227,6 +427,8 @@ class Window:
             for address in range(len(opcode_list)):
                 self.uvsim.mem.write(address, opcode_list[address])
             print("memory updated succesfully")
+            self.tab_control.nametowidget(self.current_tab).edit_field.destroy()
+            self.memory_panel().pack(side=tk.LEFT, fill=tk.BOTH)
             self.update_main_control_frame()
             self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(text="Advanced Edit", command=self.edit_memory)
         except ValueError as e:
@@ -238,148 +440,180 @@ class Window:
         '''Open the advanced editor for memory editing.'''
         content = self.uvsim.cpu.gui_preview_state(self.uvsim.mem)
         self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(text="Submit Changes", command=self.submit_memory_edit)
-        for widget in self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame").winfo_children():
-            widget.destroy()
-            
-        self.tab_control.nametowidget(self.current_tab).edit_field = tk.Text(self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame"), font=("Courier", 10), bg=self.primary_color, fg=self.off_color, width=8, height=19)
-        self.tab_control.nametowidget(self.current_tab).edit_field.grid(row=0, column=0, padx=10, pady=4, sticky="nsew")
-        
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame").grid_columnconfigure(0, weight=1)
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame").grid_rowconfigure(0, weight=1)
-        
+        memory_panel = self.memory_panel()
+        memory_panel.cancel_edit()
+        memory_panel.pack_forget()
+
+        self.tab_control.nametowidget(self.current_tab).edit_field = tk.Text(memory_panel.master, font=("Courier", 10), bg=self.primary_color, fg=self.off_color, width=8, height=19)
+        self.tab_control.nametowidget(self.current_tab).edit_field.pack(side=tk.LEFT, fill=tk.BOTH, padx=10, pady=4)
+
         text_to_show = ""
         for thing in content:
             text_to_show += f"{thing[1]}\n"
         self.tab_control.nametowidget(self.current_tab).edit_field.insert(tk.END, text_to_show)
-        
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame").update_idletasks()
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").config(scrollregion=self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").bbox("all"))
-
 
-    def modify_memory(self, slot, entry):
+    def modify_memory(self, address, entry):
             '''Modify the memory slot with the given entry.'''
             try:
                 entry = int(entry)
-                self.uvsim.mem.write(slot[0], entry)
+                self.uvsim.mem.write(address, entry)
                 self.update_main_control_frame()
                 print("Memory updated.")
             except ValueError as e:
                 messagebox.showerror("Error", f"Please enter a valid integer value.\n{e}")
                 self.update_main_control_frame()
 
-    def on_click_opcode(self, slot, label):
-        label.forget()
-        entry = tk.Entry(self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("memory_display_frame").nametowidget("memory_canvas").nametowidget("memory_inner_frame"), font=("Courier", 10), width=5, bg=self.primary_color, fg=self.off_color)
-        entry.insert(0, slot[1])
-        entry.bind("<Return>", lambda event: self.modify_memory(slot, entry.get()))
-        entry.grid(row=slot[0], column=1, padx=10, pady=5)
-
-    def update_main_control_frame(self):
-
-        
-        # for child in self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").winfo_children():
-        #     print(child.winfo_name())
-
-        main_control_frame = self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame")
-        top_frame = main_control_frame.nametowidget("top_frame")
-        memory_canvas = top_frame.nametowidget("memory_display_frame").nametowidget("memory_canvas")
-        memory_inner_frame = memory_canvas.nametowidget("memory_inner_frame")
+    def update_main_control_frame(self, tab=None):
+        main_control_frame = self.tab_frame(tab).nametowidget("main_control_frame")
         current_instruction_display = main_control_frame.nametowidget("bottom_frame").nametowidget("current_instruction_panel").nametowidget("current_instruction_display")
+        uvsim = self.tab_frame(tab).worker.uvsim if tab is not None else self.uvsim
 
-        if not self.uvsim.cpu.halted:
-            for widget in memory_inner_frame.winfo_children():
-                widget.destroy()
-            current_instruction_display.config(text=f"[ {str(self.uvsim.cpu.current)} ]")
-            contents = self.uvsim.cpu.gui_preview_state(self.uvsim.mem)
-            memory_canvas.create_window((0, 0), window=memory_inner_frame, anchor="nw")
-            for slot in contents:
-                memory_address_label = tk.Label(memory_inner_frame, text=slot[0], font=("Courier", 10),
-                                         bg=self.primary_color, fg=self.off_color)
-                memory_address_label.grid(row=slot[0], column=0, padx=10, pady=5)
-                if self.uvsim.cpu.current == slot[0]:
-                    memory_address_label.config(bg=self.off_color, fg=self.primary_color)
-                    memory_canvas.yview_moveto(slot[0] / len(contents))  # Focus on the current address label
-                memory_value_label = tk.Label(memory_inner_frame, text=slot[1], font=("Courier", 10), cursor="xterm",
-                                       bg=self.primary_color, fg=self.off_color)
-                memory_value_label.grid(row=slot[0], column=1, padx=10, pady=5)
-                memory_value_label.bind("<Button-1>", lambda event, slot=slot, label=memory_value_label: self.on_click(slot, label))
-                memory_value_friendly_label = tk.Label(memory_inner_frame, text=slot[2], font=("Courier", 10),
-                                               bg=self.primary_color, fg=self.off_color)
-                memory_value_friendly_label.grid(row=slot[0], column=2, padx=10, pady=5)
-     
-                memory_inner_frame.update_idletasks()
-                memory_canvas.config(scrollregion=memory_canvas.bbox("all"))
+        if not uvsim.cpu.halted:
+            current_instruction_display.config(text=f"[ {str(uvsim.cpu.current)} ]")
+            memory_panel = self.memory_panel(tab)
+            memory_panel.refresh(uvsim.mem, uvsim.cpu.current)
+            memory_panel.follow(uvsim.cpu.current) # Focus on the current address
 
     def start_simulation(self):
         if not hasattr(self.tab_control.nametowidget(self.current_tab), 'edit_field'):
             self.edit_memory()  # Ensure edit_field is created
             self.submit_memory_edit()
+        if self.worker.busy:
+            return
         self.uvsim.cpu.current = 0
         self.uvsim.cpu.halted = False
         self.uvsim.cpu.acc = Opcode("0000")
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(state="disabled")
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("start_simulation_button").config(state="disabled")
         self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("output_panel").nametowidget("output_label").config(text="N/A") # Update the output display with the entire log
-        self.output_log = []
-        self.simulation_running = True
-        self.simulation_started = True
-        self.run_simulation_step()
-
-    def run_simulation_step(self):
-        if self.simulation_running and not self.uvsim.cpu.waiting_for_input:
-            self.execute_step()
-            self.root.after(200, self.run_simulation_step)
-
-    def halt_simulation(self):
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(state="normal")
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("start_simulation_button").config(state="normal")
-        self.simulation_running = False
-        self.simulation_started = False
-        self.uvsim.cpu.halt()
-        self.update_main_control_frame()
-        self.uvsim.cpu.current = 0
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("current_instruction_panel").nametowidget("current_instruction_display").config(text=f"[ {str(self.uvsim.cpu.current)} ]")
+        self.tab_frame().output_log = []
+        self.tab_frame().simulation_started = True
+        self.worker.steps = 0
+        self.uvsim.cpu.journal.clear()
+        self.uvsim.cpu.profiler.clear()
+        self.resume_simulation()
+
+    def resume_simulation(self):
+        self.worker.speed = Window.SPEEDS[self.speed_var.get()]
+        self.worker.breakpoints = self.memory_panel().breakpoints ## Shared, so breakpoints set while running take effect
+        self.show_running(True)
+        self.worker.start()
+
+    def show_running(self, running, tab=None):
+        program_control_panel = self.tab_frame(tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel")
+        program_control_panel.nametowidget("advanced_editor_button").config(state="disabled" if running else "normal")
+        program_control_panel.nametowidget("start_simulation_button").config(state="disabled" if running else "normal")
+        program_control_panel.nametowidget("pause_button").config(text="Pause" if running else "Play")
+
+    def poll_workers(self):
+        """
+        Handle whatever every tab's worker reported since the last frame, and redraw the visible tab while it runs.
+        """
+        tabs = self.tab_control.tabs()
+        for index, worker in list(self.workers.items()):
+            if index >= len(tabs):
+                continue
+            tab = tabs[index]
+            for event in worker.poll():
+                self.handle_event(tab, event)
+            if worker.busy and str(tab) == str(self.current_tab):
+                self.refresh_display()
+
+        self.root.after(Window.FRAME_MS, self.poll_workers)
+
+    def handle_event(self, tab, event):
+        """
+        React to one event from a tab's worker, see `SimWorker`
+        """
+        kind = event[0]
+        main_control_frame = self.tab_frame(tab).nametowidget("main_control_frame")
+
+        if kind == "output":
+            self.tk_writer(event[1], tab)
+        elif kind == "error":
+            print(event[1])
+        elif kind == "input":
+            main_control_frame.nametowidget("prompt_label").pack(side=tk.BOTTOM, padx=10, pady=(10, 0))
+            if str(tab) == str(self.current_tab):
+                main_control_frame.nametowidget("bottom_frame").nametowidget("user_input_label").nametowidget("user_input").focus()
+        elif kind == "paused":
+            self.show_running(False, tab)
+            self.memory_panel(tab).redraw()
+            self.refresh_display(tab)
+        elif kind == "halted":
+            self.refresh_display(tab)
+            self.halt_simulation(tab)
+        elif kind == "failed":
+            messagebox.showerror("Error", f"The program stopped with an error.\n{event[1]}")
+            self.halt_simulation(tab)
+
+    def halt_simulation(self, tab=None):
+        worker = self.tab_frame(tab).worker if tab is not None else self.worker
+        worker.halt(wait=1)
+        self.show_running(False, tab)
+        self.tab_frame(tab).simulation_started = False
+        self.tab_frame(tab).nametowidget("main_control_frame").nametowidget("prompt_label").pack_forget()
+        worker.uvsim.cpu.halt()
+        self.memory_panel(tab).redraw()
+        self.update_main_control_frame(tab)
+        worker.uvsim.cpu.current = 0
+        self.tab_frame(tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("current_instruction_panel").nametowidget("current_instruction_display").config(text=f"[ {str(worker.uvsim.cpu.current)} ]")
         messagebox.showinfo("Simulation Halted", "The simulation has been halted.")
 
     def pause(self):
-        if self.simulation_started == True:
-            self.simulation_running = not self.simulation_running
-            if self.simulation_running:
-                self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(state="disabled")
-                self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("start_simulation_button").config(state="disabled")
-                self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("pause_button").config(text="Pause")
-            else:
-                self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(state="normal")
-                self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("start_simulation_button").config(state="normal")
-                self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("pause_button").config(text="Play")
-            self.run_simulation_step()
+        if self.tab_frame().simulation_started == True:
+            if self.worker.running:
+                self.worker.pause()
+                self.show_running(False)
+            elif not self.worker.busy:
+                self.resume_simulation()
 
     def execute_step(self):
-        self.uvsim.cpu.step(self.uvsim.mem, self.uvsim.io_device)
-        self.update_main_control_frame() #this is causing the program to refresh memory every step which makes it take longer to load
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("program_control_panel").nametowidget("advanced_editor_button").config(state="disabled")
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("current_instruction_panel").nametowidget("current_instruction_display").config(text=f"[ {str(self.uvsim.cpu.current)} ]")
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("control_panel").nametowidget("current_instruction_label").config(text=f"[ {str(self.uvsim.cpu.acc)} ]") 
-        if self.uvsim.cpu.halted:
-            self.halt_simulation()
-        
+        if not self.worker.busy:
+            self.worker.breakpoints = self.memory_panel().breakpoints
+            self.worker.step()
+
+    def toggle_heat_map(self):
+        """
+        Color the memory panel's addresses by how often they were executed, or stop doing so
+        """
+        memory_panel = self.memory_panel()
+        memory_panel.heat = None if memory_panel.heat is not None else self.uvsim.cpu.profiler
+        memory_panel.redraw()
+
+    def step_back(self, to_breakpoint=False):
+        """
+        Undo the last instruction, or every instruction back to the previous breakpoint, using the CPU's journal
+        """
+        if self.worker.busy:
+            return
+
+        memory_panel = self.memory_panel()
+        if to_breakpoint:
+            undone = self.uvsim.cpu.journal.rewind(self.uvsim.cpu, self.uvsim.mem, memory_panel.breakpoints)
+        else:
+            undone = int(self.uvsim.cpu.journal.undo(self.uvsim.cpu, self.uvsim.mem))
 
-    def tk_reader(self):
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("prompt_label").pack(side=tk.BOTTOM, padx=10, pady=(10, 0))
-        self.input_var.set("")
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("user_input_label").nametowidget("user_input").focus()
-        self.root.wait_variable(self.input_var)
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("prompt_label").pack_forget()
-        return self.input_var.get()
+        if undone == 0:
+            messagebox.showinfo("Step Back", "There are no more instructions to undo.")
+            return
+
+        self.worker.steps -= undone
+        self.refresh_display()
+
+    def refresh_display(self, tab=None):
+        uvsim = self.tab_frame(tab).worker.uvsim if tab is not None else self.uvsim
+        self.update_main_control_frame(tab)
+        self.tab_frame(tab).nametowidget("main_control_frame").nametowidget("top_frame").nametowidget("control_panel").nametowidget("current_instruction_label").config(text=f"[ {str(uvsim.cpu.acc)} ]")
 
     def submit_input(self, event=None):
         user_input = self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("user_input_label").nametowidget("user_input").get()
         self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("user_input_label").nametowidget("user_input").delete(0, tk.END)
-        self.input_var.set(user_input)
+        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("prompt_label").pack_forget()
+        self.worker.provide(user_input)
 
-    def tk_writer(self, text):
-        self.output_log.append(str(text))  # Append the new output to the log
-        self.tab_control.nametowidget(self.current_tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("output_panel").nametowidget("output_label").config(text="\n".join(self.output_log)) # Update the output display with the entire log
+    def tk_writer(self, text, tab=None):
+        output_log = self.tab_frame(tab).output_log
+        output_log.append(str(text))  # Append the new output to the log
+        self.tab_frame(tab).nametowidget("main_control_frame").nametowidget("bottom_frame").nametowidget("output_panel").nametowidget("output_label").config(text="\n".join(output_log)) # Update the output display with the entire log
 
     def title_screen_frame(self, tab, event=None):
         title_frame = tk.Frame(tab, bg=self.primary_color, name="title_frame")
@@ -448,11 +682,31 @@ class Window:
                                             highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat", name="start_simulation_button")
         start_simulation_button.pack(pady=5)
 
+        speed_menu = tk.OptionMenu(program_control_panel, self.speed_var, *Window.SPEEDS)
+        speed_menu.config(bg=self.off_color, fg=self.primary_color, highlightbackground=self.primary_color,
+                          activebackground=self.primary_color, borderwidth=0, relief="flat")
+        speed_menu.pack(pady=5)
+
         step_execution_button = tk.Button(program_control_panel, text="Step Execution", command=self.execute_step,
                                           bg=self.off_color, fg=self.primary_color, highlightbackground=self.primary_color,
                                           highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat")
         step_execution_button.pack(pady=5)
 
+        step_back_button = tk.Button(program_control_panel, text="Step Back", command=self.step_back,
+                                     bg=self.off_color, fg=self.primary_color, highlightbackground=self.primary_color,
+                                     highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat")
+        step_back_button.pack(pady=5)
+
+        run_back_button = tk.Button(program_control_panel, text="Run Back", command=lambda: self.step_back(to_breakpoint=True),
+                                    bg=self.off_color, fg=self.primary_color, highlightbackground=self.primary_color,
+                                    highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat")
+        run_back_button.pack(pady=5)
+
+        heat_map_button = tk.Button(program_control_panel, text="Heat Map", command=self.toggle_heat_map,
+                                    bg=self.off_color, fg=self.primary_color, highlightbackground=self.primary_color,
+                                    highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat")
+        heat_map_button.pack(pady=5)
+
         pause_button = tk.Button(program_control_panel, text="Pause", command=self.pause,
                                 bg=self.off_color, fg=self.primary_color, highlightbackground=self.primary_color,
                                 highlightcolor=self.primary_color, activebackground=self.primary_color, borderwidth=0, relief="flat", name="pause_button")
@@ -496,17 +750,8 @@ class Window:
         memory_display_frame = tk.LabelFrame(top_frame, text="Memory Display", bg=self.primary_color, fg=self.off_color, font=("Helvetica", 12), labelanchor='n', name="memory_display_frame")
         memory_display_frame.pack(side=tk.LEFT, fill=tk.BOTH, padx=10, pady=10)
 
-        memory_canvas = tk.Canvas(memory_display_frame, bg=self.primary_color, highlightthickness=0, width=240, name="memory_canvas")
-        memory_canvas.pack(side=tk.LEFT, fill=tk.BOTH)
-
-        memory_scrollbar = tk.Scrollbar(memory_display_frame, orient="vertical", command=memory_canvas.yview)
-        memory_scrollbar.pack(side=tk.RIGHT, fill='y')
-        
-        memory_canvas.configure(yscrollcommand=memory_scrollbar.set)
-        memory_canvas.bind('<Configure>', lambda e: memory_canvas.configure(scrollregion=memory_canvas.bbox("all")))
-
-        memory_inner_frame = tk.Frame(memory_canvas, bg=self.primary_color, name="memory_inner_frame")
-        memory_canvas.create_window((0, 0), window=memory_inner_frame)
+        memory_panel = MemoryPanel(memory_display_frame, self.primary_color, self.off_color, on_edit=self.modify_memory, name="memory_panel")
+        memory_panel.pack(side=tk.LEFT, fill=tk.BOTH)
 
         control_panel = tk.LabelFrame(top_frame, text="Register", bg=self.primary_color, fg=self.off_color, font=("Helvetica", 12), labelanchor='n', name="control_panel")
         control_panel.pack(side=tk.LEFT, fill=tk.BOTH, padx=10, pady=10)
@@ -11,25 +11,133 @@
 # Jordan Paxman                                     #
 #####################################################
 
-from sys import argv
+import argparse
+import sys
+from time import perf_counter
 from uvsim import UVSim
-from src.io_device import IODevice
+from src.cpu import ExecutionLimitExceeded
+from src.io_device import IODevice, StreamIODevice
+from src.profiler import Profiler
+from src.diagnostics import diagnostics
+from src.analysis import Analysis
 
 def main():
     """
     Main function. Starts the simulator and executes a program.
     """
-    banner()
+    args = parse_args()
+    log = sys.stderr if args.stream else sys.stdout ## Keep stdout for the program's own output when streaming
 
-    if len(argv) != 2:
-        print("Please specify a program to execute")
+    if not args.quiet and not args.stream:
+        banner()
+
+    source, sink = open_streams(args)
+    io_device = StreamIODevice(source, sink, threshold=args.buffer) if args.stream else None
+
+    uvsim = UVSim(engine=args.engine, io_device=io_device)
+    uvsim.load(args.program)
+    diagnostics.sink = uvsim.io_device.err
+
+    if args.profile:
+        uvsim.cpu.profiler = Profiler()
+
+    if args.analyze:
+        for finding in Analysis.of(uvsim.mem).report():
+            print(f"Analysis: {finding}", file=log)
+
+    limits = {"max_steps": args.max_steps, "timeout": args.timeout}
+
+    try:
+        if args.quiet or args.trace:
+            start = perf_counter()
+            steps = uvsim.execute(preview=False, trace=args.trace, **limits)
+            summary(steps, perf_counter() - start, log)
+        elif args.stream:
+            uvsim.execute(preview=False, **limits)
+        else:
+            uvsim.execute(**limits)
+    except ExecutionLimitExceeded as e:
+        print(f"{e} (accumulator {e.acc})", file=log)
+        exit(2)
+    except EOFError as e:
+        print(e, file=log)
         exit(1)
+    finally:
+        if args.profile:
+            report(uvsim, args.profile, log)
+        if diagnostics.counts:
+            print("Diagnostics: " + ", ".join(diagnostics.summary()), file=log)
+        for stream in (source, sink):
+            if stream is not None:
+                stream.close()
+
+def open_streams(args):
+    """
+    Open the files given with --input and --output for a streaming run
+
+    Returns:
+        (file, file): The input and output files, None for stdin and stdout.
+    """
+    source = open(args.input) if args.input else None
+    sink = open(args.output, "wb") if args.output else None
+    return source, sink
 
-    program = argv[-1]
-    uvsim   = UVSim()
+def parse_args():
+    """
+    Read the program to execute and how much of the execution to show from the command line
+    """
+    parser = argparse.ArgumentParser(description="Run a BasicML program on the UVSim virtual machine.")
+    parser.add_argument("program", help="BasicML program to execute")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="don't show memory before each instruction, print a summary at the end instead")
+    parser.add_argument("--trace", type=int, default=0, metavar="N",
+                        help="show memory every N instructions instead of every one, implies a summary")
+    parser.add_argument("--max-steps", type=int, default=None, metavar="N",
+                        help="stop the program if it executes more than N instructions")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="stop the program if it runs for longer than this")
+    parser.add_argument("--profile", default=None, metavar="FILE",
+                        help="count executions per address, write them to FILE as JSON and print an annotated listing")
+    parser.add_argument("--engine", choices=UVSim.ENGINES, default="interpreter",
+                        help="how to execute the program, \"compiled\" is faster but only used with --quiet")
+    parser.add_argument("--analyze", action="store_true",
+                        help="report unreachable code, self-modification and loops that can't stop before running")
+    parser.add_argument("--stream", action="store_true",
+                        help="read input lines and write output words without prompts, for pipelines; everything else goes to stderr")
+    parser.add_argument("--input", default=None, metavar="FILE",
+                        help="with --stream, read input from FILE instead of stdin")
+    parser.add_argument("--output", default=None, metavar="FILE",
+                        help="with --stream, write output to FILE instead of stdout")
+    parser.add_argument("--buffer", type=int, default=1024, metavar="N",
+                        help="with --stream, write output once N words are waiting and when the program ends")
+
+    args = parser.parse_args()
+    if args.trace < 0:
+        parser.error("--trace must be a non-negative number of steps, 0 turns it off")
+    if (args.input or args.output) and not args.stream:
+        parser.error("--input and --output need --stream")
+    if args.buffer < 1:
+        parser.error("--buffer must be at least one word")
+
+    return args
+
+def report(uvsim, filename, log=sys.stdout):
+    """
+    Save the profile of the run and show the program annotated with it
+    """
+    profiler = uvsim.cpu.profiler
+    profiler.save(filename)
+
+    program = [uvsim.mem.read(address) for address in range(uvsim.mem.extent)]
+    print("\n".join(profiler.listing(program)), file=log)
+    print(f"Profile written to {filename}", file=log)
 
-    uvsim.load(program)
-    uvsim.execute()
+def summary(steps, elapsed, log=sys.stdout):
+    """
+    Report how many instructions were executed and how fast
+    """
+    rate = steps / elapsed if elapsed > 0 else float("inf")
+    print(f"Executed {steps} instructions in {elapsed:.6f}s ({rate:,.0f} instructions/sec)", file=log)
 
 def banner():
     """
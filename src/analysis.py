@@ -0,0 +1,314 @@
+from bisect import bisect_right
+
+from src.memory import Memory, ArrayMemory
+from src.opcodes import Opcode
+
+class NonTerminating(Exception):
+    """
+    Raised for a program that static analysis shows can never stop, see `Analysis.terminates`.
+    """
+    pass
+
+class BasicBlock:
+    """
+    A run of instructions that always execute one after the other, see `Analysis`.
+
+    Attributes:
+        start (int): Address of the first instruction.
+        end (int): One past the address of the last instruction.
+        successors (tuple): Start addresses of the blocks execution can continue in.
+        exits (bool): Whether execution can stop after the block: HALT, reaching address 99, or a fault.
+    """
+    __slots__ = ("start", "end", "successors", "exits")
+
+    def __init__(self, start, end, successors, exits):
+        self.start = start
+        self.end = end
+        self.successors = successors
+        self.exits = exits
+
+    def __repr__(self):
+        return f"BasicBlock({self.start:02d}-{self.end - 1:02d} -> {', '.join(f'{s:02d}' for s in self.successors) or 'exit'})"
+
+class Analysis:
+    """
+    A static analysis of the program in memory, starting from address 00.
+
+    The words are decoded the way the CPU decodes them and turned into a control-flow graph that
+    follows the interpreter's rules: a taken branch continues at its target + 1, reaching address 99
+    halts, and running past the last address, or using an operand outside memory, fails. Both
+    edges of BRANCHNEG and BRANCHZERO are followed, since the accumulator isn't known.
+
+    Attributes:
+        blocks (dict): Start address -> `BasicBlock`, for every block that can execute.
+        reachable (set): Addresses that can execute.
+        data (set): Addresses that instructions which can execute read or write as data.
+        unreachable (list): Addresses below the extent that neither execute nor are used as data.
+        overlap (list): Addresses that both execute and are used as data.
+        self_modifying (list): (address, target) pairs of READs and STOREs that can write into code.
+        closed_loops (list): Loops, as sorted lists of addresses, that once entered can never
+            stop: nothing in or after them halts, fails, READs or divides, and nothing rewrites them.
+        terminates (bool): False when no run of the program can ever stop, so it is sure not to terminate.
+    """
+    EXIT = -1 ## Successor meaning execution stops
+
+    def __init__(self):
+        self.blocks = {}
+        self.reachable = set()
+        self.data = set()
+        self.unreachable = []
+        self.overlap = []
+        self.self_modifying = []
+        self.closed_loops = []
+        self.terminates = True
+
+    @staticmethod
+    def successors(address, word):
+        """
+        Returns where execution can continue after the instruction at `address`, with `EXIT` for stopping.
+        """
+        operation, operand = divmod(abs(word), 1000)
+
+        if operation == Opcode.HALT:
+            return (Analysis.EXIT,)
+        if operation in Opcode.MEMORY_OPERATIONS and operand > Memory.LAST_ADDRESS:
+            return (Analysis.EXIT,) ## Fails before doing anything
+
+        following = Analysis.__continue_at(address + 1)
+        if operation not in Opcode.BRANCHES:
+            return (following,)
+
+        if operand > Memory.LAST_ADDRESS or operand == 99:
+            taken = Analysis.EXIT ## Fails, or halts as soon as the counter is set to 99
+        else:
+            taken = Analysis.__continue_at(operand + 1)
+
+        if operation == Opcode.BRANCH:
+            return (taken,)
+        return (following, taken) if following != taken else (following,)
+
+    @staticmethod
+    def __continue_at(address):
+        if address == 99 or address > Memory.LAST_ADDRESS: ## Halts, or fails incrementing past the end
+            return Analysis.EXIT
+        return address
+
+    @staticmethod
+    def of(program):
+        """
+        Analyze a program.
+
+        Args:
+            program: A `Memory`, or a list of integer words starting at address 00.
+
+        Returns:
+            Analysis: What was found.
+        """
+        if isinstance(program, ArrayMemory):
+            words, extent = program.words, program.extent ## Not a snapshot, that would make the next write copy memory
+        elif isinstance(program, Memory):
+            words, extent = program.snapshot()
+        else:
+            words, extent = list(program), len(program)
+        decoded = [divmod(abs(word), 1000) for word in words]
+        decoded += [(0, 0)] * (Memory.ADDRESSABLE_SPACE.stop - len(decoded))
+
+        analysis = Analysis()
+        successors = analysis.__explore(decoded)
+        analysis.__find_blocks(successors)
+        analysis.__find_closed_loops()
+
+        analysis.overlap = sorted(analysis.reachable & analysis.data)
+        analysis.unreachable = [address for address in range(extent) if address not in analysis.reachable and address not in analysis.data]
+        return analysis
+
+    def __explore(self, decoded):
+        """
+        Walk every instruction that can execute, collecting what each one reads and writes.
+
+        Most instructions just fall through, so only branches, HALT and faults go through
+        `successors`. This walk is most of the time an analysis takes.
+
+        Returns:
+            dict: Address -> successors, for every reachable address.
+        """
+        successors = {}
+        pending = [0]
+        writes = []
+        escapes = self.__escapes = []
+        enders = self.__enders = [] ## Instructions that don't just fall through, each one ends a block
+        data = self.data
+        last = Memory.LAST_ADDRESS
+        memory_operations = Opcode.MEMORY_OPERATIONS
+        stops = Opcode.BRANCHES | {Opcode.HALT}
+        while pending:
+            address = pending.pop()
+            while address not in successors: ## Follow a run of instructions that fall through without going back to `pending`
+                operation, operand = decoded[address]
+                if operation in stops or operand > last and operation in memory_operations:
+                    following = successors[address] = Analysis.successors(address, operation * 1000 + operand)
+                    enders.append(address)
+                    for next_address in following:
+                        if next_address >= 0 and next_address not in successors: ## Skips `EXIT`
+                            pending.append(next_address)
+                    break
+
+                if operation in memory_operations:
+                    data.add(operand)
+                    if operation == Opcode.READ or operation == Opcode.STORE:
+                        writes.append((address, operand))
+                    if operation == Opcode.READ or operation == Opcode.DIVIDE:
+                        escapes.append(address) ## Input can run out, the divisor can be zero
+
+                if address == 98 or address == last: ## Halts at 99, or fails running off the end
+                    successors[address] = (Analysis.EXIT,)
+                    enders.append(address)
+                    break
+                successors[address] = (address + 1,)
+                address += 1
+
+        self.reachable = set(successors)
+        self.self_modifying = sorted((address, target) for address, target in writes if target in successors)
+        escapes.extend(target for _, target in self.self_modifying) ## Rewritten code may do anything
+        return successors
+
+    def __find_blocks(self, successors):
+        """
+        Split the reachable instructions into blocks. Every instruction between a leader and the next
+        one falls through, so a block runs from its leader up to the next leader.
+        """
+        leaders = {0}
+        for address in self.__enders:
+            leaders.add(address + 1)
+            leaders.update(successors[address])
+        leaders.discard(Analysis.EXIT)
+
+        ordered = sorted(leaders)
+        for start, end in zip(ordered, ordered[1:]):
+            if start in successors:
+                following = successors[end - 1]
+                if Analysis.EXIT in following:
+                    self.blocks[start] = BasicBlock(start, end, tuple(s for s in following if s != Analysis.EXIT), True)
+                else:
+                    self.blocks[start] = BasicBlock(start, end, following, False)
+
+    def __find_closed_loops(self):
+        """
+        Find the blocks from which execution can never stop, and the loops among them.
+
+        A block can stop if it exits, or holds an instruction that READs (input can run out), divides
+        (by zero) or gets rewritten by the program, or if one of its successors can stop. Working on
+        blocks rather than addresses is enough: a loop is only ever entered at the start of a block.
+        """
+        starts = sorted(self.blocks)
+        predecessors = {start: [] for start in starts}
+        stopping = []
+        for start, block in self.blocks.items():
+            if block.exits:
+                stopping.append(start)
+            for following in block.successors:
+                predecessors[following].append(start)
+        stopping.extend(starts[bisect_right(starts, address) - 1] for address in self.__escapes)
+
+        can_stop = set(stopping)
+        while stopping:
+            for previous in predecessors[stopping.pop()]:
+                if previous not in can_stop:
+                    can_stop.add(previous)
+                    stopping.append(previous)
+
+        self.terminates = 0 in can_stop
+        trapped = set(starts) - can_stop
+        if not trapped:
+            return
+
+        successors = {start: self.blocks[start].successors for start in trapped}
+        self.closed_loops = sorted(
+            [address for start in cycle for address in range(start, self.blocks[start].end)]
+            for cycle in Analysis.__cycles(trapped, successors)
+        )
+
+    @staticmethod
+    def __cycles(nodes, successors):
+        """
+        Returns the strongly connected components of the graph restricted to `nodes` that contain a cycle.
+        """
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        cycles = []
+        counter = 0
+
+        for root in sorted(nodes):
+            if root in index:
+                continue
+            work = [(root, iter(successors[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in nodes:
+                        continue
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(successors[child])))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in successors[node]:
+                            cycles.append(sorted(component))
+
+        return sorted(cycles)
+
+    def report(self):
+        """
+        Returns one line per finding, for people.
+        """
+        lines = []
+        if not self.terminates:
+            lines.append("never terminates: no path from 00 reaches a HALT, a READ, a DIVIDE or a fault")
+        for loop in self.closed_loops:
+            lines.append(f"closed loop at {Analysis.__ranges(loop)}: no READ and no way out")
+        for address, target in self.self_modifying:
+            lines.append(f"{address:02d} writes into code at {target:02d}")
+        if self.overlap:
+            lines.append(f"used as both code and data: {Analysis.__ranges(self.overlap)}")
+        if self.unreachable:
+            lines.append(f"unreachable: {Analysis.__ranges(self.unreachable)}")
+
+        return lines
+
+    @staticmethod
+    def __ranges(addresses):
+        """
+        Returns sorted addresses as a compact string, e.g. "01-03, 07"
+        """
+        ranges = []
+        for address in addresses:
+            if ranges and ranges[-1][1] == address - 1:
+                ranges[-1][1] = address
+            else:
+                ranges.append([address, address])
+
+        return ", ".join(f"{start:02d}" if start == end else f"{start:02d}-{end:02d}" for start, end in ranges)
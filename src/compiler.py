@@ -0,0 +1,313 @@
+from time import monotonic
+
+from src.cpu import CPU, StepLimitExceeded, DeadlineExceeded
+from src.memory import Memory, ArrayMemory
+from src.io_device import InputExhausted
+from src.opcodes import Opcode
+
+class BlockCompiler:
+    """
+    An execution engine that compiles BasicML into Python functions one basic block at a time.
+
+    A basic block is a run of instructions with a single entry and a single exit. Blocks end at
+    branches, HALT, and at the start of any other block (the targets of branches and the
+    instructions after them). Each block is turned into one Python function that works on a flat
+    list of integer words and an integer accumulator, and is cached until something writes into
+    the addresses it was compiled from.
+
+    Results are identical to `CPU.run`, including the program counter moving past a branch target,
+    halting at address 99 and the accumulator truncation.
+    """
+    __arithmetic = {Opcode.ADD: "+", Opcode.SUBTRACT: "-", Opcode.MULTIPLY: "*"}
+
+    def __init__(self):
+        self.__blocks = {} ## (start, single step?) -> (function, words it was compiled from)
+        self.__covering = [set() for _ in Memory.ADDRESSABLE_SPACE] ## address -> keys of the blocks compiled from it
+        self.owned = [0] * Memory.ADDRESSABLE_SPACE.stop ## address -> how many cached blocks include it
+        self.stored = set()
+        self.pc = 0
+        self.acc = 0
+        self.__io = None
+
+    def __len__(self):
+        """
+        Returns how many compiled blocks are cached
+        """
+        return len(self.__blocks)
+
+    ###########
+    # Runtime #
+    ###########
+
+    def read(self):
+        """
+        READ on behalf of a compiled block, retrying on input that isn't a word like `CPU.read`.
+        """
+        data = None
+        while data is None:
+            try:
+                data = Opcode(self.__io.read())
+            except ValueError:
+                self.__io.err(f"ERROR: Unable to parse {self.__io.last_read}. Please enter a signed integer in the format +1042.")
+                data = None
+
+        return data.numeric
+
+    def write(self, word):
+        """
+        WRITE on behalf of a compiled block.
+        """
+        self.__io.write(Opcode.from_int(word))
+
+    def invalidate(self, address):
+        """
+        Forget every compiled block that includes an address that was just written to.
+        """
+        for key in list(self.__covering[address]):
+            self.__forget(key)
+
+    def __forget(self, key):
+        function, words = self.__blocks.pop(key)
+        start = key[0]
+        for address in range(start, start + len(words)):
+            self.__covering[address].discard(key)
+            self.owned[address] -= 1
+
+    #############
+    # Compiling #
+    #############
+
+    @staticmethod
+    def leaders(words):
+        """
+        Returns the addresses that start a basic block: the first instruction, the instruction
+        execution continues at after a taken branch, and the one after every branch.
+        """
+        leaders = {0}
+        for address, word in enumerate(words):
+            operation, operand = divmod(abs(word), 1000)
+            if operation in Opcode.BRANCHES:
+                leaders.add(operand + 1)
+                leaders.add(address + 1)
+            elif operation == Opcode.HALT:
+                leaders.add(address + 1)
+
+        return leaders
+
+    @staticmethod
+    def __exit(pc, executed, halted=False):
+        return f"return {pc}, acc, {executed}, {halted}"
+
+    @staticmethod
+    def __fault(address, exception, message):
+        """
+        Source that leaves the state where the interpreter would have it and raises
+        """
+        return [f"rt.pc = {address}; rt.acc = acc", f"raise {exception}({message!r})"]
+
+    @staticmethod
+    def __branch_to(target, address, executed):
+        """
+        Source for a taken branch: the counter goes to the target and is then incremented like after any instruction
+        """
+        if target not in Memory.ADDRESSABLE_SPACE:
+            return BlockCompiler.__fault(address, "IndexError", f"Attempted to set current address to {target}. Cannot set to a value that is not between 0-99 inclusive.")
+
+        return [BlockCompiler.__exit(target + 1, executed, target == 99)]
+
+    @staticmethod
+    def source(words, start, leaders, single=False):
+        """
+        Generate the Python source of the block starting at `start`.
+
+        The function takes the memory words, the accumulator and the compiler, and returns
+        the next program counter, the accumulator, how many instructions ran, and whether it halted.
+
+        Returns:
+            (str, int): The source and how many words the block was compiled from.
+        """
+        lines = []
+        uses_memory_hooks = False
+        address = start
+        executed = 0
+
+        while True:
+            operation, operand = divmod(abs(words[address]), 1000)
+            executed += 1
+            body = []
+            ends = False
+            valid = operand in Memory.ADDRESSABLE_SPACE
+
+            if operation in (Opcode.READ, Opcode.STORE):
+                uses_memory_hooks = True
+                if operation == Opcode.READ:
+                    body.append(f"rt.pc = {address}; rt.acc = acc")
+                    body.append("word = rt.read()")
+                    value = "word"
+                else:
+                    value = "acc"
+
+                if not valid:
+                    body += BlockCompiler.__fault(address, "IndexError", "Memory address out of range")
+                    ends = True
+                else:
+                    body.append(f"mem[{operand}] = {value}")
+                    body.append(f"stored.add({operand})")
+                    body.append(f"if owned[{operand}]:")
+                    body.append(f"    rt.invalidate({operand})")
+                    body.append(f"    {BlockCompiler.__exit(address + 1, executed)}")
+
+            elif operation in (Opcode.WRITE, Opcode.LOAD, Opcode.DIVIDE) or operation in BlockCompiler.__arithmetic:
+                if not valid:
+                    body += BlockCompiler.__fault(address, "IndexError", "Memory address out of range")
+                    ends = True
+                elif operation == Opcode.WRITE:
+                    body.append(f"rt.pc = {address}; rt.acc = acc")
+                    body.append(f"rt.write(mem[{operand}])")
+                elif operation == Opcode.LOAD:
+                    body.append(f"acc = mem[{operand}]")
+                elif operation == Opcode.DIVIDE:
+                    body.append(f"if not mem[{operand}]:")
+                    body += ["    " + line for line in BlockCompiler.__fault(address, "ZeroDivisionError", "Cannot divide by zero")]
+                    body.append(f"acc //= mem[{operand}]")
+                    body.append("if acc > 999999 or acc < -999999: acc = truncate(acc)")
+                else:
+                    body.append(f"acc {BlockCompiler.__arithmetic[operation]}= mem[{operand}]")
+                    body.append("if acc > 999999 or acc < -999999: acc = truncate(acc)")
+
+            elif operation == Opcode.BRANCH:
+                body += BlockCompiler.__branch_to(operand, address, executed)
+                ends = True
+
+            elif operation in (Opcode.BRANCHNEG, Opcode.BRANCHZERO):
+                condition = "acc < 0" if operation == Opcode.BRANCHNEG else "acc == 0"
+                body.append(f"if {condition}:")
+                body += ["    " + line for line in BlockCompiler.__branch_to(operand, address, executed)]
+                body.append(BlockCompiler.__exit(address + 1, executed))
+                ends = True
+
+            elif operation == Opcode.HALT:
+                body.append(BlockCompiler.__exit(1, executed, True)) ## `CPU.halt` resets the counter to 0 before it is incremented
+                ends = True
+
+            lines.append(f"# {address:02d}: {operation:02d} {operand:03d}")
+            lines += body
+            address += 1
+
+            if ends:
+                break
+            if single or address in leaders or address == 99 or address not in Memory.ADDRESSABLE_SPACE:
+                lines.append(BlockCompiler.__exit(address, executed))
+                break
+
+        header = [f"def block_{start}(mem, acc, rt):"]
+        if uses_memory_hooks:
+            header.append("    owned = rt.owned; stored = rt.stored")
+
+        return "\n".join(header + ["    " + line for line in lines]) + "\n", address - start
+
+    def __compile(self, words, start, leaders, single):
+        key = (start, single)
+        source, length = BlockCompiler.source(words, start, leaders, single)
+
+        namespace = {"truncate": Opcode.truncate}
+        exec(compile(source, f"<block {start}>", "exec"), namespace)
+        function = namespace[f"block_{start}"]
+
+        self.__blocks[key] = (function, words[start:start + length])
+        for address in range(start, start + length):
+            self.__covering[address].add(key)
+            self.owned[address] += 1
+
+        return function
+
+    def __discard_stale(self, words):
+        """
+        Drop cached blocks whose words no longer match memory, e.g. after another program was loaded.
+        """
+        for key, (function, compiled_from) in list(self.__blocks.items()):
+            start = key[0]
+            if words[start:start + len(compiled_from)] != compiled_from:
+                self.__forget(key)
+
+    #############
+    # Executing #
+    #############
+
+    def run(self, cpu, memory, io_device, address=0, max_steps=None, timeout=None):
+        """
+        Run the program in memory on the given CPU, like `CPU.run` without the preview.
+
+        Memory and the CPU registers are read at the start and written back at the end,
+        including when the program raises.
+
+        Returns:
+            int: The number of instructions executed.
+        """
+        if isinstance(memory, ArrayMemory):
+            words = list(memory.words)
+        else:
+            words = [memory.read(i).numeric for i in Memory.ADDRESSABLE_SPACE]
+
+        self.__discard_stale(words)
+        self.__io = io_device
+        self.stored = set()
+        leaders = BlockCompiler.leaders(words)
+
+        cpu.current = address
+        pc = address
+        acc = cpu.acc.numeric
+        steps = 0
+        deadline = monotonic() + timeout if timeout is not None else None
+        next_clock = CPU.DEADLINE_CHECK_INTERVAL
+        blocks = self.__blocks
+        in_block = False
+
+        try:
+            while not cpu.halted:
+                single = False
+                if max_steps is not None:
+                    if steps >= max_steps:
+                        raise StepLimitExceeded(f"Stopped after {steps} instructions at address {pc}", pc, Opcode.from_int(acc), steps)
+                    single = max_steps - steps < Memory.ADDRESSABLE_SPACE.stop ## Close to the limit, go one instruction at a time
+
+                if deadline is not None and steps >= next_clock:
+                    if monotonic() >= deadline:
+                        raise DeadlineExceeded(f"Stopped after {timeout}s and {steps} instructions at address {pc}", pc, Opcode.from_int(acc), steps)
+                    next_clock = steps + CPU.DEADLINE_CHECK_INTERVAL
+
+                cached = blocks.get((pc, single))
+                block = cached[0] if cached is not None else self.__compile(words, pc, leaders, single)
+
+                self.pc, self.acc = pc, acc
+                in_block = True
+                try:
+                    pc, acc, executed, halted = block(words, acc, self)
+                except InputExhausted as e:
+                    if not e.halt:
+                        raise
+                    ## The READ at `self.pc` ends the program like `CPU.read` does, after the instructions before it in the block
+                    pc, acc, executed, halted = 1, self.acc, self.pc - pc + 1, True
+                in_block = False
+                steps += executed
+
+                if halted:
+                    cpu.halted = True
+                elif pc not in Memory.ADDRESSABLE_SPACE:
+                    ## Fell off the end of memory, the interpreter fails incrementing past the last address
+                    pc -= 1
+                    cpu.current = pc + 1
+                elif pc == 99:
+                    cpu.halted = True
+
+            return steps
+        except BaseException:
+            if in_block: ## The block saved where it was before calling out or failing
+                pc, acc = self.pc, self.acc
+            raise
+        finally:
+            cpu.acc = Opcode.from_int(acc)
+            cpu.current = pc
+            for stored in sorted(self.stored):
+                memory.write(stored, Opcode.from_int(words[stored]))
+            self.__io = None
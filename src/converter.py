@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+
+from src.opcodes import Opcode
+
+class ConversionError(ValueError):
+    """
+    Raised when a file holds a word that is neither in the 4-digit nor the 6-digit format.
+    """
+    pass
+
+class Converter:
+    """
+    Converts BasicML programs from the old 4-digit word format to the 6-digit one.
+
+    A 4-digit instruction like `+1007` becomes `+010007`, with the operation and the operand each
+    padded to three digits. Anything else is data and is padded on the left, `+0042` becomes `+000042`.
+    Files are read and written a line at a time and replaced atomically, so a file is either fully
+    converted or untouched, whatever happens during the conversion.
+    """
+    CONVERTED, SKIPPED, FAILED = "converted", "skipped", "failed"
+
+    @staticmethod
+    def convert_word(line):
+        """
+        Returns a 4-digit word, or a shorter one which is padded to 4 digits first, in the 6-digit format.
+
+        Raises:
+            ConversionError: If the word has more than 4 digits.
+        """
+        word = line.strip()
+        sign = "-" if word[:1] == "-" else "+"
+        digits = word[1:] if word[:1] in ("-", "+") else word
+
+        if len(digits) > 4 or not digits.isdigit():
+            raise ConversionError(f"{word!r} is not a 4-digit word")
+        digits = digits.zfill(4)
+
+        if int(digits[:2]) in Opcode.OPERATIONS:
+            return f"{sign}0{digits[:2]}0{digits[2:]}"
+        return f"{sign}00{digits}"
+
+    @staticmethod
+    def is_converted(filename):
+        """
+        Returns whether a file is already in the 6-digit format, going by its first word.
+        """
+        with open(filename) as program:
+            for line in program:
+                word = line.strip().lstrip("+-")
+                if word:
+                    return len(word) == 6
+
+        return False
+
+    @staticmethod
+    def convert_file(filename):
+        """
+        Convert one file in place, unless it is already in the 6-digit format.
+
+        The converted words are written to a temporary file next to the original, one line at a time,
+        which then replaces it. Blank lines are dropped, and like the original converter the last word
+        has no newline after it.
+
+        Returns:
+            (str, int): `CONVERTED` or `SKIPPED`, and how many words were converted.
+
+        Raises:
+            ConversionError: If a word can't be converted. The file is left as it was.
+        """
+        if Converter.is_converted(filename):
+            return Converter.SKIPPED, 0
+
+        directory = os.path.dirname(os.path.abspath(filename))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".converting-", suffix=".tmp")
+        try:
+            words = 0
+            with os.fdopen(descriptor, "w") as converted, open(filename) as program:
+                for number, line in enumerate(program, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        word = Converter.convert_word(line)
+                    except ConversionError as e:
+                        raise ConversionError(f"{filename}:{number}: {e}") from None
+                    converted.write(f"\n{word}" if words else word)
+                    words += 1
+
+            shutil.copymode(filename, temporary)
+            os.replace(temporary, filename)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        return Converter.CONVERTED, words
+
+    @staticmethod
+    def attempt(filename):
+        """
+        `convert_file` for a worker process, reporting failures instead of raising them.
+
+        Returns:
+            (str, str, int, str): The file name, `CONVERTED`, `SKIPPED` or `FAILED`, how many words were
+                converted, and what went wrong when it failed.
+        """
+        try:
+            return (filename,) + Converter.convert_file(filename) + (None,)
+        except (OSError, ValueError) as e:
+            return filename, Converter.FAILED, 0, str(e)
+
+    @staticmethod
+    def find(root, pattern="*.txt"):
+        """
+        Yield every file under `root` whose name matches the pattern, in a stable order.
+        """
+        for directory, subdirectories, files in os.walk(root):
+            subdirectories.sort()
+            for name in sorted(files):
+                if fnmatch(name, pattern):
+                    yield os.path.join(directory, name)
+
+    @staticmethod
+    def convert_tree(root, pattern="*.txt", workers=None, chunksize=32):
+        """
+        Convert every matching file under `root` across a pool of processes.
+
+        Yields:
+            tuple: The result of `attempt` for each file, in the order `find` lists them.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(Converter.attempt, Converter.find(root, pattern), chunksize=chunksize)
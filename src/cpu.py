@@ -1,22 +1,83 @@
 #!/usr/bin/env python3
 
+import asyncio
+from time import monotonic
 from src.opcodes import Opcode
 from src.memory import Memory
+from src.io_device import InputExhausted
+
+class ExecutionLimitExceeded(Exception):
+    """
+    Raised when a program runs past the limits given to `CPU.run`.
+    Carries the state of the CPU at the moment it was stopped so the caller can report it.
+    """
+    def __init__(self, message, current, acc, steps):
+        super().__init__(message)
+        self.current = current
+        self.acc = acc
+        self.steps = steps
+
+class StepLimitExceeded(ExecutionLimitExceeded):
+    """
+    Raised when a program executes more instructions than it was allowed.
+    """
+
+class DeadlineExceeded(ExecutionLimitExceeded):
+    """
+    Raised when a program runs for longer than it was allowed.
+    """
 
 class CPU:
     """
     An abstraction representing a CPU.
     This CPU contains an accumulator register and processes opcodes to perform various operations.
     """
-    def __init__(self):
+    DISPATCH_MODES = ("table", "match")
+
+    def __init__(self, dispatch="table"):
         """
         Initialize the CPU with an accumulator set to 0000.
         The accumulator is used for arithmetic and data manipulation operations.
+
+        Args:
+            dispatch (str): How `process` resolves instructions. "table" maps the numeric
+                operation straight to a handler, "match" walks the instruction names.
         """
-        self.__acc = Opcode("0000")
+        if dispatch not in CPU.DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode {dispatch}. Expected one of {CPU.DISPATCH_MODES}")
+
+        self.dispatch = dispatch
+        self.__acc = Opcode.from_int(0)
         self.__current = 0  # Where to start executing the program.
         self.__halted = False  # Whether or not the current execution should stop
         self.waiting_for_input = False
+        self.journal = None # Optional `Journal` that records how to undo every step
+        self.profiler = None # Optional `Profiler` that counts every step
+
+    def reset(self):
+        """
+        Put the CPU back in its initial state so it can run another program.
+        """
+        self.__acc = Opcode.from_int(0)
+        self.__current = 0
+        self.__halted = False
+        self.waiting_for_input = False
+
+    def snapshot(self):
+        """
+        Returns the registers as an (accumulator, current address, halted) tuple of plain values.
+        """
+        return self.__acc.numeric, self.__current, self.__halted
+
+    def restore(self, state):
+        """
+        Put the registers back to a tuple returned by `snapshot`.
+        """
+        acc, current, halted = state
+        self.__acc = Opcode.from_int(acc)
+        self.__current = current
+        self.__halted = halted
+        self.waiting_for_input = False
 
     @property
     def acc(self):
@@ -79,14 +140,41 @@ class CPU:
     
     
 
-    def run(self, memory, io_device, address=0, preview=False):
+    DEADLINE_CHECK_INTERVAL = 1024 ## How many instructions run between looks at the clock
+
+    def run(self, memory, io_device, address=0, preview=False, trace=0, max_steps=None, timeout=None):
         """
         Run the simulation starting from the given address.
+
+        Args:
+            preview (bool): Show the memory around the current instruction before every step.
+            trace (int): Show the preview only every `trace` steps instead. 0 disables it.
+            max_steps (int): Optional number of instructions the program may execute.
+            timeout (float): Optional number of seconds the program may run for. The clock is only
+                read every `DEADLINE_CHECK_INTERVAL` instructions, so this is checked approximately.
+
+        Returns:
+            int: The number of instructions executed.
+
+        Raises:
+            StepLimitExceeded: If the program would execute more than `max_steps` instructions.
+            DeadlineExceeded: If the program is still running after `timeout` seconds.
         """
         self.current = address
+        steps = 0
+
+        deadline = monotonic() + timeout if timeout is not None else None
+        next_check = CPU.__next_check(steps, max_steps, deadline)
 
         while not self.halted:
-            if preview:
+            if steps == next_check:
+                if max_steps is not None and steps >= max_steps:
+                    raise StepLimitExceeded(f"Stopped after {steps} instructions at address {self.current}", self.current, self.acc, steps)
+                if deadline is not None and monotonic() >= deadline:
+                    raise DeadlineExceeded(f"Stopped after {timeout}s and {steps} instructions at address {self.current}", self.current, self.acc, steps)
+                next_check = CPU.__next_check(steps, max_steps, deadline)
+
+            if preview or (trace and steps % trace == 0):
                 io_device.err(self.preview_state(memory))
 
             if self.current not in Memory.ADDRESSABLE_SPACE: # If we reach the end of the program it's over
@@ -94,6 +182,74 @@ class CPU:
                 break
 
             self.step(memory, io_device)
+            steps += 1
+
+        return steps
+
+    ASYNC_BUDGET = 1000 ## How many instructions `run_async` executes before letting other tasks run
+
+    async def run_async(self, memory, io_device, address=0, budget=ASYNC_BUDGET, max_steps=None, timeout=None):
+        """
+        Run the simulation on an asyncio event loop, like `run` without the preview.
+
+        READ awaits input from an `AsyncIODevice` instead of blocking, and output is handed to it as
+        soon as it is written. A program that computes without doing any IO still yields to the loop
+        every `budget` instructions, so it can't starve the other sessions sharing it.
+
+        Args:
+            io_device (AsyncIODevice): Where input comes from and output goes.
+            budget (int): Instructions between yields to the event loop. None only yields on IO.
+            max_steps, timeout: See `run`.
+
+        Returns:
+            int: The number of instructions executed.
+        """
+        self.current = address
+        steps = 0
+
+        deadline = monotonic() + timeout if timeout is not None else None
+        next_check = CPU.__next_check(steps, max_steps, deadline)
+        next_yield = budget if budget else -1
+
+        try:
+            while not self.halted:
+                if steps == next_check:
+                    if max_steps is not None and steps >= max_steps:
+                        raise StepLimitExceeded(f"Stopped after {steps} instructions at address {self.current}", self.current, self.acc, steps)
+                    if deadline is not None and monotonic() >= deadline:
+                        raise DeadlineExceeded(f"Stopped after {timeout}s and {steps} instructions at address {self.current}", self.current, self.acc, steps)
+                    next_check = CPU.__next_check(steps, max_steps, deadline)
+
+                if self.current not in Memory.ADDRESSABLE_SPACE:
+                    self.halted = True
+                    break
+
+                if memory.fetch(self.current)[0] == Opcode.READ: ## Have the word ready before the CPU asks for it
+                    await io_device.fill()
+
+                self.step(memory, io_device)
+                steps += 1
+
+                if io_device.pending:
+                    await io_device.drain()
+                if steps == next_yield:
+                    await asyncio.sleep(0)
+                    next_yield += budget
+
+            return steps
+        finally:
+            await io_device.drain()
+
+    @staticmethod
+    def __next_check(steps, max_steps, deadline):
+        """
+        The step count at which `run` next has to look at its limits, or -1 if it never does.
+        """
+        if deadline is not None:
+            upcoming = steps + CPU.DEADLINE_CHECK_INTERVAL
+            return upcoming if max_steps is None else min(upcoming, max_steps)
+
+        return max_steps if max_steps is not None else -1
 
     def process(self, opcode, memory, io_device):
         """
@@ -107,6 +263,13 @@ class CPU:
         Raises:
             IndexError: If the address is out of bounds.
         """
+        if self.dispatch == "table":
+            operation, operand = opcode.decoded
+            handler = CPU.__handlers.get(operation)
+            if handler is not None:
+                handler(self, operand, memory, io_device)
+            return
+
         match opcode.name:
             case "READ":
                 self.read(memory, io_device, int(opcode.operand))
@@ -144,16 +307,7 @@ class CPU:
             io_device (IODevice): The I/O device used for reading input.
             address (int): The memory address where the input data will be stored.
         """
-
-        data = None
-        while data is None:
-            try:
-               data = Opcode(io_device.read())
-            except ValueError:
-                io_device.err(f"ERROR: Unable to parse {io_device.last_read}. Please enter a signed integer in the format +1042.")
-                data = None
-
-        memory.write(address, data)
+        self.__read(address, memory, io_device)
 
     def write(self, memory, io_device, address):
         """
@@ -164,8 +318,7 @@ class CPU:
             io_device (IODevice): The I/O device used for writing output.
             address (int): The memory address from which the data will be read.
         """
-        data = memory.read(address)
-        io_device.write(data)
+        self.__write(address, memory, io_device)
 
     def load(self, memory, address):
         """
@@ -175,7 +328,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address from which the data will be loaded into the accumulator.
         """
-        self.acc = memory.read(address)
+        self.__load(address, memory, None)
 
     def store(self, memory, address):
         """
@@ -185,7 +338,7 @@ class CPU:
             memory (Memory): The memory object where data will be written.
             address (int): The memory address where the accumulator data will be stored.
         """
-        memory.write(address, self.acc)
+        self.__store(address, memory, None)
 
     def add(self, memory, address):
         """
@@ -194,8 +347,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address from which the data will be added to the accumulator.
         """
-        other = memory.read(address)
-        self.acc = self.acc + other
+        self.__add(address, memory, None)
 
     def subtract(self, memory, address):
         """
@@ -204,8 +356,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address from which the data will be subtracted from the accumulator.
         """
-        operand = int(str(memory.read(address)))
-        self.acc = Opcode(f"{int(str(self.acc)) - operand:+07d}")
+        self.__subtract(address, memory, None)
 
     def multiply(self, memory, address):
         """
@@ -214,8 +365,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address from which the data will be multiplied with the accumulator.
         """
-        other = memory.read(address)
-        self.acc = self.acc * other
+        self.__multiply(address, memory, None)
 
     def divide(self, memory, address):
         """
@@ -224,10 +374,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address from which the data will be used to divide the accumulator.
         """
-        divisor = memory.read(address)
-        if divisor == 0:
-            raise ZeroDivisionError("Cannot divide by zero")
-        self.acc = self.acc // divisor
+        self.__divide(address, memory, None)
 
     def branch(self, memory, address):
         """
@@ -237,7 +384,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address to branch to.
         """
-        self.current = address
+        self.__branch(address, memory, None)
 
     def branchneg(self, memory, address):
         """
@@ -246,8 +393,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address to branch to.
         """
-        if self.acc < 0:
-            self.current = address
+        self.__branchneg(address, memory, None)
 
     def branchzero(self, memory, address):
         """
@@ -257,8 +403,7 @@ class CPU:
             memory (Memory): The memory object where data will be read from.
             address (int): The memory address to branch to.
         """
-        if self.acc == 0:
-            self.current = address
+        self.__branchzero(address, memory, None)
 
     def halt(self):
         self.halted = True
@@ -267,13 +412,102 @@ class CPU:
     def noop(self):
         pass
 
+    ###################
+    # Table dispatch: #
+    ###################
+
+    ## The handlers behind the instruction methods above. They all take (cpu, operand, memory, io_device)
+    #  so the table can hold them directly and dispatch costs a single call per instruction.
+
+    def __read(self, address, memory, io_device):
+        data = None
+        while data is None:
+            try:
+               data = Opcode(io_device.read())
+            except InputExhausted as e:
+                if not e.halt:
+                    raise
+                self.halt() ## The device asked for running out of input to end the program
+                return
+            except ValueError:
+                io_device.err(f"ERROR: Unable to parse {io_device.last_read}. Please enter a signed integer in the format +1042.")
+                data = None
+
+        memory.write(address, data)
+
+    def __write(self, address, memory, io_device):
+        io_device.write(memory.read(address))
+
+    def __load(self, address, memory, io_device):
+        self.acc = memory.read(address)
+
+    def __store(self, address, memory, io_device):
+        memory.write(address, self.acc)
+
+    def __add(self, address, memory, io_device):
+        self.acc = self.acc + memory.read(address)
+
+    def __subtract(self, address, memory, io_device):
+        self.acc = self.acc - memory.read(address)
+
+    def __multiply(self, address, memory, io_device):
+        self.acc = self.acc * memory.read(address)
+
+    def __divide(self, address, memory, io_device):
+        divisor = memory.read(address)
+        if divisor == 0:
+            raise ZeroDivisionError("Cannot divide by zero")
+        self.acc = self.acc // divisor
+
+    def __branch(self, address, memory, io_device):
+        self.current = address
+
+    def __branchneg(self, address, memory, io_device):
+        if self.acc < 0:
+            self.current = address
+
+    def __branchzero(self, address, memory, io_device):
+        if self.acc == 0:
+            self.current = address
+
+    def __halt(self, address, memory, io_device):
+        self.halt()
+
+    ## Numeric operation -> handler(cpu, operand, memory, io_device).
+    #  Anything missing from the table is treated as data, same as the NOOP arm of the match in `process`
+    __handlers = {
+        Opcode.READ: __read,
+        Opcode.WRITE: __write,
+        Opcode.LOAD: __load,
+        Opcode.STORE: __store,
+        Opcode.ADD: __add,
+        Opcode.SUBTRACT: __subtract,
+        Opcode.DIVIDE: __divide,
+        Opcode.MULTIPLY: __multiply,
+        Opcode.BRANCH: __branch,
+        Opcode.BRANCHNEG: __branchneg,
+        Opcode.BRANCHZERO: __branchzero,
+        Opcode.HALT: __halt,
+    }
+
     def step(self, memory, io_device):
         """
         Execute a single instruction.
         """
         if not self.halted:
+            if self.journal is not None:
+                self.journal.record(self, memory)
+            if self.profiler is not None:
+                self.profiler.record(self, memory)
+
             if self.current not in Memory.ADDRESSABLE_SPACE:
                 self.halt()
+            elif self.dispatch == "table":
+                operation, operand = memory.fetch(self.current)
+                handler = CPU.__handlers.get(operation)
+                if handler is not None:
+                    handler(self, operand, memory, io_device)
+                self.current += 1
             else:
                 current_opcode = memory.read(self.current)
                 self.process(current_opcode, memory, io_device)
@@ -0,0 +1,66 @@
+import logging
+
+class Diagnostics:
+    """
+    A channel for warnings raised in hot paths, such as arithmetic overflow.
+
+    Every message belongs to a site, a short name for where it comes from. Each site is counted
+    every time, but only its first `limit` messages are formatted and emitted, so a program that
+    overflows a million times costs a million dictionary updates rather than a million lines
+    on the terminal. `summary` reports the counts at the end.
+
+    Messages go to `sink` when one is set, e.g. `IODevice.err`, and to the `uvsim` logger otherwise.
+    """
+    DEBUG, INFO, WARNING, ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+
+    def __init__(self, sink=None, level=logging.WARNING, limit=10):
+        """
+        Args:
+            sink: Optional function called with each message.
+            level (int): Messages below this level are counted but not emitted.
+            limit (int): How many messages to emit per site before going quiet. None for no limit.
+        """
+        self.sink = sink
+        self.level = level
+        self.limit = limit
+        self.counts = {}
+        self.logger = logging.getLogger("uvsim")
+
+    def report(self, site, level, message, *args):
+        """
+        Count a message for a site and emit it unless it is below the level or the site is over its limit.
+
+        The message is only formatted, `message % args`, when it is actually emitted.
+        """
+        count = self.counts.get(site, 0) + 1
+        self.counts[site] = count
+
+        if level < self.level or (self.limit is not None and count > self.limit):
+            return
+
+        text = message % args if args else message
+        if count == self.limit:
+            text += f" (further {site} messages suppressed)"
+
+        if self.sink is not None:
+            self.sink(text)
+        else:
+            self.logger.log(level, text)
+
+    def warning(self, site, message, *args):
+        self.report(site, logging.WARNING, message, *args)
+
+    def reset(self):
+        """
+        Forget the counts, e.g. before running another program.
+        """
+        self.counts = {}
+
+    def summary(self):
+        """
+        Returns one line per site with how many times it reported, or an empty list if nothing did.
+        """
+        return [f"{site}: {count}" for site, count in sorted(self.counts.items())]
+
+## Shared by everything that has no VM of its own to report through, like `Opcode`
+diagnostics = Diagnostics()
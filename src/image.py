@@ -0,0 +1,208 @@
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from src.memory import Memory
+from src.opcodes import Opcode
+
+class ImageError(ValueError):
+    """
+    Raised when a file is not a valid program image: wrong magic or version, truncated, or failing its checksum.
+    """
+    pass
+
+class ProgramImage:
+    """
+    A program in a compact binary form that loads without parsing any text.
+
+    Layout, all little-endian:
+
+        header   magic b"UVSM", version (u16), extent (u16), section bytes (u32), CRC32 (u32)
+        words    250 signed 32-bit words, the whole of memory
+        sections zero or more of: tag (4 bytes), length (u32), UTF-8 JSON payload
+
+    The checksum covers everything after the header. Sections are optional, readers skip tags they
+    don't know. `SYMBOLS` maps label -> address and `DEBUG` maps address -> source line number.
+
+    Attributes:
+        words (array): The 250 words as an array('i').
+        extent (int): One past the highest address the program uses, like `Memory.extent`.
+        symbols (dict): Optional label -> address.
+        debug (dict): Optional address -> source line number.
+    """
+    __slots__ = ("words", "extent", "symbols", "debug")
+
+    MAGIC = b"UVSM"
+    VERSION = 1
+    EXTENSION = ".bmi"
+    HEADER = struct.Struct("<4sHHII")
+    SECTION = struct.Struct("<4sI")
+    WORDS_SIZE = 4 * Memory.ADDRESSABLE_SPACE.stop
+    SYMBOLS, DEBUG = b"SYMS", b"DBUG"
+
+    def __init__(self, words, extent, symbols=None, debug=None):
+        self.words = words
+        self.extent = extent
+        self.symbols = symbols if symbols is not None else {}
+        self.debug = debug if debug is not None else {}
+
+    @staticmethod
+    def from_memory(memory, symbols=None, debug=None):
+        """
+        Returns an image of everything in memory up to its extent.
+        """
+        words, extent = memory.snapshot()
+        return ProgramImage(array('i', words), extent, symbols, debug)
+
+    @staticmethod
+    def from_text(filename):
+        """
+        Read a program in the text format `UVSim.load` takes, one word per line in the 4 or 6 digit format.
+
+        Raises:
+            ValueError: If a line isn't a word.
+            IndexError: If the program doesn't fit in memory.
+        """
+        with open(filename) as program:
+            return ProgramImage.from_lines(program, filename)
+
+    @staticmethod
+    def from_lines(lines, filename="<program>"):
+        """
+        Returns the image of a program given as lines of text, see `from_text`.
+        """
+        words = array('i', bytes(ProgramImage.WORDS_SIZE))
+        extent = 0
+        for line in lines:
+            if extent not in Memory.ADDRESSABLE_SPACE:
+                raise IndexError(f"{filename} does not fit in {Memory.ADDRESSABLE_SPACE.stop} words")
+            words[extent] = Opcode(line).numeric
+            extent += 1
+
+        return ProgramImage(words, extent)
+
+    ##################
+    # Reading images #
+    ##################
+
+    @staticmethod
+    def from_bytes(data, filename="<image>"):
+        """
+        Decode an image from a bytes-like object, e.g. an `mmap`.
+
+        Raises:
+            ImageError: If the data is not a valid image.
+        """
+        view = memoryview(data)
+        try:
+            return ProgramImage.__decode(view, filename)
+        finally:
+            view.release() ## An mmap can't be closed while a view of it is alive
+
+    @staticmethod
+    def __decode(view, filename):
+        header = ProgramImage.HEADER
+        if len(view) < header.size + ProgramImage.WORDS_SIZE:
+            raise ImageError(f"{filename} is too short to be a program image")
+
+        magic, version, extent, section_bytes, checksum = header.unpack_from(view)
+        if magic != ProgramImage.MAGIC:
+            raise ImageError(f"{filename} is not a program image")
+        if version != ProgramImage.VERSION:
+            raise ImageError(f"{filename} is version {version} of the image format, expected {ProgramImage.VERSION}")
+
+        end = header.size + ProgramImage.WORDS_SIZE + section_bytes
+        if extent > Memory.ADDRESSABLE_SPACE.stop:
+            raise ImageError(f"{filename} claims an extent of {extent} words")
+
+        with view[header.size:end] as body:
+            if len(body) != end - header.size or zlib.crc32(body) != checksum:
+                raise ImageError(f"{filename} is truncated or corrupt")
+
+            return ProgramImage.__read_body(body, extent, filename)
+
+    @staticmethod
+    def __read_body(body, extent, filename):
+        words = array('i')
+        words.frombytes(body[:ProgramImage.WORDS_SIZE])
+        if sys.byteorder == "big":
+            words.byteswap()
+        if max(words) > Opcode.LARGEST or min(words) < -Opcode.LARGEST:
+            raise ImageError(f"{filename} contains words that don't fit in six digits")
+
+        image = ProgramImage(words, extent)
+        position = ProgramImage.WORDS_SIZE
+        while position < len(body):
+            if position + ProgramImage.SECTION.size > len(body):
+                raise ImageError(f"{filename} has a truncated section")
+            tag, length = ProgramImage.SECTION.unpack_from(body, position)
+            position += ProgramImage.SECTION.size
+            payload = bytes(body[position:position + length])
+            position += length
+
+            if tag == ProgramImage.SYMBOLS:
+                image.symbols = json.loads(payload)
+            elif tag == ProgramImage.DEBUG:
+                image.debug = {int(address): line for address, line in json.loads(payload).items()}
+
+        return image
+
+    @staticmethod
+    def load(filename, use_mmap=False):
+        """
+        Read an image from a file.
+
+        Args:
+            use_mmap (bool): Map the file instead of reading it, so the words are copied straight from the
+                page cache. For a single image of about a kilobyte a plain read is quicker, mapping pays off
+                when the file is already mapped elsewhere or much larger.
+
+        Raises:
+            ImageError: If the file is not a valid image.
+        """
+        with open(filename, "rb") as image:
+            if not use_mmap:
+                return ProgramImage.from_bytes(image.read(), filename)
+
+            try:
+                mapped = mmap.mmap(image.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: ## Empty files can't be mapped
+                raise ImageError(f"{filename} is too short to be a program image")
+
+            with mapped:
+                return ProgramImage.from_bytes(mapped, filename)
+
+    ##################
+    # Writing images #
+    ##################
+
+    def to_bytes(self):
+        """
+        Returns the encoded image.
+        """
+        words = array('i', self.words)
+        if sys.byteorder == "big":
+            words.byteswap()
+
+        sections = b""
+        for tag, content in [(ProgramImage.SYMBOLS, self.symbols), (ProgramImage.DEBUG, self.debug)]:
+            if content:
+                payload = json.dumps(content, separators=(",", ":")).encode()
+                sections += ProgramImage.SECTION.pack(tag, len(payload)) + payload
+
+        body = words.tobytes() + sections
+        return ProgramImage.HEADER.pack(ProgramImage.MAGIC, ProgramImage.VERSION, self.extent, len(sections), zlib.crc32(body)) + body
+
+    def save(self, filename):
+        with open(filename, "wb") as image:
+            image.write(self.to_bytes())
+
+    def to_text(self, filename):
+        """
+        Write the program in the text format `UVSim.load` takes.
+        """
+        with open(filename, "w") as program:
+            program.write("".join(f"{word:+07d}\n" for word in self.words[:self.extent]))
@@ -1,3 +1,22 @@
+import io
+import sys
+import threading
+from collections import deque
+
+from src.opcodes import Opcode
+
+class InputExhausted(EOFError):
+    """
+    Raised when a program READs after its scripted input has run out.
+
+    Attributes:
+        halt (bool): The device asked for the READ to stop the program like HALT instead of failing.
+            `CPU.read` and the compiled engine handle this themselves, so it never reaches the caller.
+    """
+    def __init__(self, message, halt=False):
+        super().__init__(message)
+        self.halt = halt
+
 class IODevice:
     """
     Class to represent an input/output device for the simulator.
@@ -63,6 +82,29 @@ class IODevice:
     def last_err(self, val):
         self.__last_err = val
 
+    def snapshot(self):
+        """
+        Returns the state of the device, so it can be put back with `restore`.
+
+        For this device that is what it last read, wrote and reported. Devices that queue input
+        or keep their output add how far they have read and written, see `ScriptedIODevice`.
+        """
+        return self.__last_read, self.__last_write, self.__last_err
+
+    def restore(self, state):
+        self.__last_read, self.__last_write, self.__last_err = state[:3]
+
+    def fork(self, state=None):
+        """
+        Returns a new device of the same type that reads, writes and reports the same way, for `UVSim.fork`.
+
+        Args:
+            state: Optionally a `snapshot` of this device to put the new one in. Defaults to its current state.
+        """
+        device = IODevice(self.__reader, self.__writer, self.__err)
+        device.restore(state if state is not None else self.snapshot())
+        return device
+
     def read(self):
         """
         Reads input using the reader function.
@@ -84,3 +126,357 @@ class IODevice:
         """
         self.last_err = data
         self.__err(data)
+
+    def flush(self):
+        """
+        Push out any buffered output. Called when a run ends. Nothing is buffered by default.
+        """
+        pass
+
+class StreamIODevice(IODevice):
+    """
+    An input/output device for driving the simulator from pipelines and test harnesses.
+
+    READ takes the next non-blank line from a file or any iterator of lines, without a prompt.
+    WRITE appends the word, e.g. `+000042`, on a line of its own to a buffer that is written to
+    the sink in one go once `threshold` words are waiting and when the run ends. The sink can be
+    a text or a binary file. Errors go to stderr unless `err` is given.
+
+    The lines read are kept, so `restore` can rewind the input to a snapshot and read them again.
+    Output can only be taken back while it is still buffered, words already written to the sink stay there.
+    """
+    def __init__(self, source=None, sink=None, threshold=1024, err=None):
+        """
+        Args:
+            source: File or iterator of input lines. Defaults to stdin.
+            sink: Text or binary file the output is written to. Defaults to stdout.
+            threshold (int): How many words to buffer before writing them out.
+            err: Optional function for error messages.
+        """
+        if err is None:
+            err = lambda x: print(x, file=sys.stderr)
+
+        super().__init__(reader=self.__next_line, writer=self.__buffer, err=err)
+        self.__err_function = err
+        self.__source = iter(source if source is not None else sys.stdin)
+        self.__sink = sink if sink is not None else sys.stdout
+        self.__binary = StreamIODevice.is_binary(self.__sink)
+        self.threshold = max(1, threshold)
+        self.__pending = []
+        self.__read = [] ## Every line read so far
+        self.__replay = deque() ## Lines to read again after `restore`, before the source
+        self.__written = 0
+
+    @staticmethod
+    def is_binary(stream):
+        """
+        Returns whether a file takes bytes rather than text.
+        """
+        if isinstance(stream, io.TextIOBase):
+            return False
+        if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+            return True
+        return "b" in getattr(stream, "mode", "")
+
+    @property
+    def pending(self):
+        """
+        Returns how many words are waiting to be written.
+        """
+        return len(self.__pending)
+
+    def snapshot(self):
+        """
+        Returns the state of the device, including how many lines it has read and words it has written.
+        """
+        return super().snapshot() + (len(self.__read), self.__written)
+
+    def restore(self, state):
+        """
+        Put the device back to a `snapshot`. Lines read since are read again, and words written
+        since are dropped if they are still buffered.
+        """
+        super().restore(state)
+        if len(state) == 3: ## From a plain `IODevice`, which has no positions to go back to
+            return
+        reads, writes = state[3:]
+        if reads < len(self.__read):
+            self.__replay.extendleft(reversed(self.__read[reads:]))
+            del self.__read[reads:]
+        if writes < self.__written:
+            del self.__pending[max(0, len(self.__pending) - (self.__written - writes)):]
+            self.__written = writes
+
+    def fork(self, state=None):
+        """
+        Returns a device reading from the same source and writing to the same sink, with its own buffer.
+
+        The new device first reads the lines this one read after `state`, then shares the source,
+        each line going to whichever device reads it first.
+        """
+        self.flush() ## Keep output in order between this device and the fork
+        state = state if state is not None else self.snapshot()
+        device = StreamIODevice(self.__source, self.__sink, self.threshold, self.__err_function)
+        device.__read = self.__read[:state[3]]
+        device.__replay.extend(self.__read[state[3]:] + list(self.__replay))
+        device.__written = state[4]
+        device.restore(state)
+        return device
+
+    def __next_line(self):
+        if self.__replay:
+            line = self.__replay.popleft()
+            self.__read.append(line)
+            return line
+
+        for line in self.__source:
+            if isinstance(line, bytes):
+                line = line.decode()
+            line = line.strip()
+            if line:
+                self.__read.append(line)
+                return line
+
+        raise InputExhausted("Program tried to READ past the end of its input")
+
+    def __buffer(self, data):
+        self.__pending.append(str(data))
+        self.__written += 1
+        if len(self.__pending) >= self.threshold:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every buffered word to the sink and flush it.
+        """
+        if not self.__pending:
+            return
+
+        text = "\n".join(self.__pending) + "\n"
+        self.__pending.clear()
+        self.__sink.write(text.encode() if self.__binary else text)
+        self.__sink.flush()
+
+class ScriptedIODevice(IODevice):
+    """
+    An input/output device for running test cases in-process.
+
+    Input is taken from a preloaded `deque` and every word written is appended to `outputs`
+    as a plain integer, so nothing is formatted or parsed on the way. What happens when a program
+    READs past the end of its input is chosen with `on_exhausted`:
+
+    - "raise": `InputExhausted` is raised out of the run.
+    - "halt": The READ stops the program as if it were a HALT. Nothing is stored.
+    - "block": The READ waits until another thread hands over more input with `provide`, or `close` is called.
+
+    The words read are kept in `consumed`, so a `snapshot` is just how many words have been read
+    and written, and `restore` puts the words read since back at the front of `inputs`.
+    """
+    EXHAUSTED = ("raise", "halt", "block")
+
+    def __init__(self, inputs=(), on_exhausted="raise", err=None):
+        """
+        Args:
+            inputs: Words to READ, as strings like "+1042", integers or `Opcode`s.
+            on_exhausted (str): One of `EXHAUSTED`.
+            err: Optional function for error messages. Defaults to collecting them in `errors`.
+        """
+        if on_exhausted not in ScriptedIODevice.EXHAUSTED:
+            raise ValueError(f"Unknown input exhausted behaviour {on_exhausted}. Expected one of {ScriptedIODevice.EXHAUSTED}")
+
+        self.errors = []
+        super().__init__(reader=self.read, writer=self.write, err=err if err is not None else self.errors.append)
+        self.__err_function = err
+        self.on_exhausted = on_exhausted
+        self.inputs = deque()
+        self.consumed = []
+        self.outputs = []
+        self.__ready = threading.Condition()
+        self.__closed = False
+        self.provide(*inputs)
+
+    def provide(self, *inputs):
+        """
+        Queue more input, waking up a READ that is blocked waiting for it.
+        """
+        with self.__ready:
+            self.inputs.extend(getattr(word, "numeric", word) for word in inputs)
+            self.__ready.notify_all()
+
+    def close(self):
+        """
+        Let a blocked READ, and every later one, fail with `InputExhausted` instead of waiting.
+        """
+        with self.__ready:
+            self.__closed = True
+            self.__ready.notify_all()
+
+    def reset(self, inputs=()):
+        """
+        Replace the queued input and forget everything written, to run another test case.
+        """
+        with self.__ready:
+            self.inputs.clear()
+            self.consumed.clear()
+            self.outputs.clear()
+            self.errors.clear()
+            self.__closed = False
+        self.provide(*inputs)
+
+    def snapshot(self):
+        """
+        Returns the state of the device, including how many words it has read and written and errors it has reported.
+        """
+        return super().snapshot() + (len(self.consumed), len(self.outputs), len(self.errors))
+
+    def restore(self, state):
+        """
+        Put the device back to a `snapshot` taken from it, or from the device it was forked from.
+
+        Input read since is queued again and output written since is forgotten. Restoring a
+        snapshot from before the last `reset` is not possible, the input it refers to is gone.
+        """
+        super().restore(state)
+        if len(state) == 3: ## From a plain `IODevice`, which has no positions to go back to
+            return
+        reads, writes, errors = state[3:]
+        with self.__ready:
+            if reads < len(self.consumed):
+                self.inputs.extendleft(reversed(self.consumed[reads:]))
+                del self.consumed[reads:]
+            while len(self.consumed) < reads and self.inputs:
+                self.consumed.append(self.inputs.popleft())
+            del self.outputs[writes:]
+            del self.errors[errors:]
+
+    def fork(self, state=None):
+        """
+        Returns a device with the same input, output and errors as this one had at `state`, by default now.
+        """
+        with self.__ready:
+            inputs = self.consumed + list(self.inputs)
+        device = ScriptedIODevice(inputs, self.on_exhausted, self.__err_function)
+        device.outputs.extend(self.outputs)
+        if self.__err_function is None:
+            device.errors.extend(self.errors)
+        device.restore(state if state is not None else self.snapshot())
+        return device
+
+    def read(self):
+        """
+        Returns the next queued input.
+
+        Raises:
+            InputExhausted: If there is none left, unless `on_exhausted` is "block".
+        """
+        if not self.inputs:
+            self.__exhausted()
+
+        value = self.inputs.popleft()
+        self.consumed.append(value)
+        self.last_read = value
+        return value
+
+    def __exhausted(self):
+        if self.on_exhausted == "block":
+            with self.__ready:
+                self.__ready.wait_for(lambda: self.inputs or self.__closed)
+            if self.inputs:
+                return
+
+        raise InputExhausted("Program tried to READ past the end of its input", halt=self.on_exhausted == "halt")
+
+    def write(self, data):
+        """
+        Appends the word to `outputs` as an integer.
+        """
+        self.last_write = data
+        self.outputs.append(data.numeric)
+
+class AsyncIODevice(IODevice):
+    """
+    An input/output device for running programs on an asyncio event loop, see `CPU.run_async`.
+
+    The reader and writer are coroutine functions, e.g. a stream's `readline` and a function that
+    writes to the stream and drains it. The CPU itself stays synchronous: before a READ the run awaits
+    `fill`, which takes lines from the reader until one parses as a word, and after an instruction
+    that wrote something it awaits `drain`, which hands every buffered word and error message over.
+    """
+    def __init__(self, reader, writer, err=None):
+        """
+        Args:
+            reader: Coroutine function returning the next line of input, or None or an empty string at the end of the input.
+            writer: Coroutine function taking each `Opcode` written.
+            err: Optional coroutine function taking error messages. Defaults to printing them.
+        """
+        super().__init__(reader=self.__take, writer=self.__queue_write, err=self.__queue_err)
+        self.__async_reader = reader
+        self.__async_writer = writer
+        self.__async_err = err if err is not None else AsyncIODevice.__print
+        self.__line = None
+        self.__pending = []
+
+    @staticmethod
+    async def __print(data):
+        print(data)
+
+    def fork(self, state=None):
+        """
+        Returns a device using the same coroutine functions, with nothing buffered.
+        Input that was already awaited can't be read again, so only the base state is restored.
+        """
+        device = AsyncIODevice(self.__async_reader, self.__async_writer, self.__async_err)
+        device.restore(state if state is not None else self.snapshot())
+        return device
+
+    @property
+    def pending(self):
+        """
+        Returns how many words and messages are waiting for `drain`.
+        """
+        return len(self.__pending)
+
+    def __take(self):
+        if self.__line is None:
+            raise RuntimeError("READ without input, await `fill` first")
+
+        line, self.__line = self.__line, None
+        return line
+
+    def __queue_write(self, data):
+        self.__pending.append((self.__async_writer, data))
+
+    def __queue_err(self, data):
+        self.__pending.append((self.__async_err, data))
+
+    async def fill(self):
+        """
+        Await input until a line parses as a word and keep it for the next `read`.
+
+        Raises:
+            InputExhausted: If the reader runs out of input.
+        """
+        while self.__line is None:
+            line = await self.__async_reader()
+            if not line:
+                raise InputExhausted("Program tried to READ past the end of its input")
+            if isinstance(line, bytes):
+                line = line.decode()
+            line = line.strip()
+
+            try:
+                Opcode(line)
+                self.__line = line
+            except ValueError:
+                self.last_read = line
+                self.err(f"ERROR: Unable to parse {self.last_read}. Please enter a signed integer in the format +1042.")
+                await self.drain()
+
+    async def drain(self):
+        """
+        Hand every buffered word and error message to the async writer and err functions, in order.
+        """
+        while self.__pending:
+            pending, self.__pending = self.__pending, []
+            for function, data in pending:
+                await function(data)
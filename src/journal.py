@@ -0,0 +1,111 @@
+from array import array
+
+from src.memory import Memory
+from src.opcodes import Opcode
+
+class Journal:
+    """
+    A fixed-size ring buffer of undo records, one per instruction executed by `CPU.step`.
+
+    Each record holds only what the instruction can change: the accumulator, the program
+    counter and halted flag from before it ran, and for READ and STORE the address written, the
+    word it held, whether it had been written at all and the memory's extent, so undoing the
+    write leaves memory exactly as it was. Once the buffer is full the oldest records are
+    overwritten, so the journal can rewind at most `depth` instructions.
+
+    Attach one with `cpu.journal = Journal()`.
+    """
+    NO_ADDRESS = -1 ## The instruction didn't write to memory
+
+    def __init__(self, depth=1024):
+        """
+        Args:
+            depth (int): How many instructions can be undone.
+        """
+        if depth < 1:
+            raise ValueError(f"Journal depth must be at least 1, got {depth}")
+
+        self.depth = depth
+        self.__acc = array('i', bytes(4 * depth))
+        self.__pc = array('i', bytes(4 * depth))
+        self.__halted = array('b', bytes(depth))
+        self.__address = array('i', bytes(4 * depth))
+        self.__old = array('i', bytes(4 * depth))
+        self.__written = array('b', bytes(depth))
+        self.__extent = array('i', bytes(4 * depth))
+        self.__next = 0 ## Where the next record goes
+        self.__size = 0
+
+    def __len__(self):
+        """
+        Returns how many instructions can currently be undone.
+        """
+        return self.__size
+
+    def clear(self):
+        self.__next = 0
+        self.__size = 0
+
+    def record(self, cpu, memory):
+        """
+        Save what the instruction at the CPU's current address is about to change. Called by `CPU.step`.
+        """
+        slot = self.__next
+        current = cpu.current
+        self.__acc[slot] = cpu.acc.numeric
+        self.__pc[slot] = current
+        self.__halted[slot] = cpu.halted
+
+        operation, operand = memory.fetch(current)
+        if (operation == Opcode.READ or operation == Opcode.STORE) and operand in Memory.ADDRESSABLE_SPACE:
+            self.__address[slot] = operand
+            self.__old[slot] = memory.read(operand).numeric
+            self.__written[slot] = memory.is_written(operand)
+            self.__extent[slot] = memory.extent
+        else:
+            self.__address[slot] = Journal.NO_ADDRESS
+
+        self.__next = slot + 1 if slot + 1 < self.depth else 0
+        if self.__size < self.depth:
+            self.__size += 1
+
+    def undo(self, cpu, memory):
+        """
+        Undo the last instruction executed.
+
+        Returns:
+            bool: False if there was nothing left to undo.
+        """
+        if self.__size == 0:
+            return False
+
+        slot = self.__next - 1 if self.__next > 0 else self.depth - 1
+        address = self.__address[slot]
+        if address != Journal.NO_ADDRESS:
+            memory.revert(address, self.__old[slot], self.__extent[slot], bool(self.__written[slot]))
+        cpu.restore((self.__acc[slot], self.__pc[slot], bool(self.__halted[slot])))
+
+        self.__next = slot
+        self.__size -= 1
+        return True
+
+    def rewind(self, cpu, memory, breakpoints=(), limit=None):
+        """
+        Undo instructions until the CPU is back at a breakpoint or the journal runs out.
+
+        Always undoes at least one instruction, so rewinding from a breakpoint goes to the previous one.
+
+        Args:
+            breakpoints: Addresses to stop at.
+            limit (int): Optionally the most instructions to undo.
+
+        Returns:
+            int: How many instructions were undone.
+        """
+        undone = 0
+        while (limit is None or undone < limit) and self.undo(cpu, memory):
+            undone += 1
+            if cpu.current in breakpoints:
+                break
+
+        return undone
@@ -0,0 +1,18 @@
+def listing(program):
+    """
+    Returns one line per word of a BasicML program: its address, then the instruction and operand, or the raw word for data.
+    Negative words are also written raw, a mnemonic would lose their sign.
+
+    This is the format `basm.disassemble` writes and `basm.assemble` reads back.
+
+    Args:
+        program (list): The program's Opcodes.
+    """
+    lines = []
+    for counter, opcode in enumerate(program):
+        if opcode.name == "NOOP" or opcode.numeric < 0:
+            lines.append(f"{counter:02d} {opcode}")
+        else:
+            lines.append(f"{counter:02d} {opcode.name} {opcode.operand}")
+
+    return lines
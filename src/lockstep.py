@@ -0,0 +1,240 @@
+import numpy as np
+
+from src.memory import Memory
+from src.opcodes import Opcode
+
+class LockstepResult:
+    """
+    The state of every lane once a `LockstepVM` run is over.
+
+    Attributes:
+        written (ndarray): Every word written during the run, grouped by lane in the order they were written.
+        offsets (ndarray): The words written by lane i are written[offsets[i]:offsets[i + 1]].
+        memory (ndarray): lanes x 250 array of the final memory contents.
+        acc (ndarray): Final accumulator of each lane.
+        pc (ndarray): Final program counter of each lane.
+        status (ndarray): Why each lane stopped, one of the `LockstepVM` status codes.
+        steps (ndarray): Number of instructions each lane executed.
+    """
+    def __init__(self, written, offsets, memory, acc, pc, status, steps):
+        self.written = written
+        self.offsets = offsets
+        self.memory = memory
+        self.acc = acc
+        self.pc = pc
+        self.status = status
+        self.steps = steps
+
+    def output(self, lane):
+        """
+        Returns the words written by one lane.
+        """
+        return self.written[self.offsets[lane]:self.offsets[lane + 1]]
+
+    @property
+    def outputs(self):
+        """
+        Returns a list with the words written by each lane.
+        """
+        bounds = self.offsets.tolist()
+        return [self.written[start:stop] for start, stop in zip(bounds, bounds[1:])]
+
+class LockstepVM:
+    """
+    Runs one BasicML program on many independent lanes at once, one instruction per lane per step.
+
+    Every lane has its own memory, accumulator, program counter and input queue, stored as NumPy arrays.
+    Lanes that take different branches are handled by masking, so each step costs a fixed number of
+    array operations however many lanes there are. The semantics match `CPU.step`, including
+    overflow truncation, halting on reaching address 99 and the program counter moving past a branch target.
+    """
+    RUNNING, HALTED, INPUT_EXHAUSTED, DIVIDE_BY_ZERO, BAD_ADDRESS, STEP_LIMIT = range(6)
+
+    STATUS_NAMES = {
+        RUNNING: "RUNNING", HALTED: "HALTED", INPUT_EXHAUSTED: "INPUT_EXHAUSTED",
+        DIVIDE_BY_ZERO: "DIVIDE_BY_ZERO", BAD_ADDRESS: "BAD_ADDRESS", STEP_LIMIT: "STEP_LIMIT"
+    }
+
+    __memory_operations = np.array(sorted(Opcode.MEMORY_OPERATIONS))
+
+    def __init__(self, program, lanes):
+        """
+        Load the same program into every lane.
+
+        Args:
+            program (list): The program as a list of Opcodes or integer words, or a `Memory`.
+            lanes (int): How many copies of the VM to run.
+        """
+        if isinstance(program, Memory):
+            words, extent = program.snapshot() ## Up to the highest address written, len() only counts the cells
+            program = words[:extent]
+
+        words = [word.numeric if isinstance(word, Opcode) else Opcode.from_int(word).numeric for word in program]
+        if len(words) > Memory.ADDRESSABLE_SPACE.stop:
+            raise IndexError(f"Attempted to load a program of length {len(words)}. Cannot load a program longer than {Memory.ADDRESSABLE_SPACE.stop}")
+
+        self.lanes = lanes
+        self.memory = np.zeros((lanes, Memory.ADDRESSABLE_SPACE.stop), dtype=np.int64)
+        self.memory[:, :len(words)] = words
+        self.acc = np.zeros(lanes, dtype=np.int64)
+        self.pc = np.zeros(lanes, dtype=np.int64)
+        self.status = np.full(lanes, LockstepVM.RUNNING, dtype=np.int8)
+        self.steps = np.zeros(lanes, dtype=np.int64)
+
+    @staticmethod
+    def truncate(values):
+        """
+        Vectorized `Opcode.truncate`: keep the sign and the last six digits.
+        """
+        return np.sign(values) * (np.abs(values) % 1000000)
+
+    @staticmethod
+    def __queues(inputs, lanes):
+        """
+        Turn the per-lane input queues into a padded 2-D array and a vector of queue lengths.
+        """
+        if isinstance(inputs, np.ndarray) and inputs.ndim == 2:
+            queue = inputs.astype(np.int64)
+            lengths = np.full(lanes, queue.shape[1], dtype=np.int64)
+        else:
+            inputs = list(inputs)
+            lengths = np.array([len(values) for values in inputs], dtype=np.int64)
+            if lengths.size and (lengths == lengths[0]).all():
+                queue = np.array(inputs, dtype=np.int64).reshape(len(inputs), lengths[0])
+            else:
+                queue = np.zeros((len(inputs), max(lengths, default=0)), dtype=np.int64)
+                for lane, values in enumerate(inputs):
+                    queue[lane, :len(values)] = values
+
+        if queue.shape[0] != lanes:
+            raise ValueError(f"Expected {lanes} input queues, got {queue.shape[0]}")
+        if queue.size and np.abs(queue).max() > Opcode.LARGEST:
+            raise ValueError(f"Input words must be between {-Opcode.LARGEST} and {Opcode.LARGEST}")
+
+        return queue, lengths
+
+    def run(self, inputs=None, max_steps=None):
+        """
+        Run every lane until it halts, fails, or executes `max_steps` instructions.
+
+        A lane that fails keeps its program counter on the instruction that failed, and its
+        status says why: reading past the end of its input queue, dividing by zero, or addressing
+        memory outside 0-249.
+
+        Args:
+            inputs: One sequence of integer words per lane, or a lanes x K array.
+            max_steps (int): Optional limit on instructions per lane.
+
+        Returns:
+            LockstepResult: Outputs and final state of every lane.
+        """
+        if inputs is None:
+            inputs = [[]] * self.lanes
+        queue, lengths = LockstepVM.__queues(inputs, self.lanes)
+        position = np.zeros(self.lanes, dtype=np.int64)
+
+        memory, acc, pc, status, steps = self.memory, self.acc, self.pc, self.status, self.steps
+        written_lanes = []
+        written_words = []
+
+        while True:
+            active = np.flatnonzero(status == LockstepVM.RUNNING)
+            if max_steps is not None:
+                limited = active[steps[active] >= max_steps]
+                status[limited] = LockstepVM.STEP_LIMIT
+                active = active[steps[active] < max_steps]
+            if active.size == 0:
+                break
+
+            current = pc[active]
+            word = np.abs(memory[active, current])
+            operation = word // 1000
+            operand = word % 1000
+            following = current + 1
+
+            ## Memory operands outside the addressable space fail before anything happens
+            bad = np.isin(operation, LockstepVM.__memory_operations) & (operand > Memory.LAST_ADDRESS)
+
+            read = np.flatnonzero((operation == Opcode.READ) & ~bad)
+            if read.size:
+                lanes = active[read]
+                exhausted = position[lanes] >= lengths[lanes]
+                status[lanes[exhausted]] = LockstepVM.INPUT_EXHAUSTED
+                lanes, read = lanes[~exhausted], read[~exhausted]
+                memory[lanes, operand[read]] = queue[lanes, position[lanes]]
+                position[lanes] += 1
+
+            write = np.flatnonzero((operation == Opcode.WRITE) & ~bad)
+            if write.size:
+                lanes = active[write]
+                written_lanes.append(lanes)
+                written_words.append(memory[lanes, operand[write]])
+
+            load = np.flatnonzero((operation == Opcode.LOAD) & ~bad)
+            if load.size:
+                lanes = active[load]
+                acc[lanes] = memory[lanes, operand[load]]
+
+            store = np.flatnonzero((operation == Opcode.STORE) & ~bad)
+            if store.size:
+                lanes = active[store]
+                memory[lanes, operand[store]] = acc[lanes]
+
+            for code, apply in [(Opcode.ADD, np.add), (Opcode.SUBTRACT, np.subtract), (Opcode.MULTIPLY, np.multiply)]:
+                selected = np.flatnonzero((operation == code) & ~bad)
+                if selected.size:
+                    lanes = active[selected]
+                    acc[lanes] = LockstepVM.truncate(apply(acc[lanes], memory[lanes, operand[selected]]))
+
+            divide = np.flatnonzero((operation == Opcode.DIVIDE) & ~bad)
+            if divide.size:
+                lanes = active[divide]
+                divisor = memory[lanes, operand[divide]]
+                zero = divisor == 0
+                status[lanes[zero]] = LockstepVM.DIVIDE_BY_ZERO
+                lanes, divisor = lanes[~zero], divisor[~zero]
+                acc[lanes] = LockstepVM.truncate(np.floor_divide(acc[lanes], divisor))
+
+            ## Taken branches set the counter to the target, which is then incremented like any other instruction
+            taken = (operation == Opcode.BRANCH) \
+                | ((operation == Opcode.BRANCHNEG) & (acc[active] < 0)) \
+                | ((operation == Opcode.BRANCHZERO) & (acc[active] == 0))
+            bad |= taken & (operand > Memory.LAST_ADDRESS)
+            taken &= ~bad
+            following[taken] = operand[taken] + 1
+            branched_to_halt = taken & (operand == 99)
+
+            halt = operation == Opcode.HALT
+            following[halt] = 1
+
+            bad |= following > Memory.LAST_ADDRESS ## Falling off the end of memory
+
+            ## Lanes that failed this step keep their counter on the failing instruction
+            running = status[active] == LockstepVM.RUNNING
+            status[active[bad & running]] = LockstepVM.BAD_ADDRESS
+            failed = bad | ~running
+
+            done = active[~failed]
+            pc[done] = following[~failed]
+            steps[done] += 1
+
+            halted = (halt | branched_to_halt | (following == 99)) & ~failed
+            status[active[halted]] = LockstepVM.HALTED
+
+        written, offsets = self.__group(written_lanes, written_words)
+        return LockstepResult(written, offsets, memory, acc, pc, status, steps)
+
+    def __group(self, written_lanes, written_words):
+        """
+        Group every word written during the run by lane, keeping the order they were written in.
+        """
+        if not written_lanes:
+            return np.zeros(0, dtype=np.int64), np.zeros(self.lanes + 1, dtype=np.int64)
+
+        lanes = np.concatenate(written_lanes)
+        words = np.concatenate(written_words)
+        order = np.argsort(lanes, kind="stable")
+        offsets = np.zeros(self.lanes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lanes, minlength=self.lanes), out=offsets[1:])
+
+        return words[order], offsets
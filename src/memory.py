@@ -1,5 +1,39 @@
+import threading
+from array import array
 from src.opcodes import Opcode
 
+class MemoryTracker:
+    """
+    Collects the addresses written to in a `Memory` since the last time they were drained.
+
+    Created with `Memory.subscribe`. Several trackers can follow the same memory,
+    each one keeps its own set of changes.
+    """
+    def __init__(self):
+        self.dirty = set()
+        self.__lock = threading.Lock() ## The GUI drains from its own thread while the worker writes
+
+    def __len__(self):
+        return len(self.dirty)
+
+    def add(self, addresses):
+        """
+        Record addresses that were written to. Called by `Memory`.
+        """
+        with self.__lock:
+            self.dirty.update(addresses)
+
+    def drain(self):
+        """
+        Returns the sorted addresses that changed since the last call and forgets them.
+
+        Safe to call from another thread than the one writing: recording and draining hold the
+        same lock, so every address written lands in exactly one drain.
+        """
+        with self.__lock:
+            dirty, self.dirty = self.dirty, set()
+        return sorted(dirty)
+
 class Memory:
     """
     Class to represent the memory of the simulator.
@@ -8,6 +42,10 @@ class Memory:
     LAST_ADDRESS      = ADDRESSABLE_SPACE.stop - 1
 
     def __init__(self, arr=[]):
+        self.__decoded = dict() ## address -> (operation, operand), see `fetch`
+        self.__high = len(arr) ## One past the highest address written to, see `__next`
+        self._trackers = [] ## See `subscribe`, kept empty unless someone asks so writes don't pay for it
+
         if len(arr) == 0:
             self.__mem = dict()
         elif len(arr) not in Memory.ADDRESSABLE_SPACE:
@@ -24,6 +62,34 @@ class Memory:
         """
         return len(self.__mem.keys())
 
+    @property
+    def extent(self):
+        """
+        Returns one past the highest memory location written to.
+        """
+        return self.__high
+
+    def subscribe(self):
+        """
+        Start recording which addresses are written to.
+
+        Returns:
+            MemoryTracker: Collects every address changed by `write`, `writenext` and `clear` from now on.
+        """
+        tracker = MemoryTracker()
+        self._trackers.append(tracker)
+        return tracker
+
+    def unsubscribe(self, tracker):
+        """
+        Stop recording changes for a tracker returned by `subscribe`.
+        """
+        self._trackers.remove(tracker)
+
+    def _changed(self, addresses):
+        for tracker in self._trackers:
+            tracker.add(addresses)
+
     @property
     def mem(self):
         """
@@ -48,9 +114,16 @@ class Memory:
             raise IndexError("Memory address out of range")
 
         if isinstance(value, int):
-            value = Opcode(value)
+            value = Opcode.from_int(value)
         
         self.mem[address] = value
+        self.__decoded.pop(address, None) ## Whatever was decoded here is stale now
+
+        if address >= self.__high:
+            self.__high = address + 1
+
+        if self._trackers:
+            self._changed((address,))
 
     def read(self, address):
         """
@@ -65,22 +138,102 @@ class Memory:
         if address not in Memory.ADDRESSABLE_SPACE:
             raise IndexError("Memory address out of range")
 
-        return self.__mem.get(address, Opcode("+0000")) ## Default to +0000 for unwritten memory
+        return self.__mem.get(address, Opcode.from_int(0)) ## Default to +0000 for unwritten memory
+
+    def is_written(self, address):
+        """
+        Returns whether an address has been written to, rather than reading as +0000 by default.
+        """
+        return address in self.__mem
+
+    def revert(self, address, value, extent, written=True):
+        """
+        Undo a `write`, putting memory back exactly as it was before it.
+
+        Args:
+            address (int): The address that was written to.
+            value: The word it held before.
+            extent (int): `extent` before the write.
+            written (bool): `is_written(address)` before the write. If False the address goes back to unwritten.
+        """
+        if written:
+            self.__mem[address] = Opcode.from_int(value) if isinstance(value, int) else value
+        else:
+            self.__mem.pop(address, None)
+        self.__decoded.pop(address, None)
+        self.__high = extent
+
+        if self._trackers:
+            self._changed((address,))
+
+    def fetch(self, address):
+        """
+        Returns the decoded (operation, operand) pair stored at a specific memory address.
+
+        The pair is decoded once and reused until the address is written to again,
+        so instructions in a loop are only ever decoded on the first pass.
+
+        Raises:
+            IndexError: If the address is out of range.
+        """
+        decoded = self.__decoded.get(address)
+        if decoded is None:
+            decoded = self.read(address).decoded
+            self.__decoded[address] = decoded
+
+        return decoded
+
+    def predecode(self):
+        """
+        Decode every memory location that has been written to ahead of execution.
+        """
+        for address, opcode in self.__mem.items():
+            self.__decoded[address] = opcode.decoded
+
+    def snapshot(self):
+        """
+        Capture the contents of memory as a flat array of words.
+
+        Returns:
+            (array, int): The 250 words and one past the highest address written to.
+                Treat the array as read-only, it may be shared with this memory.
+        """
+        words = array('i', bytes(4 * Memory.ADDRESSABLE_SPACE.stop))
+        for address, opcode in self.__mem.items():
+            words[address] = opcode.numeric
+
+        return words, self.__high
+
+    def restore(self, words, extent, decoded=None):
+        """
+        Put memory back to the state captured by `snapshot`.
+
+        Every address below `extent` counts as written afterwards.
+
+        Args:
+            decoded (list): Optionally the (operation, operand) pair of every word, so nothing is decoded again.
+        """
+        self.__mem = {address: Opcode.from_int(words[address]) for address in range(extent)}
+        self.__decoded = dict(enumerate(decoded[:extent])) if decoded is not None else dict()
+        self.__high = extent
+
+        if self._trackers:
+            self._changed(Memory.ADDRESSABLE_SPACE)
+
+    def fork(self):
+        """
+        Returns a new memory of the same kind with the same contents.
+        """
+        memory = type(self)()
+        memory.restore(*self.snapshot())
+        return memory
 
     @property
     def __next(self):
         """
-        Finds the next available memory address.
+        Finds the next available memory address, i.e. one past the highest address written to.
         """
-        ## Grab all the keys from the memory dictionary
-        #  sort them
-        #  get the last key
-        #  __next value should be that value plus one
-        # TODO: Optimize by caching this?
-        if len(self.__mem) == 0:
-            return 0 ## i.e. if nothing has yet to be written return the start
-        else:
-            return sorted(self.__mem.keys())[-1] + 1
+        return self.__high
 
     def writenext(self, value):
         """
@@ -153,6 +306,8 @@ class Memory:
         """
         Clears the memory, optional parameter takes a list of Opcodes to store.
         """
+        self.__decoded = dict()
+
         if len(new_mem) == 0:
             self.__mem = dict()
         elif len(new_mem) not in Memory.ADDRESSABLE_SPACE:
@@ -163,4 +318,250 @@ class Memory:
                 if not isinstance(new_mem[i], Opcode):
                     raise TypeError(f"Attempted to clear memory with a non-Opcode object at index {i}")
                 mem[i] = new_mem[i]
-            self.__mem = mem
\ No newline at end of file
+            self.__mem = mem
+
+        if self._trackers:
+            self._changed(range(max(self.__high, len(new_mem))))
+
+        self.__high = len(new_mem)
+
+class ArrayMemory(Memory):
+    """
+    Memory backed by a contiguous array of signed integer words instead of a dictionary of Opcodes.
+
+    Opcodes are only created when a location is read, and the next free address is tracked
+    as a high-water mark. Otherwise behaves exactly like `Memory`.
+    """
+    def __init__(self, arr=[]):
+        self.__words = array('i', bytes(4 * Memory.ADDRESSABLE_SPACE.stop))
+        self.__decoded = [None] * Memory.ADDRESSABLE_SPACE.stop
+        self.__high = 0
+        self.__shared = False ## Whether the words are shared with a snapshot or fork, see `__own`
+        self._trackers = []
+
+        if len(arr) == 0:
+            return
+        elif len(arr) not in Memory.ADDRESSABLE_SPACE:
+            raise IndexError(f"Attempted to create a Memory object out of an array of length {len(arr)}. Cannot create object with an array whose length exceeds {Memory.ADDRESSABLE_SPACE.stop}")
+        else:
+            for i in range(len(arr)):
+                self.__words[i] = ArrayMemory.__word(arr[i])
+            self.__high = len(arr)
+
+    def __own(self):
+        """
+        Copy the words before the first write to memory that is shared with a snapshot or fork
+        """
+        self.__words = array('i', self.__words)
+        self.__decoded = list(self.__decoded)
+        self.__shared = False
+
+    @staticmethod
+    def __word(value):
+        """
+        Returns the integer word for an Opcode, an integer, or anything the Opcode constructor accepts.
+        """
+        if isinstance(value, Opcode):
+            return value.numeric
+        if isinstance(value, int):
+            return Opcode.from_int(value).numeric ## Bounds check
+
+        return Opcode(value).numeric
+
+    def __len__(self):
+        """
+        Returns the number of memory locations up to the highest one written to
+        """
+        return self.__high
+
+    @property
+    def extent(self):
+        """
+        Returns one past the highest memory location written to.
+        """
+        return self.__high
+
+    @property
+    def mem(self):
+        """
+        Returns the memory as a dictionary of address -> Opcode, built on demand.
+        """
+        words = self.__words
+        return {address: Opcode.from_int(words[address]) for address in range(self.__high)}
+
+    @property
+    def words(self):
+        """
+        Returns the underlying array of integer words. Write through `write`, the array may be shared with a snapshot.
+        """
+        return self.__words
+
+    def write(self, address, value):
+        """
+        Writes a value to a specific memory address.
+        
+        Args:
+            address (int): The memory address to write to.
+            value (int): The value to write to the memory address.
+        
+        Raises:
+            IndexError: If the address is out of range.
+        """
+        assert isinstance(address, int)
+
+        if address not in Memory.ADDRESSABLE_SPACE:
+            raise IndexError("Memory address out of range")
+
+        value = ArrayMemory.__word(value)
+        if self.__shared:
+            self.__own()
+
+        self.__words[address] = value
+        self.__decoded[address] = None
+
+        if address >= self.__high:
+            self.__high = address + 1
+
+        if self._trackers:
+            self._changed((address,))
+
+    def read(self, address):
+        """
+        Reads a value from a specific memory address.
+        
+        Args:
+            address (int): The memory address to read from.
+        
+        Raises:
+            IndexError: If the address is out of range.
+        """
+        if address not in Memory.ADDRESSABLE_SPACE:
+            raise IndexError("Memory address out of range")
+
+        return Opcode.from_int(self.__words[address])
+
+    def is_written(self, address):
+        """
+        Returns whether an address is below the high-water mark, which is what counts as written for this backend.
+        """
+        return address < self.__high
+
+    def revert(self, address, value, extent, written=True):
+        """
+        Undo a `write`, putting memory back exactly as it was before it. See `Memory.revert`.
+        """
+        if self.__shared:
+            self.__own()
+
+        self.__words[address] = ArrayMemory.__word(value) if written else 0
+        self.__decoded[address] = None
+        self.__high = extent
+
+        if self._trackers:
+            self._changed((address,))
+
+    def fetch(self, address):
+        """
+        Returns the decoded (operation, operand) pair stored at a specific memory address.
+
+        Raises:
+            IndexError: If the address is out of range.
+        """
+        if address not in Memory.ADDRESSABLE_SPACE:
+            raise IndexError("Memory address out of range")
+
+        decoded = self.__decoded[address]
+        if decoded is None:
+            decoded = divmod(abs(self.__words[address]), 1000)
+            self.__decoded[address] = decoded
+
+        return decoded
+
+    def predecode(self):
+        """
+        Decode every memory location up to the high-water mark ahead of execution.
+        """
+        words = self.__words
+        for address in range(self.__high):
+            self.__decoded[address] = divmod(abs(words[address]), 1000)
+
+    def writenext(self, value):
+        """
+        Writes a value to the next available memory address.
+        
+        Args:
+            value (int): The value to write to the memory.
+        
+        Raises:
+            IndexError: If there are no available memory addresses.
+        """
+        if self.__high not in Memory.ADDRESSABLE_SPACE:
+            raise IndexError("No available memory address")
+        self.write(self.__high, value)
+
+    def snapshot(self):
+        """
+        Capture the contents of memory without copying them.
+
+        The words are shared copy-on-write: whichever of this memory and the restored copies
+        writes first makes its own copy, so taking a snapshot costs nothing until then.
+
+        Returns:
+            (array, int): The 250 words and one past the highest address written to.
+                Treat the array as read-only.
+        """
+        self.__shared = True
+        return self.__words, self.__high
+
+    def restore(self, words, extent, decoded=None):
+        """
+        Put memory back to the state captured by `snapshot`, sharing the words until the next write.
+
+        Args:
+            decoded (list): Optionally the (operation, operand) pair of all 250 words, shared the same way.
+        """
+        self.__words = words
+        self.__decoded = decoded if decoded is not None else [None] * Memory.ADDRESSABLE_SPACE.stop
+        self.__high = extent
+        self.__shared = True
+
+        if self._trackers:
+            self._changed(Memory.ADDRESSABLE_SPACE)
+
+    def fork(self):
+        """
+        Returns a new memory with the same contents, sharing the words copy-on-write.
+
+        Forking allocates nothing per word, so thousands of forks of one state are cheap
+        as long as each only writes to a few of them.
+        """
+        memory = object.__new__(ArrayMemory)
+        memory.__words = self.__words
+        memory.__decoded = self.__decoded ## Decoded from the same words, and only ever filled in until the first write
+        memory.__high = self.__high
+        memory.__shared = True
+        memory._trackers = []
+        self.__shared = True
+
+        return memory
+
+    def clear(self, new_mem=[]):
+        """
+        Clears the memory, optional parameter takes a list of Opcodes to store.
+        """
+        if len(new_mem) not in Memory.ADDRESSABLE_SPACE:
+            raise IndexError(f"Attempted to clear memory with an array of length {len(new_mem)}. Cannot clear memory with an array whose length exceeds {Memory.ADDRESSABLE_SPACE.stop}")
+
+        words = array('i', bytes(4 * Memory.ADDRESSABLE_SPACE.stop))
+        for i in range(len(new_mem)):
+            if not isinstance(new_mem[i], Opcode):
+                raise TypeError(f"Attempted to clear memory with a non-Opcode object at index {i}")
+            words[i] = new_mem[i].numeric
+
+        if self._trackers:
+            self._changed(range(max(self.__high, len(new_mem))))
+
+        self.__words = words
+        self.__decoded = [None] * Memory.ADDRESSABLE_SPACE.stop
+        self.__high = len(new_mem)
+        self.__shared = False
@@ -1,13 +1,33 @@
+from src.diagnostics import diagnostics
+
 class Opcode:
     """
     Class to represent an opcode in the simulator.
+
+    An opcode is stored as its signed integer value, the string forms are only built when asked for.
+    Opcodes are never modified after they are created, which lets `Opcode.from_int` hand out
+    one shared object for common words such as +000000.
     """
 
-    __op_list = {
-            10: "READ", 11: "WRITE", 20: "LOAD", 21: "STORE",
-            30: "ADD", 31: "SUBTRACT", 32: "DIVIDE", 33: "MULTIPLY",
-            40: "BRANCH", 41: "BRANCHNEG", 42: "BRANCHZERO", 43: "HALT"
+    __slots__ = ("__numeric", "__raw")
+
+    ## The instruction set: the operation part of a word, `abs(word) // 1000`. Every other module
+    #  that decodes words refers to these instead of spelling out the numbers.
+    READ, WRITE, LOAD, STORE = 10, 11, 20, 21
+    ADD, SUBTRACT, DIVIDE, MULTIPLY = 30, 31, 32, 33
+    BRANCH, BRANCHNEG, BRANCHZERO, HALT = 40, 41, 42, 43
+
+    OPERATIONS = {
+            READ: "READ", WRITE: "WRITE", LOAD: "LOAD", STORE: "STORE",
+            ADD: "ADD", SUBTRACT: "SUBTRACT", DIVIDE: "DIVIDE", MULTIPLY: "MULTIPLY",
+            BRANCH: "BRANCH", BRANCHNEG: "BRANCHNEG", BRANCHZERO: "BRANCHZERO", HALT: "HALT"
         }
+    MEMORY_OPERATIONS = frozenset({READ, WRITE, LOAD, STORE, ADD, SUBTRACT, DIVIDE, MULTIPLY}) ## Their operand is an address to read or write
+    BRANCHES = frozenset({BRANCH, BRANCHNEG, BRANCHZERO})
+
+    LARGEST = 999999
+    INTERN_LIMIT = 50000 ## Words strictly between -INTERN_LIMIT and INTERN_LIMIT are shared, which covers every instruction
+    __interned = {}
 
     @staticmethod
     def __4_to_6(raw):
@@ -18,10 +38,10 @@ class Opcode:
         operation = raw[1:3]
         operand = raw[3:]
 
-        if Opcode.__op_list.get(int(operation)) is None:
+        if Opcode.OPERATIONS.get(int(operation)) is None:
             return f"{sign}00{operation}{operand}"
     
-        elif Opcode.__op_list.get(int(operation)):
+        elif Opcode.OPERATIONS.get(int(operation)):
             return f"{sign}0{operation}0{operand}"
         else:
             raise ValueError(f"Wasn't able to convert 4-digit(?) {raw} into 6-digit format.")
@@ -37,7 +57,12 @@ class Opcode:
             ValueError: If the raw value is invalid.
         """
         if isinstance(raw, int):
-            raw = f"{raw:+07d}"
+            if raw > Opcode.LARGEST or raw < -Opcode.LARGEST:
+                raise ValueError(f"Could not make opcode from {raw}. Opcode must be either 4 or 6 digits")
+
+            self.__numeric = raw
+            self.__raw = None
+            return
 
         raw = raw.strip()
 
@@ -58,38 +83,66 @@ class Opcode:
             raise ValueError(f"Could not make opcode from {raw}. Opcode must be either 4 or 6 digits")
 
         self.__raw = raw
-        self.__sign = ""
+
+    @staticmethod
+    def from_int(value):
+        """
+        Return an opcode for a signed integer value, skipping the string validation in `__init__`.
+
+        Small values and instruction words are interned, so asking twice for the same one
+        returns the same object.
+
+        Raises:
+            ValueError: If the value does not fit in six digits.
+        """
+        opcode = Opcode.__interned.get(value)
+        if opcode is not None:
+            return opcode
+
+        if value > Opcode.LARGEST or value < -Opcode.LARGEST:
+            raise ValueError(f"Could not make opcode from {value}. Opcode must be either 4 or 6 digits")
+
+        opcode = object.__new__(Opcode)
+        opcode.__numeric = value
+        opcode.__raw = None
+
+        if -Opcode.INTERN_LIMIT < value < Opcode.INTERN_LIMIT:
+            Opcode.__interned[value] = opcode
+
+        return opcode
         
     @property
     def name(self):
         """
         Returns the name of the operation corresponding to the opcode.
         """
-        if self.raw[0].isdigit():
-            self.__sign = "+"
-            self.raw = "+" + self.raw
-            self.__raw = new_raw
-        operation = int(self.raw[1:4])
-        return Opcode.__op_list.get(operation, "NOOP")
+        return Opcode.OPERATIONS.get(abs(self.__numeric) // 1000, "NOOP")
 
     @property
     def sign(self):
         """
         Returns the sign of the opcode.
         """
-        self.__sign = self.raw[0]
-        return self.__sign
+        return self.raw[0]
 
     @property
     def operand(self):
         """
         Returns the operand of the opcode.
         """
-        print(f"raw is: {self.raw}")
         return self.raw[4:]
 
+    @property
+    def decoded(self):
+        """
+        Returns the (operation, operand) pair of the opcode as integers.
+        """
+        return divmod(abs(self.__numeric), 1000)
+
     @property
     def raw(self):
+        if self.__raw is None:
+            self.__raw = f"{self.__numeric:+07d}"
         return self.__raw
 
     @property
@@ -107,28 +160,36 @@ class Opcode:
         """
         Returns the string representation of the opcode.
         """
-        return self.__raw
+        return self.raw
+
+    def __repr__(self):
+        return f"Opcode({self.raw!r})"
 
     @staticmethod
-    def __overflow(raw_integer):
+    def truncate(raw_integer):
         """
         The behavior implemented here should define how an Opcode is expected to handle overflow or underflow behavior
 
         The current specification is:
         "Truncate overflows (so same sign, just drop the extra digits, keep the last four)"
+
+        Returns the truncated value as an integer.
         """
-        raw_string = f"{int(raw_integer):+07d}"
+        if raw_integer > Opcode.LARGEST or raw_integer < -Opcode.LARGEST:
+            overflowed = raw_integer % 1000000 if raw_integer > 0 else -(-raw_integer % 1000000) ## Keep the last six digits and the sign
 
-        if raw_integer > 999999 or raw_integer < -999999:
-            truncated  = raw_string[-6:] ## Grab the last six digits
-            sign       = raw_string[0]
-            overflowed = int(f"{sign}{truncated}")
+            diagnostics.warning("overflow", "warning: overflowing %+07d to %+07d", raw_integer, overflowed)
 
-            print(f"warning: overflowing {raw_string} to {overflowed:+07d}")
-            
-            return Opcode(f"{overflowed:+07d}")
+            return overflowed
         else:
-            return Opcode(raw_string)
+            return raw_integer
+
+    @staticmethod
+    def __overflow(raw_integer):
+        """
+        Build the opcode for an arithmetic result, truncating it if it overflows. See `truncate`.
+        """
+        return Opcode.from_int(Opcode.truncate(raw_integer))
             
     def __eq__(self, other):
         """
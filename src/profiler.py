@@ -0,0 +1,137 @@
+import json
+from array import array
+
+from src.memory import Memory
+from src.opcodes import Opcode
+from src.listing import listing
+
+class Profiler:
+    """
+    Counts where a program spends its time, one instruction at a time as `CPU.step` executes it.
+
+    Every counter is a flat array indexed by address (or operation), so recording an
+    instruction is a handful of integer increments. Attach one with `cpu.profiler = Profiler()`.
+
+    Attributes:
+        executions (array): How many times the instruction at each address ran.
+        operations (array): How many times each operation ran, indexed by operation code. NOOPs count under their code too.
+        taken, not_taken (array): For BRANCHNEG and BRANCHZERO, how often the branch at each address was taken or not.
+        reads, writes (array): How many instructions read or wrote each memory cell as their operand.
+    """
+    OPERATIONS = 1000 ## Every possible value of the operation part of a word
+    __reading = Opcode.MEMORY_OPERATIONS - {Opcode.READ, Opcode.STORE}
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Reset every counter to zero.
+        """
+        size = Memory.ADDRESSABLE_SPACE.stop
+        self.executions = array('L', bytes(array('L').itemsize * size))
+        self.operations = array('L', bytes(array('L').itemsize * Profiler.OPERATIONS))
+        self.taken = array('L', bytes(array('L').itemsize * size))
+        self.not_taken = array('L', bytes(array('L').itemsize * size))
+        self.reads = array('L', bytes(array('L').itemsize * size))
+        self.writes = array('L', bytes(array('L').itemsize * size))
+
+    @property
+    def total(self):
+        """
+        Returns how many instructions were executed.
+        """
+        return sum(self.executions)
+
+    def record(self, cpu, memory):
+        """
+        Count the instruction at the CPU's current address, which is about to run. Called by `CPU.step`.
+        """
+        current = cpu.current
+        operation, operand = memory.fetch(current)
+        self.executions[current] += 1
+        self.operations[operation] += 1
+
+        if operand not in Memory.ADDRESSABLE_SPACE:
+            return
+
+        if operation in Profiler.__reading:
+            self.reads[operand] += 1
+        elif operation == Opcode.READ or operation == Opcode.STORE:
+            self.writes[operand] += 1
+        elif operation == Opcode.BRANCHNEG or operation == Opcode.BRANCHZERO:
+            acc = cpu.acc.numeric
+            if (acc < 0) if operation == Opcode.BRANCHNEG else (acc == 0):
+                self.taken[current] += 1
+            else:
+                self.not_taken[current] += 1
+
+    def hot_spots(self, count=10):
+        """
+        Returns up to `count` (address, executions) pairs for the addresses executed most, busiest first.
+        """
+        executed = [(address, runs) for address, runs in enumerate(self.executions) if runs]
+        executed.sort(key=lambda pair: (-pair[1], pair[0]))
+        return executed[:count]
+
+    def to_json(self):
+        """
+        Returns the non-zero counters as a dictionary that can be serialized to JSON.
+        """
+        def nonzero(counters):
+            return {str(address): count for address, count in enumerate(counters) if count}
+
+        operations = {}
+        for operation, count in enumerate(self.operations):
+            if count:
+                name = Opcode.from_int(operation * 1000).name
+                operations[name] = operations.get(name, 0) + count
+
+        branches = {}
+        for address in Memory.ADDRESSABLE_SPACE:
+            if self.taken[address] or self.not_taken[address]:
+                branches[str(address)] = {"taken": self.taken[address], "not_taken": self.not_taken[address]}
+
+        return {
+            "total": self.total,
+            "executions": nonzero(self.executions),
+            "operations": operations,
+            "branches": branches,
+            "reads": nonzero(self.reads),
+            "writes": nonzero(self.writes),
+        }
+
+    def save(self, filename):
+        """
+        Write the counters to a JSON file, see `to_json`.
+        """
+        with open(filename, 'w') as report:
+            json.dump(self.to_json(), report, indent=2)
+
+    def listing(self, program):
+        """
+        Annotate a disassembly of the program with the counters for every address.
+
+        Args:
+            program (list): The program's Opcodes, e.g. from `basm.read_file`.
+
+        Returns:
+            list: One line per word, laid out like `basm.disassemble` with the counts after a `;;` comment.
+        """
+        total = self.total or 1
+        lines = []
+        for address, line in enumerate(listing(program)):
+            notes = []
+            runs = self.executions[address]
+            if runs:
+                notes.append(f"{runs} runs ({100 * runs / total:.1f}%)")
+            if self.taken[address] or self.not_taken[address]:
+                notes.append(f"taken {self.taken[address]}, not taken {self.not_taken[address]}")
+            if self.reads[address]:
+                notes.append(f"{self.reads[address]} reads")
+            if self.writes[address]:
+                notes.append(f"{self.writes[address]} writes")
+
+            lines.append(f"{line:<20};; {', '.join(notes)}" if notes else line)
+
+        return lines
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+from src.image import ProgramImage, ImageError
+
+class CachedProgram:
+    """
+    A parsed program kept by a `ProgramCache`.
+
+    Everything here is shared by every VM that loads the program, so none of it may be modified.
+    `Memory.restore` shares the words and decoded pairs copy-on-write.
+
+    Attributes:
+        words (array): The 250 words.
+        extent (int): One past the highest address the program uses.
+        decoded (list): The (operation, operand) pair of every word.
+        compiler (BlockCompiler): Blocks compiled from this program, created by the first VM that runs it compiled.
+    """
+    __slots__ = ("words", "extent", "decoded", "compiler")
+
+    def __init__(self, words, extent):
+        self.words = words
+        self.extent = extent
+        self.decoded = [divmod(abs(word), 1000) for word in words]
+        self.compiler = None
+
+class ProgramCache:
+    """
+    Keeps parsed programs by a hash of their file contents, so loading an unchanged file again skips parsing.
+
+    Programs are kept in memory, least recently used first out once there are more than `capacity`.
+    With a `directory` they are also saved there as program images named after their hash, which
+    other processes, and later runs, load instead of parsing the text.
+    """
+    def __init__(self, capacity=256, directory=None):
+        """
+        Args:
+            capacity (int): How many programs to keep in memory.
+            directory (str): Optional directory for the on-disk tier, created if it doesn't exist.
+        """
+        self.capacity = capacity
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.__programs = OrderedDict() ## digest -> CachedProgram, least recently used first
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.__programs)
+
+    def __contains__(self, digest):
+        return digest in self.__programs
+
+    @staticmethod
+    def digest(data):
+        """
+        Returns the key for a file's contents.
+        """
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def load(self, filename):
+        """
+        Returns the program in a file, parsing it only if these exact contents haven't been seen before.
+
+        Text programs and program images are both accepted, see `UVSim.load`.
+
+        Raises:
+            ValueError, IndexError: If the file is not a valid program.
+        """
+        with open(filename, "rb") as program:
+            data = program.read()
+
+        digest = ProgramCache.digest(data)
+        cached = self.__programs.get(digest)
+        if cached is not None:
+            self.hits += 1
+            self.__programs.move_to_end(digest)
+            return cached
+
+        image = self.__load_from_disk(digest)
+        if image is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            if str(filename).endswith(ProgramImage.EXTENSION):
+                image = ProgramImage.from_bytes(data, filename)
+            else:
+                image = ProgramImage.from_lines(data.decode().splitlines(), filename)
+            self.__save_to_disk(digest, image)
+
+        cached = CachedProgram(image.words, image.extent)
+        self.__programs[digest] = cached
+        if len(self.__programs) > self.capacity:
+            self.__programs.popitem(last=False)
+
+        return cached
+
+    def clear(self):
+        """
+        Forget every program kept in memory. The on-disk tier is left alone.
+        """
+        self.__programs.clear()
+
+    def __path(self, digest):
+        return os.path.join(self.directory, digest + ProgramImage.EXTENSION)
+
+    def __load_from_disk(self, digest):
+        if self.directory is None:
+            return None
+
+        try:
+            return ProgramImage.load(self.__path(digest))
+        except FileNotFoundError:
+            return None
+        except ImageError: ## Damaged, it is rewritten below
+            return None
+
+    def __save_to_disk(self, digest, image):
+        """
+        Write the image under a temporary name and rename it, so other processes never see half of it
+        """
+        if self.directory is None:
+            return
+
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as cached:
+                cached.write(image.to_bytes())
+            os.replace(temporary, self.__path(digest))
+        except BaseException:
+            os.unlink(temporary)
+            raise
@@ -0,0 +1,175 @@
+import queue
+import threading
+from time import sleep, perf_counter
+
+from uvsim import UVSim
+
+class WorkerStopped(Exception):
+    """
+    Raised on a worker's thread to unwind a program that was halted while it waited for input.
+    """
+    pass
+
+class SimWorker:
+    """
+    Runs one `UVSim` on its own thread and reports back through a queue.
+
+    The thread never touches Tk. Everything it has to say is put on `events` as a tuple, and the
+    GUI drains them with `poll` from its own loop. Input goes the other way through `provide`,
+    so a READ blocks the worker thread instead of the window.
+
+    Events:
+        ("output", Opcode): The program wrote a word.
+        ("error", str): The IO device reported an error, e.g. unparsable input.
+        ("input",): The program is waiting for `provide`.
+        ("paused", int): The run stopped before the instruction at this address, at a breakpoint or after a single step.
+        ("halted", int): The program halted after this many instructions.
+        ("stopped",): `halt` stopped the run.
+        ("failed", Exception): An instruction raised.
+    """
+    FRAME = 1 / 30 ## Seconds between batches when running at a fixed number of instructions per frame
+
+    def __init__(self, memory=None):
+        self.uvsim = UVSim(reader=self.read, writer=self.write, err=self.error, memory=memory)
+        self.events = queue.Queue()
+        self.breakpoints = set()
+        self.speed = None ## Instructions per frame, 0 to stop after every instruction, None to run flat out
+        self.running = False
+        self.waiting_for_input = False
+        self.steps = 0
+        self.__inputs = queue.Queue()
+        self.__thread = None
+        self.__stopping = False
+
+    ########################
+    # Called from the GUI  #
+    ########################
+
+    def start(self, single=False):
+        """
+        Start or resume running from the CPU's current state on a new thread.
+
+        Args:
+            single (bool): Execute one instruction and pause, whatever the speed.
+        """
+        if self.busy:
+            return
+
+        while not self.__inputs.empty(): ## Left over from a run that was halted
+            self.__inputs.get_nowait()
+
+        self.__stopping = False
+        self.running = True
+        self.__thread = threading.Thread(target=self.__run, args=(single,), daemon=True)
+        self.__thread.start()
+
+    def pause(self):
+        """
+        Ask the run to stop after the instruction it is executing. A pending READ still waits for input.
+        """
+        self.running = False
+
+    def step(self):
+        """
+        Execute a single instruction on the worker thread.
+        """
+        self.start(single=True)
+
+    def halt(self, wait=None):
+        """
+        Stop the run, including one that is waiting for input.
+
+        Args:
+            wait (float): Optionally how many seconds to wait for the thread to finish.
+        """
+        self.running = False
+        self.__stopping = True
+        self.__inputs.put(None) ## Wakes up a pending READ, which raises `WorkerStopped`
+        if wait is not None and self.__thread is not None:
+            self.__thread.join(wait)
+
+    def provide(self, text):
+        """
+        Hand a line of input to the program.
+        """
+        self.__inputs.put(text)
+
+    def poll(self):
+        """
+        Returns every event reported since the last poll without blocking.
+        """
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    @property
+    def busy(self):
+        """
+        Returns whether the worker thread is executing.
+        """
+        return self.__thread is not None and self.__thread.is_alive()
+
+    ##########################
+    # Called from the thread #
+    ##########################
+
+    def read(self):
+        self.waiting_for_input = True
+        self.events.put(("input",))
+        try:
+            while True:
+                if self.__stopping:
+                    raise WorkerStopped("Halted while waiting for input")
+                try:
+                    text = self.__inputs.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if text is not None:
+                    return text
+        finally:
+            self.waiting_for_input = False
+
+    def write(self, data):
+        self.events.put(("output", data))
+
+    def error(self, data):
+        self.events.put(("error", data))
+
+    def __run(self, single):
+        cpu, memory, io_device = self.uvsim.cpu, self.uvsim.mem, self.uvsim.io_device
+
+        try:
+            while self.running and not cpu.halted:
+                batch = 0 if single else self.speed
+                executed = 0
+                started = perf_counter()
+
+                while self.running and not cpu.halted:
+                    cpu.step(memory, io_device)
+                    executed += 1
+                    self.steps += 1
+
+                    if cpu.current in self.breakpoints or batch == 0:
+                        self.running = False
+                        if not cpu.halted:
+                            self.events.put(("paused", cpu.current))
+                        break
+                    if batch is not None and executed >= batch:
+                        break
+
+                if batch and self.running:
+                    sleep(max(0.0, SimWorker.FRAME - (perf_counter() - started)))
+
+            if cpu.halted:
+                self.events.put(("halted", self.steps))
+            elif self.__stopping:
+                self.events.put(("stopped",))
+        except WorkerStopped:
+            self.events.put(("stopped",))
+        except Exception as e:
+            self.events.put(("failed", e))
+        finally:
+            self.running = False
@@ -0,0 +1,32 @@
+class Snapshot:
+    """
+    The complete state of a `UVSim` at one moment, see `UVSim.snapshot`.
+
+    Memory is kept as a flat array of words rather than Opcode objects. The array is shared with
+    the memory it came from and with everything restored from it, so it must not be modified.
+
+    Attributes:
+        words (array): The 250 memory words.
+        extent (int): One past the highest address written to.
+        cpu (tuple): The CPU registers, see `CPU.snapshot`.
+        io (tuple): The IO device state, see `IODevice.snapshot`.
+    """
+    __slots__ = ("words", "extent", "cpu", "io")
+
+    def __init__(self, words, extent, cpu, io):
+        self.words = words
+        self.extent = extent
+        self.cpu = cpu
+        self.io = io
+
+    @property
+    def acc(self):
+        return self.cpu[0]
+
+    @property
+    def current(self):
+        return self.cpu[1]
+
+    @property
+    def halted(self):
+        return self.cpu[2]
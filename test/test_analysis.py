@@ -0,0 +1,152 @@
+import sys
+import os
+import random
+import pytest
+from src.analysis import Analysis
+from src.compiler import BlockCompiler
+from src.cpu import CPU, StepLimitExceeded
+from src.memory import Memory, ArrayMemory
+from src.io_device import ScriptedIODevice
+from src.opcodes import Opcode
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "../bml_examples")
+
+def analyze_example(name, backend=Memory):
+    uvsim = UVSim(memory=backend())
+    uvsim.load(os.path.join(EXAMPLES, name))
+    return Analysis.of(uvsim.mem)
+
+##############
+# Successors #
+##############
+
+@pytest.mark.parametrize("address, word, expected", [
+    (0, 10007, (1,)),                     ## READ falls through
+    (0, 43000, (Analysis.EXIT,)),         ## HALT
+    (0, 40005, (6,)),                     ## A taken branch continues one past its target
+    (0, 41005, (1, 6)),                   ## Conditional branches go both ways
+    (0, 40099, (Analysis.EXIT,)),         ## Branching to 99 halts
+    (0, 40098, (Analysis.EXIT,)),         ## So does continuing at 99
+    (98, 20000, (Analysis.EXIT,)),        ## Falling through to 99 halts
+    (Memory.LAST_ADDRESS, 0, (Analysis.EXIT,)), ## Running off the end fails
+    (0, 40250, (Analysis.EXIT,)),         ## Branching outside memory fails
+    (0, 20250, (Analysis.EXIT,)),         ## So does an operand outside memory
+    (0, -40005, (6,)),                    ## Negative words decode like positive ones
+    (3, 42002, (4, 3)),                   ## Branching to the previous address repeats the branch
+])
+def test_successors(address, word, expected):
+    assert Analysis.successors(address, word) == expected
+
+##########
+# Blocks #
+##########
+
+def test_blocks():
+    analysis = analyze_example("Test2.txt")
+
+    assert [(block.start, block.end) for block in analysis.blocks.values()] == [(0, 5), (5, 7), (8, 9)]
+    assert analysis.blocks[0].successors == (5, 8)
+    assert analysis.blocks[5].exits and analysis.blocks[8].exits
+
+def test_straight_line():
+    analysis = analyze_example("Test1.txt")
+
+    assert list(analysis.blocks) == [0]
+    assert analysis.terminates
+    assert analysis.report() == []
+
+def test_blocks_match_compiler_leaders():
+    words = [20010, 41005, 11010, 43000, 0, 0]
+    analysis = Analysis.of(words)
+
+    assert set(analysis.blocks) <= BlockCompiler.leaders(words)
+
+############
+# Findings #
+############
+
+def test_unreachable():
+    ## The branch skips its target at 07, so the WRITE there never runs
+    assert analyze_example("Test2.txt").unreachable == [7]
+
+def test_data_and_overlap():
+    analysis = Analysis.of([20003, 21000, 43000, 5])
+
+    assert analysis.data == {0, 3}
+    assert analysis.overlap == [0]
+    assert analysis.self_modifying == [(1, 0)]
+
+def test_closed_loop():
+    analysis = Analysis.of([20003, 30003, 40000, 1])
+
+    assert not analysis.terminates
+    assert analysis.closed_loops == [[1, 2]]
+
+def test_loop_with_exit():
+    ## Counts down and stops at zero
+    analysis = Analysis.of([20005, 31006, 21005, 42099, 40000, 3, 1])
+
+    assert analysis.terminates
+    assert analysis.closed_loops == []
+
+def test_loop_with_read():
+    assert Analysis.of([10010, 40000]).terminates
+
+def test_loop_with_divide():
+    assert Analysis.of([20010, 32011, 40000]).terminates
+
+def test_self_modifying_loop_not_flagged():
+    ## The STORE rewrites the branch, so the loop may end
+    analysis = Analysis.of([20005, 21002, 40000, 0, 0, 43000])
+
+    assert analysis.terminates
+    assert analysis.closed_loops == []
+    assert analysis.self_modifying == [(1, 2)]
+
+def test_closed_loop_after_exit_path():
+    ## The branch at 04 repeats itself, which can be avoided, but once entered can't be left
+    analysis = Analysis.of([20010, 41002, 43000, 0, 40003, 0, 0, 0, 0, 0, 5])
+
+    assert analysis.terminates
+    assert analysis.closed_loops == [[4]]
+
+def test_report():
+    report = Analysis.of([20003, 30003, 40000, 1, 0, 11000]).report()
+
+    assert report[0].startswith("never terminates")
+    assert "closed loop at 01-02" in report[1]
+    assert report[-1] == "unreachable: 04-05"
+
+def test_backends_agree():
+    assert analyze_example("Test4.txt", Memory).report() == analyze_example("Test4.txt", ArrayMemory).report()
+
+def test_array_memory_not_shared():
+    memory = ArrayMemory([Opcode("+4300")])
+    Analysis.of(memory)
+    memory.write(0, Opcode("+4000"))
+
+    assert memory.read(0) == Opcode("+4000")
+
+#############
+# Soundness #
+#############
+
+@pytest.mark.parametrize("seed", range(20))
+def test_never_terminates_is_sound(seed):
+    """
+    A program the analysis says can't stop must still be running after many steps, whatever its input.
+    """
+    rng = random.Random(seed)
+    operations = [10, 11, 20, 21, 30, 31, 33, 40, 40, 41, 42, 0]
+    for _ in range(50):
+        words = [rng.choice(operations) * 1000 + rng.randrange(0, 20) for _ in range(20)]
+        if Analysis.of(words).terminates:
+            continue
+
+        memory = Memory([Opcode.from_int(word) for word in words])
+        with pytest.raises(StepLimitExceeded):
+            CPU().run(memory, ScriptedIODevice([rng.randint(-99, 99) for _ in range(500)]), max_steps=1000)
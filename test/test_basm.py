@@ -0,0 +1,135 @@
+import sys
+import os
+import pytest
+from basm import assemble, assemble_file, disassemble, listing, read_file, resolve, AssemblyError
+from src.opcodes import Opcode
+from src.memory import Memory
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "../bml_examples")
+
+## Reads two numbers and writes the larger one
+LARGER = """
+;; Writes the larger of two numbers
+        READ first
+        READ second
+        LOAD first
+        SUBTRACT second
+        BRANCHNEG second_is_larger ; the branch lands one past its target
+        WRITE first
+        HALT
+second_is_larger:
+        HALT
+        WRITE second
+        HALT
+first:  .data 0
+second: .data 0
+"""
+
+##############
+# Assembling #
+##############
+
+def test_instructions():
+    assert assemble("READ 10\nWRITE 10\nHALT") == [10010, 11010, 43000]
+
+def test_labels():
+    words = assemble(LARGER)
+
+    assert words[4] == 41007
+    assert words[0] == 10010 and words[1] == 10011
+    assert len(words) == 12
+
+def test_forward_and_backward_labels():
+    words = assemble("top: LOAD value\nBRANCH top\nvalue: .data 5")
+    assert words == [20002, 40000, 5]
+
+def test_data():
+    assert assemble(".data 1, -2 3\n.data\ntable: .data 7\nLOAD table+0\nLOAD table") == [1, -2, 3, 0, 7, 20004, 20004]
+
+def test_label_offset():
+    assert assemble("LOAD table+2\ntable: .data 1 2 3") == [20003, 1, 2, 3]
+
+def test_raw_words():
+    assert assemble("+1007\n-000005\n0001") == [10007, -5, 1]
+
+@pytest.mark.parametrize("word", ["+12a4", "+0100071", "--10007"])
+def test_invalid_raw_word(word):
+    with pytest.raises(AssemblyError):
+        assemble(word)
+
+def test_case_and_comments():
+    assert assemble("  read 5 ;; comment\n; only a comment\n\nHalt") == [10005, 43000]
+
+def test_address_prefix():
+    assert assemble("00 READ 05\n03 HALT") == [10005, 0, 0, 43000]
+
+def test_nums_example():
+    with open(os.path.join(EXAMPLES, "nums.bml")) as source:
+        assert assemble(source) == [1, 0, 11001, 30000, 21001, 40002]
+
+def test_resolve():
+    symbols = {"table": 10}
+    assert resolve("table", symbols) == 10
+    assert resolve("table+3", symbols) == 13
+    assert resolve("+5", symbols) == 5
+    assert resolve("-5", symbols) == -5
+    assert resolve("nowhere", symbols) is None
+    assert resolve("table+x", symbols) is None
+
+##########
+# Errors #
+##########
+
+def test_every_error_reported():
+    source = "READ nowhere\nBOGUS 1\nx: .data 1\nx: .data 1000000\nLOAD 300\nADD\n2x: HALT"
+    with pytest.raises(AssemblyError) as error:
+        assemble(source, "bad.bml")
+
+    lines = [line for line, _ in error.value.errors]
+    assert lines == [1, 2, 4, 4, 5, 6, 7]
+    assert str(error.value).splitlines()[0] == "bad.bml:1: undefined label or invalid number 'nowhere'"
+
+def test_overlapping_addresses():
+    with pytest.raises(AssemblyError, match="already used by line 1"):
+        assemble("05 READ 10\n05 WRITE 10")
+
+def test_past_end_of_memory():
+    with pytest.raises(AssemblyError, match="past the end of memory"):
+        assemble(f"{Memory.LAST_ADDRESS} .data 1 2")
+
+###################
+# Disassembling   #
+###################
+
+@pytest.mark.parametrize("program", ["Test1.txt", "Test2.txt", "Test3.txt", "Test4.txt"])
+def test_disassembly_round_trip(program):
+    code = read_file(os.path.join(EXAMPLES, program))
+    assert assemble(listing(code)) == [opcode.numeric for opcode in code]
+
+def test_disassemble(tmp_path):
+    output = tmp_path / "a.out.basm"
+    disassemble([Opcode("+1007"), Opcode("+0005")], output)
+
+    assert output.read_text() == "00 READ 007\n01 +000005\n"
+
+#########
+# Files #
+#########
+
+def test_assemble_file_runs(tmp_path):
+    source = tmp_path / "larger.bml"
+    source.write_text(LARGER)
+    program = tmp_path / "larger.txt"
+    assemble_file(source, program)
+
+    outputs = []
+    inputs = iter(["+0004", "+0009"])
+    uvsim = UVSim(reader=lambda: next(inputs), writer=lambda x: outputs.append(x.numeric))
+    uvsim.load(program)
+    uvsim.execute(preview=False)
+
+    assert outputs == [9]
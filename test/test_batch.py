@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import pytest
+from batch import init_worker, run_job, run_batch, jobs_from_directory, jobs_from_manifest
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "../bml_examples")
+
+@pytest.fixture
+def programs(tmp_path):
+    for name in ["Test1.txt", "Test3.txt"]:
+        shutil.copy(os.path.join(EXAMPLES, name), tmp_path / name)
+    (tmp_path / "Test1.in").write_text("+0005\n+0007\n")
+    return tmp_path
+
+########
+# Jobs #
+########
+
+def test_jobs_from_directory(programs):
+    jobs = jobs_from_directory(str(programs))
+
+    assert jobs == [(str(programs / "Test1.txt"), str(programs / "Test1.in")), (str(programs / "Test3.txt"), [])]
+
+def test_jobs_from_manifest(programs):
+    manifest = programs / "manifest.jsonl"
+    manifest.write_text(json.dumps({"program": "Test1.txt", "inputs": [5, "+0007"]}) + "\n\n"
+                        + json.dumps({"program": "Test3.txt", "input": "Test1.in"}) + "\n")
+
+    jobs = jobs_from_manifest(str(manifest))
+
+    assert jobs == [(str(programs / "Test1.txt"), ["5", "+0007"]), (str(programs / "Test3.txt"), str(programs / "Test1.in"))]
+
+def test_manifest_without_program(tmp_path):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(json.dumps({"inputs": []}) + "\n")
+
+    with pytest.raises(ValueError):
+        jobs_from_manifest(str(manifest))
+
+###########
+# Running #
+###########
+
+def test_run_job(programs):
+    result = run_job((str(programs / "Test1.txt"), ["+0005", "+0007"]))
+
+    assert result["outputs"] == [7]
+    assert result["acc"] == 7
+    assert result["steps"] == 7
+    assert result["error"] is None
+
+def test_run_job_reuses_vm(programs):
+    run_job((str(programs / "Test1.txt"), ["+0005", "+0007"]))
+    result = run_job((str(programs / "Test1.txt"), ["+0001", "+0002"]))
+
+    assert result["outputs"] == [2]
+
+def test_run_job_input_exhausted(programs):
+    result = run_job((str(programs / "Test1.txt"), ["+0005"]))
+
+    assert result["error"].startswith("InputExhausted")
+
+def test_run_job_missing_program(programs):
+    result = run_job((str(programs / "Missing.txt"), []))
+
+    assert result["error"].startswith("FileNotFoundError")
+
+def test_run_batch(programs):
+    results = list(run_batch(jobs_from_directory(str(programs)), workers=2))
+
+    assert [result["outputs"] for result in results] == [[7], [13233, 1, 4444, 2222, -7778, -17778]]
+
+def test_run_job_step_limit(tmp_path):
+    (tmp_path / "loop.txt").write_text("+0000\n+4000\n")
+    init_worker(max_steps=100)
+    try:
+        result = run_job((str(tmp_path / "loop.txt"), []))
+    finally:
+        init_worker()
+
+    assert result["error"].startswith("StepLimitExceeded")
+    assert result["steps"] == 100
+    assert result["pc"] == 1
+
+def test_run_batch_timeout(programs):
+    (programs / "loop.txt").write_text("+0000\n+4000\n")
+
+    results = list(run_batch(jobs_from_directory(str(programs)), workers=1, timeout=0.05))
+
+    assert [result["error"] is None for result in results] == [True, True, False]
+    assert results[2]["error"].startswith("DeadlineExceeded")
+
+def test_run_job_rejects_non_terminating(tmp_path):
+    (tmp_path / "loop.txt").write_text("+0000\n+4000\n")
+    init_worker(max_steps=100, analyze=True)
+    try:
+        result = run_job((str(tmp_path / "loop.txt"), []))
+    finally:
+        init_worker()
+
+    assert result["error"].startswith("NonTerminating")
+    assert result["steps"] == 0
+
+def test_run_job_analysis_allows_terminating(programs):
+    init_worker(analyze=True)
+    try:
+        result = run_job((str(programs / "Test3.txt"), []))
+    finally:
+        init_worker()
+
+    assert result["error"] is None
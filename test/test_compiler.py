@@ -0,0 +1,163 @@
+import sys
+import os
+import random
+import pytest
+from src.compiler import BlockCompiler
+from src.cpu import CPU, StepLimitExceeded, DeadlineExceeded
+from src.memory import Memory, ArrayMemory
+from src.io_device import IODevice
+from src.opcodes import Opcode
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+def read_program(filename):
+    with open(os.path.join(os.path.dirname(__file__), "../bml_examples", filename)) as f:
+        return [Opcode(line) for line in f]
+
+def execute(engine, program, inputs=(), backend=Memory, **limits):
+    """
+    Run a program with one of the engines and return everything it could have changed.
+
+    Exceptions are returned instead of raised so both engines can be compared when a program fails.
+    """
+    memory = backend()
+    memory.clear(list(program))
+    memory.predecode()
+    queue = iter(inputs)
+    outputs = []
+    errors = []
+    io_device = IODevice(reader=lambda: next(queue), writer=lambda x: outputs.append(x.numeric), err=errors.append)
+    cpu = CPU()
+
+    try:
+        if engine == "compiled":
+            steps = BlockCompiler().run(cpu, memory, io_device, **limits)
+        else:
+            steps = cpu.run(memory, io_device, **limits)
+        failure = None
+    except Exception as e:
+        steps = getattr(e, "steps", None)
+        failure = type(e)
+
+    return outputs, len(errors), cpu.acc.numeric, cpu.current, cpu.halted, steps, failure, [memory.read(i).numeric for i in Memory.ADDRESSABLE_SPACE]
+
+def assert_engines_agree(program, inputs=(), **limits):
+    assert execute("compiled", program, inputs, **limits) == execute("interpreter", program, inputs, **limits)
+
+###########
+# Leaders #
+###########
+
+def test_leaders():
+    words = [20010, 41005, 11010, 43000, 0, 0]
+    assert BlockCompiler.leaders(words) == {0, 2, 4, 6}
+
+def test_source_compiles():
+    words = [20010, 30011, 21012, 43000]
+    source, length = BlockCompiler.source(words, 0, BlockCompiler.leaders(words))
+
+    assert length == 4
+    compile(source, "<test>", "exec")
+
+###############
+# Equivalence #
+###############
+
+@pytest.mark.parametrize("program", ["Test1.txt", "Test2.txt", "Test3.txt", "Test4.txt"])
+def test_matches_interpreter(program):
+    code = read_program(program)
+    rng = random.Random(program)
+    for _ in range(20):
+        assert_engines_agree(code, [str(rng.randint(-999999, 999999)), str(rng.randint(-999999, 999999))])
+
+@pytest.mark.parametrize("backend", [Memory, ArrayMemory])
+def test_backends(backend):
+    code = read_program("Test1.txt")
+    assert execute("compiled", code, ["+0042", "-0007"], backend) == execute("interpreter", code, ["+0042", "-0007"], backend)
+
+def test_bad_input_retries():
+    code = [Opcode("+1010"), Opcode("+1110"), Opcode("+4300")]
+    assert_engines_agree(code, ["abc", "+1", "+0005"])
+
+def test_overflow():
+    code = [Opcode("+1010"), Opcode("+2010"), Opcode("+3310"), Opcode("+3010"), Opcode("+2111"), Opcode("+1111"), Opcode("+4300")]
+    for value in ["+999999", "-999999", "+123456", "-500000"]:
+        assert_engines_agree(code, [value])
+
+def test_self_modifying_program():
+    code = [Opcode("+2010"), Opcode("+2102"), Opcode("+0000"), Opcode("+1110"),
+            Opcode("+4300"), Opcode("+0000"), Opcode("+0000"), Opcode("+0000"),
+            Opcode("+0000"), Opcode("+0000"), Opcode("+4300")]
+    assert_engines_agree(code)
+
+def test_self_modifying_loop():
+    ## Counts down from 3, rewriting the WRITE at address 5 on every pass
+    code = [Opcode("+2020"), Opcode("+3121"), Opcode("+2120"), Opcode("+2022"), Opcode("+3020"),
+            Opcode("+0000"), Opcode("+2105"), Opcode("+2020"), Opcode("+4110"), Opcode("+4099"),
+            Opcode("+0000"), Opcode("+4300")]
+    code += [Opcode("+0000")] * (20 - len(code))
+    code += [Opcode("+0003"), Opcode("+0001"), Opcode("+1100")]
+    assert_engines_agree(code)
+
+def test_branch_to_halt():
+    assert_engines_agree([Opcode("+4099")])
+
+def test_fall_off_end():
+    assert_engines_agree([Opcode("+4098")])
+
+def test_branch_out_of_range():
+    assert_engines_agree([Opcode("+4250")])
+
+def test_divide_by_zero():
+    assert_engines_agree([Opcode("+2003"), Opcode("+3204"), Opcode("+4300"), Opcode("+0005")])
+
+def test_noops():
+    assert_engines_agree([Opcode("+0000")])
+
+##########
+# Limits #
+##########
+
+def test_step_limit():
+    code = [Opcode("+2003"), Opcode("+4000"), Opcode("+4300"), Opcode("+0001")]
+    assert_engines_agree(code, max_steps=50)
+    assert execute("compiled", code, max_steps=50)[-2] is StepLimitExceeded
+
+def test_within_step_limit():
+    code = [Opcode("+2003"), Opcode("+3003"), Opcode("+4300"), Opcode("+0001")]
+    assert_engines_agree(code, max_steps=3)
+
+def test_deadline():
+    with pytest.raises(DeadlineExceeded):
+        BlockCompiler().run(CPU(), Memory([Opcode("+0000"), Opcode("+4000")]), IODevice(), timeout=0)
+
+#########
+# UVSim #
+#########
+
+def test_uvsim_engine():
+    outputs = []
+    inputs = iter(["+0042", "-0007"])
+    vm = UVSim(reader=lambda: next(inputs), writer=lambda x: outputs.append(x.numeric), engine="compiled")
+    vm.load(os.path.join(os.path.dirname(__file__), "../bml_examples", "Test1.txt"))
+
+    assert vm.execute(preview=False) > 0
+    assert vm.cpu.halted
+    assert outputs == [-7]
+
+def test_uvsim_bad_engine():
+    with pytest.raises(ValueError):
+        UVSim(engine="jit")
+
+def test_cache_reused():
+    compiler = BlockCompiler()
+    memory = Memory([Opcode("+2003"), Opcode("+3003"), Opcode("+4300"), Opcode("+0001")])
+
+    compiler.run(CPU(), memory, IODevice())
+    cached = len(compiler)
+    compiler.run(CPU(), memory, IODevice())
+
+    assert cached > 0
+    assert len(compiler) == cached
@@ -0,0 +1,99 @@
+import sys
+import os
+import pytest
+from src.converter import Converter, ConversionError
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+@pytest.fixture
+def program(tmp_path):
+    filename = tmp_path / "program.txt"
+    filename.write_text("+1007\n1107\n\n-0042\n7\n+4300\n")
+    return filename
+
+CONVERTED = "+010007\n+011007\n-000042\n+000007\n+043000"
+
+#########
+# Words #
+#########
+
+@pytest.mark.parametrize("word, expected", [
+    ("+1007", "+010007"), ("-1007", "-010007"), ("1007", "+010007"),
+    ("+0042", "+000042"), ("42", "+000042"), ("+9999", "+009999"), ("4300\n", "+043000"),
+])
+def test_convert_word(word, expected):
+    assert Converter.convert_word(word) == expected
+
+@pytest.mark.parametrize("word", ["+010007", "+12345", "abcd", ""])
+def test_convert_bad_word(word):
+    with pytest.raises(ConversionError):
+        Converter.convert_word(word)
+
+#########
+# Files #
+#########
+
+def test_convert_file(program):
+    assert Converter.convert_file(program) == (Converter.CONVERTED, 5)
+    assert program.read_text() == CONVERTED
+
+def test_skip_converted(program):
+    Converter.convert_file(program)
+    assert Converter.convert_file(program) == (Converter.SKIPPED, 0)
+    assert program.read_text() == CONVERTED
+
+def test_failure_leaves_file(tmp_path):
+    filename = tmp_path / "bad.txt"
+    filename.write_text("+1007\n+12345\n")
+
+    with pytest.raises(ConversionError, match=":2:"):
+        Converter.convert_file(filename)
+    assert filename.read_text() == "+1007\n+12345\n"
+    assert os.listdir(tmp_path) == ["bad.txt"]
+
+def test_attempt_reports_failure(tmp_path):
+    filename, status, words, error = Converter.attempt(str(tmp_path / "missing.txt"))
+    assert status == Converter.FAILED
+    assert error
+
+def test_converted_file_loads(program):
+    Converter.convert_file(program)
+    uvsim = UVSim()
+    uvsim.load(program)
+
+    assert uvsim.mem.extent == 5
+
+########
+# Tree #
+########
+
+def test_convert_tree(tmp_path):
+    for directory in ["a", "a/b", "c"]:
+        os.makedirs(tmp_path / directory, exist_ok=True)
+        (tmp_path / directory / "program.txt").write_text("+1007\n")
+    (tmp_path / "a" / "notes.md").write_text("not a program")
+    (tmp_path / "c" / "bad.txt").write_text("+123456789\n")
+    (tmp_path / "done.txt").write_text("+010007\n")
+
+    results = list(Converter.convert_tree(tmp_path, workers=2))
+    statuses = {os.path.relpath(filename, tmp_path): status for filename, status, _, _ in results}
+
+    assert statuses == {
+        "done.txt": Converter.SKIPPED,
+        os.path.join("a", "program.txt"): Converter.CONVERTED,
+        os.path.join("a", "b", "program.txt"): Converter.CONVERTED,
+        os.path.join("c", "bad.txt"): Converter.FAILED,
+        os.path.join("c", "program.txt"): Converter.CONVERTED,
+    }
+    assert (tmp_path / "a" / "b" / "program.txt").read_text() == "+010007"
+
+#########
+# UVSim #
+#########
+
+def test_uvsim_convert(program, capsys):
+    UVSim().convert(program)
+    assert program.read_text() == CONVERTED
+    assert "converted successfully" in capsys.readouterr().out
@@ -1,17 +1,17 @@
 import sys
 import os
 import pytest
-from src.cpu import CPU
-from src.memory import Memory
+from src.cpu import CPU, StepLimitExceeded, DeadlineExceeded
+from src.memory import Memory, ArrayMemory
 from src.io_device import IODevice
 from src.opcodes import Opcode
 
 # Ensure the src directory is in the Python path for module imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-@pytest.fixture
-def cpu():
-    return CPU()
+@pytest.fixture(params=CPU.DISPATCH_MODES)
+def cpu(request):
+    return CPU(dispatch=request.param)
 
 @pytest.fixture
 def memory():
@@ -30,6 +30,10 @@ def test_init():
     assert cpu.current == 0
     assert cpu.acc == Opcode("0000")
 
+def test_init_bad_dispatch():
+    with pytest.raises(ValueError):
+        CPU(dispatch="jump")
+
 ####################
 # Current Counter: #
 ####################
@@ -219,3 +223,119 @@ def test_branch(cpu, memory, io_device):
     op = Opcode("4040")
     cpu.process(op, memory, io_device)
     assert cpu.current == 40
+
+############
+# Dispatch #
+############
+
+def run_example(program, dispatch, backend):
+    """
+    Run one of the example programs and return everything it can be observed to have done
+    """
+    memory = backend()
+    with open(os.path.join(os.path.dirname(__file__), "../bml_examples", program)) as f:
+        for line in f:
+            memory.writenext(Opcode(line))
+
+    inputs = iter(["+0042", "-0007"])
+    outputs = []
+    cpu = CPU(dispatch=dispatch)
+    cpu.run(memory, IODevice(reader=lambda: next(inputs), writer=outputs.append))
+    return outputs, cpu.acc, cpu.current, [memory.read(i) for i in Memory.ADDRESSABLE_SPACE]
+
+@pytest.mark.parametrize("program", ["Test1.txt", "Test2.txt", "Test3.txt", "Test4.txt"])
+@pytest.mark.parametrize("dispatch", CPU.DISPATCH_MODES)
+@pytest.mark.parametrize("backend", [Memory, ArrayMemory])
+def test_engines_agree(program, dispatch, backend):
+    assert run_example(program, dispatch, backend) == run_example(program, "match", Memory)
+
+def test_self_modifying_program(cpu, memory):
+    outputs = []
+    io_device = IODevice(writer=outputs.append)
+    memory.clear([Opcode("+2010"), Opcode("+2102"), Opcode("+0000"), Opcode("+1110"),
+                  Opcode("+4300"), Opcode("+0000"), Opcode("+0000"), Opcode("+0000"),
+                  Opcode("+0000"), Opcode("+0000"), Opcode("+4300")])
+    memory.predecode()
+
+    cpu.run(memory, io_device)
+
+    assert cpu.halted
+    assert outputs == []
+
+def test_subtract_underflow(cpu, memory):
+    cpu.acc = Opcode("-999999")
+    memory.write(50, Opcode("+000002"))
+    cpu.subtract(memory, 50)
+    assert cpu.acc == Opcode("-000001")
+
+#######
+# Run #
+#######
+
+def test_run_counts_steps(cpu, memory):
+    memory.clear([Opcode("+2003"), Opcode("+3003"), Opcode("+4300"), Opcode("+0001")])
+    errors = []
+
+    steps = cpu.run(memory, IODevice(err=errors.append))
+
+    assert steps == 3
+    assert errors == []
+
+def test_run_trace(cpu, memory):
+    memory.clear([Opcode("+2003"), Opcode("+3003"), Opcode("+4300"), Opcode("+0001")])
+    errors = []
+
+    cpu.run(memory, IODevice(err=errors.append), trace=2)
+
+    assert len(errors) == 2
+
+def test_reset(cpu, memory):
+    memory.clear([Opcode("+2003"), Opcode("+4300"), Opcode("+0000"), Opcode("+0001")])
+    cpu.run(memory, IODevice())
+
+    cpu.reset()
+
+    assert not cpu.halted
+    assert cpu.current == 0
+    assert cpu.acc == 0
+
+def test_snapshot_restore(cpu):
+    cpu.acc = Opcode("+0042")
+    cpu.current = 7
+    state = cpu.snapshot()
+
+    cpu.reset()
+    cpu.restore(state)
+
+    assert state == (42, 7, False)
+    assert cpu.acc == 42
+    assert cpu.current == 7
+    assert not cpu.halted
+
+##########
+# Limits #
+##########
+
+def test_run_step_limit(cpu, memory):
+    memory.clear([Opcode("+2003"), Opcode("+4000"), Opcode("+4300"), Opcode("+0001")])
+
+    with pytest.raises(StepLimitExceeded) as e:
+        cpu.run(memory, IODevice(), max_steps=50)
+
+    assert e.value.steps == 50
+    assert e.value.current == 1
+    assert e.value.acc == 1
+
+def test_run_within_step_limit(cpu, memory):
+    memory.clear([Opcode("+2003"), Opcode("+3003"), Opcode("+4300"), Opcode("+0001")])
+
+    assert cpu.run(memory, IODevice(), max_steps=3) == 3
+
+def test_run_deadline(cpu, memory):
+    memory.clear([Opcode("+0000"), Opcode("+4000")])
+
+    with pytest.raises(DeadlineExceeded) as e:
+        cpu.run(memory, IODevice(), timeout=0)
+
+    assert e.value.steps == CPU.DEADLINE_CHECK_INTERVAL
+    assert e.value.current == 1
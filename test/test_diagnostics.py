@@ -0,0 +1,100 @@
+import sys
+import os
+import logging
+import pytest
+from src.diagnostics import Diagnostics, diagnostics
+from src.opcodes import Opcode
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+@pytest.fixture
+def messages():
+    return []
+
+@pytest.fixture
+def channel(messages):
+    return Diagnostics(sink=messages.append, limit=3)
+
+@pytest.fixture
+def shared(messages):
+    ## The module-wide channel, pointed at a list for the length of one test
+    sink, limit = diagnostics.sink, diagnostics.limit
+    diagnostics.sink = messages.append
+    diagnostics.limit = 3
+    diagnostics.reset()
+    yield diagnostics
+    diagnostics.sink, diagnostics.limit = sink, limit
+    diagnostics.reset()
+
+##########
+# Report #
+##########
+
+def test_report(channel, messages):
+    channel.warning("overflow", "overflowing %d", 5)
+
+    assert messages == ["overflowing 5"]
+    assert channel.counts == {"overflow": 1}
+
+def test_rate_limit(channel, messages):
+    for value in range(10):
+        channel.warning("overflow", "overflowing %d", value)
+
+    assert len(messages) == 3
+    assert messages[-1].endswith("(further overflow messages suppressed)")
+    assert channel.counts == {"overflow": 10}
+
+def test_limit_per_site(channel, messages):
+    for _ in range(5):
+        channel.warning("overflow", "overflow")
+        channel.warning("input", "input")
+
+    assert messages.count("overflow") + messages.count("input") == 4
+    assert channel.counts == {"overflow": 5, "input": 5}
+
+def test_level(channel, messages):
+    channel.report("trace", Diagnostics.DEBUG, "step %d", 1)
+
+    assert messages == []
+    assert channel.counts == {"trace": 1}
+
+def test_no_limit(messages):
+    channel = Diagnostics(sink=messages.append, limit=None)
+    for _ in range(20):
+        channel.warning("overflow", "overflow")
+
+    assert len(messages) == 20
+
+def test_logger(caplog):
+    channel = Diagnostics()
+    with caplog.at_level(logging.WARNING, logger="uvsim"):
+        channel.warning("overflow", "overflowing %d", 7)
+
+    assert "overflowing 7" in caplog.text
+
+def test_summary(channel):
+    channel.warning("overflow", "overflow")
+    channel.warning("overflow", "overflow")
+    channel.warning("input", "input")
+
+    assert channel.summary() == ["input: 1", "overflow: 2"]
+
+    channel.reset()
+    assert channel.summary() == []
+
+##########
+# Opcode #
+##########
+
+def test_overflow_reported(shared, messages):
+    for _ in range(5):
+        Opcode("+999999") + Opcode("+000002")
+
+    assert shared.counts == {"overflow": 5}
+    assert messages[0] == "warning: overflowing +1000001 to +000001"
+    assert len(messages) == 3
+
+def test_operand_is_quiet(shared, capsys):
+    assert Opcode("+1007").operand == "007"
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,149 @@
+import sys
+import os
+import struct
+import zlib
+import pytest
+from array import array
+from src.image import ProgramImage, ImageError
+from src.memory import Memory, ArrayMemory
+from src.opcodes import Opcode
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "../bml_examples")
+
+@pytest.fixture
+def image():
+    return ProgramImage.from_text(os.path.join(EXAMPLES, "Test1.txt"))
+
+@pytest.fixture
+def saved(image, tmp_path):
+    filename = tmp_path / "test1.bmi"
+    image.save(filename)
+    return filename
+
+##########
+# Format #
+##########
+
+def test_from_text(image):
+    assert image.extent == 10
+    assert list(image.words[:3]) == [10007, 10008, 20007]
+    assert len(image.words) == Memory.ADDRESSABLE_SPACE.stop
+
+def test_layout(image):
+    data = image.to_bytes()
+    magic, version, extent, section_bytes, _ = ProgramImage.HEADER.unpack_from(data)
+
+    assert (magic, version, extent, section_bytes) == (b"UVSM", 1, 10, 0)
+    assert len(data) == ProgramImage.HEADER.size + 4 * 250
+    assert struct.unpack_from("<i", data, ProgramImage.HEADER.size)[0] == 10007
+
+def test_round_trip(image):
+    image.words[200] = -999999
+    copy = ProgramImage.from_bytes(image.to_bytes())
+
+    assert copy.words == image.words
+    assert copy.extent == image.extent
+
+def test_sections(image):
+    image.symbols = {"first": 7, "second": 8}
+    image.debug = {0: 3, 1: 4}
+    copy = ProgramImage.from_bytes(image.to_bytes())
+
+    assert copy.symbols == {"first": 7, "second": 8}
+    assert copy.debug == {0: 3, 1: 4}
+
+def test_unknown_section_skipped(image):
+    data = bytearray(image.to_bytes())
+    data += ProgramImage.SECTION.pack(b"XTRA", 3) + b"abc"
+    body = bytes(data[ProgramImage.HEADER.size:])
+    ProgramImage.HEADER.pack_into(data, 0, b"UVSM", 1, image.extent, ProgramImage.SECTION.size + 3, zlib.crc32(body))
+
+    assert ProgramImage.from_bytes(bytes(data)).words == image.words
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_load(saved, image, use_mmap):
+    assert ProgramImage.load(saved, use_mmap).words == image.words
+
+##########
+# Errors #
+##########
+
+def test_bad_magic(image):
+    data = bytearray(image.to_bytes())
+    data[:4] = b"NOPE"
+    with pytest.raises(ImageError, match="not a program image"):
+        ProgramImage.from_bytes(bytes(data))
+
+def test_bad_version(image):
+    data = bytearray(image.to_bytes())
+    struct.pack_into("<H", data, 4, 99)
+    with pytest.raises(ImageError, match="version 99"):
+        ProgramImage.from_bytes(bytes(data))
+
+def test_corrupt(image):
+    data = bytearray(image.to_bytes())
+    data[ProgramImage.HEADER.size] ^= 0xff
+    with pytest.raises(ImageError, match="corrupt"):
+        ProgramImage.from_bytes(bytes(data))
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_truncated(image, tmp_path, use_mmap):
+    filename = tmp_path / "short.bmi"
+    filename.write_bytes(image.to_bytes()[:-10])
+    with pytest.raises(ImageError):
+        ProgramImage.load(filename, use_mmap)
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_empty(tmp_path, use_mmap):
+    filename = tmp_path / "empty.bmi"
+    filename.write_bytes(b"")
+    with pytest.raises(ImageError):
+        ProgramImage.load(filename, use_mmap)
+
+def test_word_too_large():
+    words = array('i', bytes(4 * 250))
+    words[0] = 1000000
+    with pytest.raises(ImageError, match="six digits"):
+        ProgramImage.from_bytes(ProgramImage(words, 1).to_bytes())
+
+#########
+# UVSim #
+#########
+
+@pytest.mark.parametrize("backend", [Memory, ArrayMemory])
+def test_uvsim_load_image(saved, backend):
+    outputs = []
+    inputs = iter(["+0042", "-0007"])
+    uvsim = UVSim(reader=lambda: next(inputs), writer=lambda x: outputs.append(x.numeric), memory=backend())
+    uvsim.load_image(saved)
+    uvsim.execute(preview=False)
+
+    assert uvsim.mem.extent == 10
+    assert outputs == [-7]
+
+def test_uvsim_load_by_extension(saved):
+    uvsim = UVSim()
+    uvsim.load(saved)
+    assert uvsim.mem.read(0) == Opcode("+1007")
+
+def test_uvsim_save_image(tmp_path):
+    uvsim = UVSim(memory=ArrayMemory())
+    uvsim.load(os.path.join(EXAMPLES, "Test2.txt"))
+    uvsim.save_image(tmp_path / "test2.bmi", symbols={"start": 0})
+
+    copy = UVSim()
+    image = copy.load_image(tmp_path / "test2.bmi")
+
+    assert image.symbols == {"start": 0}
+    assert [copy.mem.read(i) for i in range(copy.mem.extent)] == [uvsim.mem.read(i) for i in range(uvsim.mem.extent)]
+
+def test_image_to_text(saved, tmp_path):
+    ProgramImage.load(saved).to_text(tmp_path / "test1.txt")
+
+    uvsim = UVSim()
+    uvsim.load(tmp_path / "test1.txt")
+    assert uvsim.mem.extent == 10
@@ -1,10 +1,13 @@
 import sys
 import os
+import io
+import threading
 import pytest
 from src.cpu import CPU
 from src.memory import Memory
-from src.io_device import IODevice
-#from src.opcodes import Opcode
+from src.io_device import IODevice, StreamIODevice, ScriptedIODevice, InputExhausted
+from src.opcodes import Opcode
+from uvsim import UVSim
 
 # Ensure the src directory is in the Python path for module imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
@@ -44,3 +47,167 @@ def test_err(io_device):
     #assert io_device.last_err == "1234"
     
     
+
+############
+# Snapshot #
+############
+def test_snapshot_restore():
+    io_device = IODevice(reader=lambda: "+0001", writer=lambda x: None, err=lambda x: None)
+    io_device.read()
+    state = io_device.snapshot()
+
+    io_device.last_read = "+0002"
+    io_device.restore(state)
+
+    assert io_device.last_read == "+0001"
+
+#############
+# Streaming #
+#############
+def test_stream_read():
+    device = StreamIODevice(["+0001\n", "\n", "  -0002 \n"], io.StringIO())
+
+    assert device.read() == "+0001"
+    assert device.read() == "-0002"
+    with pytest.raises(EOFError):
+        device.read()
+
+def test_stream_read_bytes():
+    device = StreamIODevice(io.BytesIO(b"+0001\n"), io.StringIO())
+    assert device.read() == "+0001"
+
+def test_stream_buffers_until_threshold():
+    sink = io.StringIO()
+    device = StreamIODevice([], sink, threshold=3)
+
+    device.write(Opcode("+0001"))
+    device.write(Opcode("-0002"))
+    assert sink.getvalue() == ""
+    assert device.pending == 2
+
+    device.write(Opcode("+0003"))
+    assert sink.getvalue() == "+000001\n-000002\n+000003\n"
+    assert device.pending == 0
+
+def test_stream_binary_sink():
+    sink = io.BytesIO()
+    device = StreamIODevice([], sink)
+
+    device.write(Opcode("+0042"))
+    device.flush()
+
+    assert sink.getvalue() == b"+000042\n"
+
+def test_stream_errors(capsys):
+    errors = []
+    device = StreamIODevice([], io.StringIO(), err=errors.append)
+    device.err("oops")
+
+    assert errors == ["oops"]
+    assert capsys.readouterr().out == ""
+
+@pytest.mark.parametrize("engine", UVSim.ENGINES)
+def test_stream_flushes_on_halt(engine):
+    sink = io.StringIO()
+    uvsim = UVSim(io_device=StreamIODevice(["+0007", "+0005"], sink), engine=engine)
+    uvsim.load(os.path.join(os.path.dirname(__file__), "../bml_examples", "Test2.txt"))
+    uvsim.execute(preview=False)
+
+    assert sink.getvalue() == "+000007\n"
+
+def test_stream_flushes_on_failure():
+    sink = io.StringIO()
+    uvsim = UVSim(io_device=StreamIODevice([], sink))
+    uvsim.mem.clear([Opcode("+1103"), Opcode("+1000"), Opcode("+4300"), Opcode("+0042")])
+    uvsim.mem.predecode()
+
+    with pytest.raises(EOFError):
+        uvsim.execute(preview=False)
+    assert sink.getvalue() == "+000042\n"
+
+############
+# Scripted #
+############
+def run_scripted(device, program, engine="interpreter"):
+    uvsim = UVSim(io_device=device, engine=engine)
+    uvsim.mem.clear([Opcode(word) for word in program])
+    uvsim.mem.predecode()
+    steps = uvsim.execute(preview=False)
+    return uvsim, steps
+
+def test_scripted_inputs():
+    device = ScriptedIODevice(["+0001", 2, Opcode("-0003")])
+
+    assert device.read() == "+0001"
+    assert device.read() == 2
+    assert device.read() == -3
+    assert device.last_read == -3
+
+def test_scripted_outputs():
+    device = ScriptedIODevice()
+    device.write(Opcode("+0042"))
+    device.write(Opcode("-0007"))
+
+    assert device.outputs == [42, -7]
+
+def test_scripted_errors_collected(capsys):
+    device = ScriptedIODevice(["abc", "+0005"])
+    run_scripted(device, ["+1010", "+1110", "+4300"])
+
+    assert device.outputs == [5]
+    assert len(device.errors) == 1
+    assert capsys.readouterr().out == ""
+
+def test_scripted_bad_behaviour():
+    with pytest.raises(ValueError):
+        ScriptedIODevice(on_exhausted="ignore")
+
+@pytest.mark.parametrize("engine", UVSim.ENGINES)
+def test_exhausted_raise(engine):
+    device = ScriptedIODevice(["+0005"])
+    with pytest.raises(InputExhausted):
+        run_scripted(device, ["+1010", "+1110", "+1010", "+4300"], engine)
+
+    assert device.outputs == [5]
+
+@pytest.mark.parametrize("engine", UVSim.ENGINES)
+def test_exhausted_halt(engine):
+    device = ScriptedIODevice(["+0005"], on_exhausted="halt")
+    uvsim, steps = run_scripted(device, ["+1010", "+1110", "+2010", "+1010", "+1110", "+4300"], engine)
+
+    assert device.outputs == [5]
+    assert uvsim.cpu.halted
+    assert uvsim.cpu.current == 1
+    assert uvsim.cpu.acc.numeric == 5
+    assert steps == 4
+
+def test_exhausted_block():
+    device = ScriptedIODevice(["+0005"], on_exhausted="block")
+    uvsim = UVSim(io_device=device)
+    uvsim.mem.clear([Opcode(word) for word in ["+1010", "+1010", "+1110", "+4300"]])
+    uvsim.mem.predecode()
+
+    runner = threading.Thread(target=uvsim.execute, kwargs={"preview": False})
+    runner.start()
+    runner.join(0.05)
+    assert runner.is_alive()
+
+    device.provide("+0009")
+    runner.join(1)
+    assert not runner.is_alive()
+    assert device.outputs == [9]
+
+def test_exhausted_block_closed():
+    device = ScriptedIODevice(on_exhausted="block")
+    device.close()
+
+    with pytest.raises(InputExhausted):
+        device.read()
+
+def test_scripted_reset():
+    device = ScriptedIODevice(["+0001"])
+    device.write(Opcode("+0001"))
+    device.reset(["+0002"])
+
+    assert device.outputs == []
+    assert device.read() == "+0002"
@@ -0,0 +1,149 @@
+import sys
+import os
+import pytest
+from src.cpu import CPU
+from src.journal import Journal
+from src.memory import Memory, ArrayMemory
+from src.io_device import IODevice
+from src.opcodes import Opcode
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+## Reads a word, doubles it, stores it, writes it and halts
+PROGRAM = [Opcode("+1010"), Opcode("+2010"), Opcode("+3010"), Opcode("+2111"), Opcode("+1111"), Opcode("+4300")]
+
+@pytest.fixture(params=[Memory, ArrayMemory])
+def memory(request):
+    memory = request.param()
+    memory.clear(list(PROGRAM))
+    return memory
+
+@pytest.fixture
+def io_device():
+    return IODevice(reader=lambda: "+0021", writer=lambda x: None, err=lambda x: None)
+
+def state(cpu, memory):
+    return cpu.snapshot(), [memory.read(i).numeric for i in Memory.ADDRESSABLE_SPACE]
+
+##########
+# Record #
+##########
+
+def test_init():
+    journal = Journal(8)
+    assert journal.depth == 8
+    assert len(journal) == 0
+
+def test_init_bad_depth():
+    with pytest.raises(ValueError):
+        Journal(0)
+
+def test_disabled_by_default():
+    assert CPU().journal is None
+
+def test_records_every_step(memory, io_device):
+    cpu = CPU()
+    cpu.journal = Journal()
+    cpu.run(memory, io_device)
+
+    assert len(cpu.journal) == len(PROGRAM)
+
+########
+# Undo #
+########
+
+@pytest.mark.parametrize("dispatch", CPU.DISPATCH_MODES)
+def test_undo_to_start(memory, io_device, dispatch):
+    cpu = CPU(dispatch=dispatch)
+    cpu.journal = Journal()
+    initial = state(cpu, memory)
+
+    cpu.run(memory, io_device)
+    assert cpu.halted
+    assert memory.read(11) == 42
+
+    while cpu.journal.undo(cpu, memory):
+        pass
+
+    assert state(cpu, memory) == initial
+
+def test_undo_one_step(memory, io_device):
+    cpu = CPU()
+    cpu.journal = Journal()
+    for _ in range(3):
+        cpu.step(memory, io_device)
+    before = state(cpu, memory)
+
+    cpu.step(memory, io_device)
+    cpu.journal.undo(cpu, memory)
+
+    assert state(cpu, memory) == before
+
+def test_undo_write_past_extent(memory, io_device):
+    cpu = CPU()
+    cpu.journal = Journal()
+    before = memory.snapshot()[1], dict(memory.mem)
+
+    cpu.run(memory, io_device)
+    assert memory.extent == 12
+    cpu.journal.rewind(cpu, memory)
+
+    assert (memory.extent, memory.mem) == before
+    assert not memory.is_written(10)
+
+def test_undo_write_into_gap(io_device):
+    memory = Memory()
+    memory.write(0, Opcode("+2101"))
+    memory.write(5, Opcode("+4300"))
+    cpu = CPU()
+    cpu.journal = Journal()
+
+    cpu.step(memory, io_device)
+    assert memory.is_written(1)
+    cpu.journal.undo(cpu, memory)
+
+    assert not memory.is_written(1)
+    assert len(memory) == 2 and memory.extent == 6
+
+def test_undo_empty(memory):
+    cpu = CPU()
+    assert not Journal().undo(cpu, memory)
+
+def test_ring_buffer_wraps(io_device):
+    memory = Memory([Opcode("+2003"), Opcode("+3003"), Opcode("+4001"), Opcode("+0001")])
+    cpu = CPU()
+    cpu.journal = Journal(4)
+    for _ in range(10):
+        cpu.step(memory, io_device)
+    after = state(cpu, memory)
+
+    assert len(cpu.journal) == 4
+    assert cpu.journal.rewind(cpu, memory) == 4
+    assert not cpu.journal.undo(cpu, memory)
+
+    for _ in range(4):
+        cpu.step(memory, io_device)
+    assert state(cpu, memory) == after
+
+##########
+# Rewind #
+##########
+
+def test_rewind_to_breakpoint(memory, io_device):
+    cpu = CPU()
+    cpu.journal = Journal()
+    cpu.run(memory, io_device)
+
+    assert cpu.journal.rewind(cpu, memory, breakpoints={2}) == 4
+    assert cpu.current == 2
+    assert cpu.acc == 21
+    assert memory.read(11) == 0
+
+def test_rewind_limit(memory, io_device):
+    cpu = CPU()
+    cpu.journal = Journal()
+    cpu.run(memory, io_device)
+
+    assert cpu.journal.rewind(cpu, memory, limit=2) == 2
+    assert len(cpu.journal) == len(PROGRAM) - 2
@@ -0,0 +1,131 @@
+import sys
+import os
+import random
+import pytest
+from src.cpu import CPU
+from src.memory import Memory, ArrayMemory
+from src.io_device import IODevice
+from src.opcodes import Opcode
+
+np = pytest.importorskip("numpy")
+from src.lockstep import LockstepVM
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+def read_program(filename):
+    with open(os.path.join(os.path.dirname(__file__), "../bml_examples", filename)) as f:
+        return [Opcode(line) for line in f]
+
+def interpret(program, inputs):
+    """
+    Run a program on the regular CPU and return its outputs, accumulator, counter and memory
+    """
+    memory = Memory(program)
+    queue = iter(inputs)
+    outputs = []
+    cpu = CPU()
+    cpu.run(memory, IODevice(reader=lambda: next(queue), writer=lambda x: outputs.append(x.numeric)))
+
+    return outputs, cpu.acc.numeric, cpu.current, [memory.read(i).numeric for i in Memory.ADDRESSABLE_SPACE]
+
+##################
+# Initialization #
+##################
+
+def test_init():
+    vm = LockstepVM([Opcode("+4300")], 3)
+    assert vm.memory.shape == (3, Memory.ADDRESSABLE_SPACE.stop)
+    assert list(vm.memory[:, 0]) == [43000, 43000, 43000]
+
+@pytest.mark.parametrize("backend", [Memory, ArrayMemory])
+def test_init_from_sparse_memory(backend):
+    memory = backend()
+    for address in [0, 1, 5]:
+        memory.write(address, Opcode.from_int(address + 1))
+
+    vm = LockstepVM(memory, 2)
+    assert list(vm.memory[1, :7]) == [1, 2, 0, 0, 0, 6, 0]
+
+def test_init_too_long():
+    with pytest.raises(IndexError):
+        LockstepVM([0] * (Memory.ADDRESSABLE_SPACE.stop + 1), 1)
+
+def test_bad_input_count():
+    vm = LockstepVM([Opcode("+4300")], 2)
+    with pytest.raises(ValueError):
+        vm.run([[1]])
+
+###############
+# Equivalence #
+###############
+
+@pytest.mark.parametrize("program", ["Test1.txt", "Test2.txt", "Test3.txt", "Test4.txt"])
+def test_matches_cpu(program):
+    code = read_program(program)
+    rng = random.Random(program)
+    inputs = [[rng.randint(-999999, 999999), rng.randint(-999999, 999999)] for _ in range(50)]
+    inputs += [[0, 0], [5, 5], [-1, 1], [999999, -999999]]
+
+    result = LockstepVM(code, len(inputs)).run(inputs)
+
+    for lane, values in enumerate(inputs):
+        outputs, acc, pc, memory = interpret(code, values)
+        assert result.status[lane] == LockstepVM.HALTED
+        assert list(result.outputs[lane]) == outputs
+        assert result.acc[lane] == acc
+        assert result.pc[lane] == pc
+        assert list(result.memory[lane]) == memory
+
+def test_overflow_matches_cpu():
+    code = [Opcode("+1010"), Opcode("+2010"), Opcode("+3310"), Opcode("+3010"), Opcode("+2111"), Opcode("+1111"), Opcode("+4300")]
+    inputs = [[999999], [-999999], [123456], [-500000]]
+
+    result = LockstepVM(code, len(inputs)).run(inputs)
+
+    for lane, values in enumerate(inputs):
+        outputs, acc, pc, memory = interpret(code, values)
+        assert list(result.outputs[lane]) == outputs
+        assert result.acc[lane] == acc
+
+##############
+# Divergence #
+##############
+
+def test_divergent_branches():
+    ## READ 10, LOAD 10, BRANCHNEG 05 -> 06, WRITE 10, HALT, (5), WRITE 10, WRITE 10, HALT
+    code = [Opcode("+1010"), Opcode("+2010"), Opcode("+4105"), Opcode("+1110"), Opcode("+4300"),
+            Opcode("+0000"), Opcode("+1110"), Opcode("+1110"), Opcode("+4300")]
+
+    result = LockstepVM(code, 2).run([[7], [-7]])
+
+    assert list(result.outputs[0]) == [7]
+    assert list(result.outputs[1]) == [-7, -7]
+    assert list(result.status) == [LockstepVM.HALTED, LockstepVM.HALTED]
+
+############
+# Failures #
+############
+
+def test_input_exhausted():
+    result = LockstepVM([Opcode("+1010"), Opcode("+1011"), Opcode("+4300")], 2).run([[1, 2], [1]])
+
+    assert list(result.status) == [LockstepVM.HALTED, LockstepVM.INPUT_EXHAUSTED]
+    assert result.pc[1] == 1
+
+def test_divide_by_zero():
+    result = LockstepVM([Opcode("+1010"), Opcode("+3210"), Opcode("+4300")], 2).run([[2], [0]])
+
+    assert list(result.status) == [LockstepVM.HALTED, LockstepVM.DIVIDE_BY_ZERO]
+
+def test_bad_address():
+    result = LockstepVM([Opcode("+020260")], 1).run()
+
+    assert result.status[0] == LockstepVM.BAD_ADDRESS
+    assert result.steps[0] == 0
+
+def test_step_limit():
+    result = LockstepVM([Opcode("+0000"), Opcode("+4000")], 4).run(max_steps=10)
+
+    assert list(result.status) == [LockstepVM.STEP_LIMIT] * 4
+    assert list(result.steps) == [10] * 4
@@ -1,8 +1,9 @@
 import sys
 import os
+import threading
 import pytest
 from src.cpu import CPU
-from src.memory import Memory
+from src.memory import Memory, ArrayMemory
 from src.io_device import IODevice
 from src.opcodes import Opcode
 
@@ -122,6 +123,34 @@ def test_writenext():
     assert memory.read(3) == 1112
 
 
+#########
+# Fetch #
+#########
+def test_fetch():
+    memory = Memory([Opcode("+2007"), Opcode("-1109")])
+
+    assert memory.fetch(0) == (20, 7)
+    assert memory.fetch(1) == (11, 9)
+    assert memory.fetch(2) == (0, 0)
+
+def test_fetch_after_write():
+    memory = Memory([Opcode("+2007")])
+    memory.predecode()
+    memory.write(0, Opcode("+4300"))
+
+    assert memory.fetch(0) == (43, 0)
+
+def test_fetch_after_clear():
+    memory = Memory([Opcode("+2007")])
+    memory.predecode()
+    memory.clear([Opcode("+1009")])
+
+    assert memory.fetch(0) == (10, 9)
+
+def test_fetch_out_of_range():
+    with pytest.raises(IndexError):
+        Memory().fetch(250)
+
 ########################
 # Addressing & Slicing #
 ########################
@@ -253,3 +282,177 @@ def test_memory_iteration():
  #################################
  # New Six Digit Opcode Behavior #
  #################################
+
+################
+# Array Memory #
+################
+
+@pytest.fixture(params=[Memory, ArrayMemory])
+def backend(request):
+    return request.param
+
+def test_backend_read_write(backend):
+    memory = backend([Opcode("+1007"), Opcode("-0001")])
+    memory.write(100, 1234)
+    memory.write(101, Opcode("+4300"))
+
+    assert memory.read(0) == Opcode("+1007")
+    assert memory.read(1) == -1
+    assert memory[100] == 1234
+    assert memory[101] == Opcode("+4300")
+    assert memory.read(42) == Opcode("+0000")
+
+def test_backend_out_of_range(backend):
+    memory = backend()
+    with pytest.raises(IndexError):
+        memory.write(250, 0)
+    with pytest.raises(IndexError):
+        memory.read(-1)
+
+def test_backend_writenext(backend):
+    memory = backend()
+    memory.write(5, 1)
+    memory.write(2, 2)
+    memory.writenext(3)
+
+    assert memory.read(6) == 3
+
+def test_backend_extent(backend):
+    memory = backend([Opcode("+1007"), Opcode("+4300")])
+    assert memory.extent == 2
+
+    memory.write(50, 1)
+    assert memory.extent == 51
+
+    memory.clear()
+    assert memory.extent == 0
+
+def test_backend_writenext_full(backend):
+    memory = backend()
+    memory.write(Memory.LAST_ADDRESS, 1)
+    with pytest.raises(IndexError):
+        memory.writenext(2)
+
+def test_backend_preview(backend):
+    memory = backend([Opcode("+0000"), Opcode("+0001"), Opcode("+0002"), Opcode("+0003"), Opcode("+0004")])
+
+    assert memory.preview(2, 5) == { 0: Opcode("+0000"), 1: Opcode("+0001"), 2: Opcode("+0002"), 3: Opcode("+0003"), 4: Opcode("+0004")}
+
+def test_backend_clear(backend):
+    memory = backend([Opcode("+0001")])
+    memory.clear([Opcode("+0002"), Opcode("+0003")])
+
+    assert memory.mem == {0: Opcode("+0002"), 1: Opcode("+0003")}
+
+    memory.clear()
+    assert len(memory) == 0
+    assert memory.read(0) == 0
+
+    with pytest.raises(TypeError):
+        memory.clear([1])
+
+def test_backend_fetch(backend):
+    memory = backend([Opcode("+2007")])
+    memory.predecode()
+    memory.write(0, Opcode("-4300"))
+
+    assert memory.fetch(0) == (43, 0)
+
+def test_backend_tracker(backend):
+    memory = backend([Opcode("+1007"), Opcode("+4300")])
+    tracker = memory.subscribe()
+
+    memory.write(5, 1)
+    memory.writenext(2)
+    memory.write(5, 3)
+
+    assert tracker.drain() == [5, 6]
+    assert tracker.drain() == []
+
+def test_backend_tracker_concurrent_drain(backend):
+    memory = backend()
+    tracker = memory.subscribe()
+    seen = set()
+
+    def writer():
+        for _ in range(20):
+            for address in Memory.ADDRESSABLE_SPACE:
+                memory.write(address, address)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while thread.is_alive():
+        seen.update(tracker.drain())
+    thread.join()
+    seen.update(tracker.drain())
+
+    assert seen == set(Memory.ADDRESSABLE_SPACE)
+
+def test_backend_tracker_clear(backend):
+    memory = backend([Opcode("+1007"), Opcode("+4300"), Opcode("+0000")])
+    tracker = memory.subscribe()
+
+    memory.clear([Opcode("+0001")])
+
+    assert tracker.drain() == [0, 1, 2]
+
+def test_backend_unsubscribe(backend):
+    memory = backend()
+    first = memory.subscribe()
+    second = memory.subscribe()
+    memory.write(1, 1)
+    memory.unsubscribe(first)
+    memory.write(2, 2)
+
+    assert first.drain() == [1]
+    assert second.drain() == [1, 2]
+
+def test_backend_snapshot_restore(backend):
+    memory = backend([Opcode("+1007"), Opcode("+4300")])
+    words, extent = memory.snapshot()
+
+    memory.write(0, 5)
+    memory.write(60, 6)
+    memory.restore(words, extent)
+
+    assert memory.read(0) == Opcode("+1007")
+    assert memory.read(60) == 0
+    assert memory.extent == 2
+    assert memory.fetch(1) == (43, 0)
+
+def test_backend_snapshot_unchanged_by_writes(backend):
+    memory = backend([Opcode("+1007")])
+    words, extent = memory.snapshot()
+    memory.write(0, 5)
+
+    assert words[0] == 10007
+
+def test_backend_fork(backend):
+    memory = backend([Opcode("+1007"), Opcode("+4300")])
+    fork = memory.fork()
+
+    fork.write(0, 1)
+    memory.write(1, 2)
+
+    assert type(fork) is backend
+    assert memory.read(0) == Opcode("+1007")
+    assert fork.read(0) == 1
+    assert fork.read(1) == Opcode("+4300")
+
+def test_array_memory_forks_share_words():
+    memory = ArrayMemory([Opcode("+1007"), Opcode("+4300")])
+    forks = [memory.fork() for _ in range(3)]
+
+    assert all(fork.words is memory.words for fork in forks)
+
+    forks[0].write(5, 5)
+
+    assert forks[0].words is not memory.words
+    assert forks[1].words is memory.words
+    assert memory.read(5) == 0
+
+def test_array_memory_words():
+    memory = ArrayMemory([Opcode("+1007"), Opcode("-000001")])
+
+    assert list(memory.words[:3]) == [10007, -1, 0]
+    assert len(memory) == 2
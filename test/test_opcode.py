@@ -61,6 +61,34 @@ def test_init_with_too_small():
     with pytest.raises(ValueError):
         Opcode("+123")
 
+def test_init_with_int():
+    op = Opcode(-1234)
+    assert str(op) == "-001234"
+
+def test_init_with_int_too_large():
+    with pytest.raises(ValueError):
+        Opcode(1000000)
+
+#############
+# Interning #
+#############
+
+def test_from_int_shares_small_words():
+    assert Opcode.from_int(0) is Opcode.from_int(0)
+    assert Opcode.from_int(43000) is Opcode.from_int(43000)
+
+def test_from_int_equals_parsed():
+    assert Opcode.from_int(10007) == Opcode("+1007")
+    assert str(Opcode.from_int(-7)) == "-000007"
+
+def test_from_int_out_of_range():
+    with pytest.raises(ValueError):
+        Opcode.from_int(-1000000)
+
+def test_no_instance_dict():
+    with pytest.raises(AttributeError):
+        Opcode("+0000").__dict__
+
 #########
 # Name: #
 #########
@@ -241,6 +269,11 @@ def test_underflow_product_4digit():
 
     assert result == Opcode("-999998")
 
+def test_overflow_truncate():
+    assert Opcode.truncate(1000001) == 1
+    assert Opcode.truncate(-1999998) == -999998
+    assert Opcode.truncate(42) == 42
+
 ##################
 # Human Readable #
 ##################
@@ -259,6 +292,13 @@ def test_unamed_opcode_4digit():
     assert op1.human_friendly == "NOOP"
     assert op2.human_friendly == "NOOP"
 
+def test_operation_codes():
+    for operation, name in Opcode.OPERATIONS.items():
+        assert getattr(Opcode, name) == operation
+        assert Opcode.from_int(operation * 1000 + 5).name == name
+
+    assert Opcode.BRANCHES | Opcode.MEMORY_OPERATIONS | {Opcode.HALT} == set(Opcode.OPERATIONS)
+
 #################################
 # New Six Digit Opcode Behavior #
 #################################
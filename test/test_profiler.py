@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+import pytest
+from src.cpu import CPU
+from src.profiler import Profiler
+from src.memory import Memory
+from src.io_device import IODevice
+from src.opcodes import Opcode
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+## Counts down from 3 to 0, writing each value
+COUNTDOWN = [Opcode("+2010"), Opcode("+1110"), Opcode("+3111"), Opcode("+2110"), Opcode("+4207"),
+             Opcode("+4000"), Opcode("+0000"), Opcode("+0000"), Opcode("+4300"), Opcode("+0000"),
+             Opcode("+0003"), Opcode("+0001")]
+
+@pytest.fixture(params=CPU.DISPATCH_MODES)
+def profiled(request):
+    cpu = CPU(dispatch=request.param)
+    cpu.profiler = Profiler()
+    memory = Memory(list(COUNTDOWN))
+    cpu.run(memory, IODevice(writer=lambda x: None))
+    return cpu.profiler
+
+############
+# Counters #
+############
+
+def test_disabled_by_default():
+    assert CPU().profiler is None
+
+def test_executions(profiled):
+    assert profiled.executions[0] == 1
+    assert profiled.executions[1] == 3
+    assert profiled.executions[4] == 3
+    assert profiled.executions[5] == 2
+    assert profiled.executions[8] == 1
+    assert profiled.total == 1 + 3 * 4 + 2 + 1
+
+def test_operations(profiled):
+    assert profiled.operations[11] == 3
+    assert profiled.operations[43] == 1
+
+def test_branches(profiled):
+    assert profiled.taken[4] == 1
+    assert profiled.not_taken[4] == 2
+    assert profiled.taken[5] == 0
+
+def test_memory_counts(profiled):
+    assert profiled.reads[10] == 1 + 3
+    assert profiled.writes[10] == 3
+    assert profiled.reads[11] == 3
+
+def test_hot_spots(profiled):
+    assert profiled.hot_spots(2) == [(1, 3), (2, 3)]
+
+def test_clear(profiled):
+    profiled.clear()
+    assert profiled.total == 0
+
+##########
+# Export #
+##########
+
+def test_to_json(profiled):
+    report = json.loads(json.dumps(profiled.to_json()))
+
+    assert report["total"] == profiled.total
+    assert report["executions"]["1"] == 3
+    assert "9" not in report["executions"]
+    assert report["operations"]["WRITE"] == 3
+    assert report["branches"]["4"] == {"taken": 1, "not_taken": 2}
+    assert report["writes"] == {"10": 3}
+
+def test_save(profiled, tmp_path):
+    filename = tmp_path / "profile.json"
+    profiled.save(filename)
+
+    with open(filename) as report:
+        assert json.load(report)["total"] == profiled.total
+
+def test_listing(profiled):
+    lines = profiled.listing(COUNTDOWN)
+
+    assert len(lines) == len(COUNTDOWN)
+    assert lines[4].startswith("04 BRANCHZERO 007")
+    assert "taken 1, not taken 2" in lines[4]
+    assert lines[6] == "06 +000000"
+    assert lines[10].startswith("10 +000003")
+    assert "3 writes" in lines[10]
+
+def test_uvsim_compiled_engine_still_profiles():
+    uvsim = UVSim(writer=lambda x: None, engine="compiled")
+    uvsim.mem.clear(list(COUNTDOWN))
+    uvsim.cpu.profiler = Profiler()
+    uvsim.execute(preview=False)
+
+    assert uvsim.cpu.profiler.total == 16
@@ -0,0 +1,144 @@
+import sys
+import os
+import pytest
+from src.program_cache import ProgramCache
+from src.image import ProgramImage
+from src.memory import Memory, ArrayMemory
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "../bml_examples")
+
+@pytest.fixture
+def program(tmp_path):
+    filename = tmp_path / "program.txt"
+    filename.write_text("+1007\n+1107\n+4300\n")
+    return filename
+
+@pytest.fixture
+def cache():
+    return ProgramCache(capacity=2)
+
+#########
+# Cache #
+#########
+
+def test_load(cache, program):
+    cached = cache.load(program)
+
+    assert cached.extent == 3
+    assert list(cached.words[:3]) == [10007, 11007, 43000]
+    assert cached.decoded[:3] == [(10, 7), (11, 7), (43, 0)]
+    assert (cache.hits, cache.misses) == (0, 1)
+
+def test_hit(cache, program):
+    assert cache.load(program) is cache.load(program)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_keyed_by_contents(cache, program, tmp_path):
+    copy = tmp_path / "copy.txt"
+    copy.write_text(program.read_text())
+    cached = cache.load(program)
+
+    assert cache.load(copy) is cached
+
+    program.write_text("+4300\n")
+    assert cache.load(program) is not cached
+    assert cache.misses == 2
+
+def test_least_recently_used(cache, tmp_path):
+    files = []
+    for number in range(3):
+        files.append(tmp_path / f"{number}.txt")
+        files[-1].write_text(f"+{number:04d}\n")
+
+    first = cache.load(files[0])
+    cache.load(files[1])
+    cache.load(files[0])
+    cache.load(files[2]) ## Pushes out 1, which was used longest ago
+
+    assert len(cache) == 2
+    assert cache.load(files[0]) is first
+    assert ProgramCache.digest(files[1].read_bytes()) not in cache
+
+def test_images(cache, tmp_path):
+    filename = tmp_path / "test1.bmi"
+    ProgramImage.from_text(os.path.join(EXAMPLES, "Test1.txt")).save(filename)
+
+    assert cache.load(filename).extent == 10
+
+def test_invalid_program(cache, tmp_path):
+    filename = tmp_path / "bad.txt"
+    filename.write_text("+1007\nbad\n")
+    with pytest.raises(ValueError):
+        cache.load(filename)
+    assert len(cache) == 0
+
+################
+# On-disk tier #
+################
+
+def test_disk_tier(program, tmp_path):
+    directory = tmp_path / "cache"
+    ProgramCache(directory=directory).load(program)
+
+    assert len(os.listdir(directory)) == 1
+
+    cache = ProgramCache(directory=directory)
+    cached = cache.load(program)
+
+    assert (cache.disk_hits, cache.misses) == (1, 0)
+    assert list(cached.words[:3]) == [10007, 11007, 43000]
+
+def test_damaged_disk_entry(program, tmp_path):
+    directory = tmp_path / "cache"
+    ProgramCache(directory=directory).load(program)
+    entry = directory / os.listdir(directory)[0]
+    entry.write_bytes(b"junk")
+
+    cache = ProgramCache(directory=directory)
+    assert cache.load(program).extent == 3
+    assert cache.misses == 1
+    assert ProgramImage.load(entry).extent == 3
+
+#########
+# UVSim #
+#########
+
+@pytest.mark.parametrize("backend", [Memory, ArrayMemory])
+def test_uvsim_cache(backend):
+    cache = ProgramCache()
+    outputs = []
+    vms = [UVSim(reader=lambda: "+0005", writer=lambda x: outputs.append(x.numeric), memory=backend(), cache=cache) for _ in range(2)]
+
+    for uvsim in vms:
+        uvsim.load(os.path.join(EXAMPLES, "Test2.txt"))
+        uvsim.execute(preview=False)
+
+    assert cache.hits == 1
+    assert outputs == [5, 5]
+    ## Reading input into the program wrote to memory, the cached copy is untouched
+    assert cache.load(os.path.join(EXAMPLES, "Test2.txt")).words[9] == 0
+
+def test_uvsim_matches_uncached():
+    cached, uncached = UVSim(memory=ArrayMemory(), cache=ProgramCache()), UVSim(memory=ArrayMemory())
+    for uvsim in (cached, uncached):
+        uvsim.load(os.path.join(EXAMPLES, "Test3.txt"))
+
+    assert cached.mem.extent == uncached.mem.extent
+    assert [cached.mem.read(i) for i in Memory.ADDRESSABLE_SPACE] == [uncached.mem.read(i) for i in Memory.ADDRESSABLE_SPACE]
+    assert [cached.mem.fetch(i) for i in Memory.ADDRESSABLE_SPACE] == [uncached.mem.fetch(i) for i in Memory.ADDRESSABLE_SPACE]
+
+def test_uvsim_compiled_blocks_shared():
+    cache = ProgramCache()
+    outputs = []
+    inputs = iter(["+0042", "-0007", "+0001", "-0002"])
+    for _ in range(2):
+        uvsim = UVSim(reader=lambda: next(inputs), writer=lambda x: outputs.append(x.numeric), engine="compiled", cache=cache)
+        uvsim.load(os.path.join(EXAMPLES, "Test1.txt"))
+        uvsim.execute(preview=False)
+
+    assert outputs == [-7, -2]
+    assert len(cache.load(os.path.join(EXAMPLES, "Test1.txt")).compiler) > 0
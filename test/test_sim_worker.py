@@ -0,0 +1,130 @@
+import sys
+import os
+import pytest
+from src.opcodes import Opcode
+from src.sim_worker import SimWorker
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+TIMEOUT = 5
+
+def wait_for(worker, kind):
+    """
+    Block until the worker reports an event of the given kind, returning it and everything before it
+    """
+    seen = []
+    while True:
+        event = worker.events.get(timeout=TIMEOUT)
+        seen.append(event)
+        if event[0] == kind:
+            return seen
+
+@pytest.fixture
+def worker():
+    worker = SimWorker()
+    yield worker
+    worker.halt(wait=TIMEOUT)
+
+def test_run_to_halt(worker):
+    worker.uvsim.mem.clear([Opcode("+2003"), Opcode("+1103"), Opcode("+4300"), Opcode("+0042")])
+    worker.start()
+
+    events = wait_for(worker, "halted")
+
+    assert ("output", Opcode("+0042")) in events
+    assert events[-1] == ("halted", 3)
+    assert not worker.running
+
+def test_input(worker):
+    worker.uvsim.mem.clear([Opcode("+1005"), Opcode("+1105"), Opcode("+4300")])
+    worker.start()
+
+    wait_for(worker, "input")
+    assert worker.waiting_for_input
+    worker.provide("+0007")
+
+    events = wait_for(worker, "halted")
+    assert ("output", Opcode("+0007")) in events
+
+def test_bad_input(worker):
+    worker.uvsim.mem.clear([Opcode("+1005"), Opcode("+4300")])
+    worker.start()
+
+    wait_for(worker, "input")
+    worker.provide("seven")
+    events = wait_for(worker, "input")
+    worker.provide("+0007")
+    wait_for(worker, "halted")
+
+    assert events[0][0] == "error"
+
+def test_halt_while_waiting(worker):
+    worker.uvsim.mem.clear([Opcode("+1005"), Opcode("+4300")])
+    worker.start()
+    wait_for(worker, "input")
+
+    worker.halt(wait=TIMEOUT)
+
+    assert not worker.busy
+    assert wait_for(worker, "stopped")
+
+def test_step(worker):
+    worker.uvsim.mem.clear([Opcode("+2003"), Opcode("+4300"), Opcode("+0000"), Opcode("+0005")])
+
+    worker.step()
+    assert wait_for(worker, "paused")[-1] == ("paused", 1)
+    assert worker.uvsim.cpu.acc == 5
+
+    worker.step()
+    assert wait_for(worker, "halted")[-1] == ("halted", 2)
+
+def test_breakpoint(worker):
+    worker.uvsim.mem.clear([Opcode("+2003"), Opcode("+3003"), Opcode("+4300"), Opcode("+0001")])
+    worker.breakpoints.add(2)
+    worker.start()
+
+    assert wait_for(worker, "paused")[-1] == ("paused", 2)
+    assert worker.uvsim.cpu.acc == 2
+
+def test_pause(worker):
+    worker.uvsim.mem.clear([Opcode("+0000"), Opcode("+4000")])
+    worker.start()
+    worker.pause()
+    worker.halt(wait=TIMEOUT)
+
+    assert not worker.busy
+    assert worker.steps > 0
+
+def test_failure(worker):
+    worker.uvsim.mem.clear([Opcode("+3202"), Opcode("+4300")])
+    worker.start()
+
+    event = wait_for(worker, "failed")[-1]
+    assert isinstance(event[1], ZeroDivisionError)
+
+def test_workers_run_concurrently():
+    first, second = SimWorker(), SimWorker()
+    for worker in [first, second]:
+        worker.uvsim.mem.clear([Opcode("+1005"), Opcode("+4300")])
+        worker.start()
+
+    try:
+        wait_for(first, "input")
+        wait_for(second, "input")
+        second.provide("+0001")
+        wait_for(second, "halted")
+
+        assert first.busy
+    finally:
+        first.halt(wait=TIMEOUT)
+        second.halt(wait=TIMEOUT)
+
+def test_poll(worker):
+    worker.uvsim.mem.clear([Opcode("+1102"), Opcode("+4300"), Opcode("+0009")])
+    worker.start()
+    wait_for(worker, "output")
+    worker.halt(wait=TIMEOUT)
+
+    assert worker.poll()[-1][0] == "halted"
+    assert worker.poll() == []
@@ -0,0 +1,274 @@
+import sys
+import os
+import asyncio
+import io
+import pytest
+from src.memory import Memory, ArrayMemory
+from src.opcodes import Opcode
+from src.io_device import AsyncIODevice, InputExhausted, ScriptedIODevice, StreamIODevice
+from src.program_cache import ProgramCache
+from src.cpu import StepLimitExceeded
+from uvsim import UVSim
+
+# Ensure the src directory is in the Python path for module imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+## Reads a word, doubles it, writes it and halts
+DOUBLE = [Opcode("+1010"), Opcode("+2010"), Opcode("+3010"), Opcode("+2111"), Opcode("+1111"), Opcode("+4300")]
+
+@pytest.fixture(params=[Memory, ArrayMemory])
+def uvsim(request):
+    uvsim = UVSim(reader=lambda: "+0005", writer=lambda x: None, err=lambda x: None, memory=request.param())
+    uvsim.mem.clear(list(DOUBLE))
+    return uvsim
+
+############
+# Snapshot #
+############
+
+def test_snapshot_restore(uvsim):
+    snapshot = uvsim.snapshot()
+    uvsim.execute(preview=False)
+
+    assert uvsim.cpu.halted
+    assert uvsim.mem.read(11) == 10
+
+    uvsim.restore(snapshot)
+
+    assert not uvsim.cpu.halted
+    assert uvsim.cpu.current == 0
+    assert uvsim.cpu.acc == 0
+    assert uvsim.mem.read(11) == 0
+    assert uvsim.mem.read(0) == Opcode("+1010")
+
+def test_snapshot_mid_run(uvsim):
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    snapshot = uvsim.snapshot()
+
+    assert snapshot.acc == 5
+    assert snapshot.current == 2
+    assert not snapshot.halted
+    assert uvsim.io_device.last_read == "+0005"
+
+    uvsim.execute(preview=False)
+    uvsim.restore(snapshot)
+
+    assert uvsim.cpu.acc == 5
+    assert uvsim.cpu.current == 2
+
+def test_resume(uvsim):
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    reads = []
+    uvsim = uvsim.fork(reader=lambda: reads.append(1) or "+0001", writer=lambda x: None)
+
+    assert uvsim.execute(preview=False, resume=True) == 5
+    assert reads == []
+
+def test_fork_each_input(uvsim):
+    ## Run up to just past the READ, then explore several inputs from there
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    snapshot = uvsim.snapshot()
+
+    results = {}
+    for value in [1, 2, 3]:
+        outputs = []
+        fork = uvsim.fork(snapshot, writer=lambda x: outputs.append(x.numeric))
+        fork.mem.write(10, value)
+        fork.execute(preview=False, max_steps=100, resume=True)
+        results[value] = outputs
+
+    assert results == {1: [2], 2: [4], 3: [6]}
+    assert uvsim.mem.read(10) == 5
+
+def test_fork_keeps_kind(uvsim):
+    fork = uvsim.fork()
+
+    assert type(fork.mem) is type(uvsim.mem)
+    assert fork.engine == uvsim.engine
+
+## Reads and writes two words
+ECHO_TWICE = [Opcode("+1010"), Opcode("+1110"), Opcode("+1010"), Opcode("+1110"), Opcode("+4300")]
+
+def scripted_uvsim():
+    uvsim = UVSim(io_device=ScriptedIODevice(["+0001", "+0002", "+0003"]))
+    uvsim.mem.clear(list(ECHO_TWICE))
+    return uvsim
+
+def test_restore_rewinds_scripted_io():
+    uvsim = scripted_uvsim()
+    snapshot = uvsim.snapshot()
+    uvsim.execute(preview=False)
+
+    assert list(uvsim.io_device.inputs) == ["+0003"]
+    assert uvsim.io_device.outputs == [1, 2]
+
+    uvsim.restore(snapshot)
+
+    assert list(uvsim.io_device.inputs) == ["+0001", "+0002", "+0003"]
+    assert uvsim.io_device.outputs == []
+
+    uvsim.execute(preview=False)
+    assert uvsim.io_device.outputs == [1, 2]
+
+def test_fork_from_snapshot_before_read():
+    uvsim = scripted_uvsim()
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    snapshot = uvsim.snapshot() ## Just before the second READ
+    uvsim.execute(preview=False, resume=True)
+
+    forks = []
+    for _ in range(3):
+        fork = uvsim.fork(snapshot)
+        fork.execute(preview=False, resume=True)
+        forks.append(fork.io_device)
+
+    assert [device.outputs for device in forks] == [[1, 2]] * 3
+    assert [list(device.inputs) for device in forks] == [["+0003"]] * 3
+    assert uvsim.io_device.outputs == [1, 2]
+
+def test_restore_rewinds_stream_input():
+    sink = io.StringIO()
+    uvsim = UVSim(io_device=StreamIODevice(["+0001", "", "+0002", "+0003"], sink, threshold=10))
+    uvsim.mem.clear(list(ECHO_TWICE))
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    snapshot = uvsim.snapshot()
+
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+    uvsim.restore(snapshot)
+    uvsim.execute(preview=False, resume=True)
+
+    assert sink.getvalue() == "+000001\n+000002\n"
+
+def test_fork_keeps_cache():
+    cache = ProgramCache()
+    uvsim = UVSim(cache=cache, engine="compiled")
+
+    assert uvsim.fork().cache is cache
+
+def test_fork_scripted_device():
+    uvsim = UVSim(io_device=ScriptedIODevice([5, 7], on_exhausted="halt"))
+    uvsim.mem.clear(list(DOUBLE))
+    uvsim.cpu.step(uvsim.mem, uvsim.io_device)
+
+    fork = uvsim.fork()
+    fork.execute(preview=False, resume=True)
+
+    assert type(fork.io_device) is ScriptedIODevice
+    assert fork.io_device.on_exhausted == "halt"
+    assert list(fork.io_device.inputs) == [7]
+    assert fork.io_device.outputs == [10]
+    assert uvsim.io_device.outputs == []
+    assert fork.io_device.last_read == 5
+
+def test_fork_stream_device():
+    sink = io.StringIO()
+    uvsim = UVSim(io_device=StreamIODevice(["+0001", "+0002"], sink))
+    uvsim.mem.clear(list(DOUBLE))
+    fork = uvsim.fork()
+
+    uvsim.execute(preview=False)
+    fork.execute(preview=False)
+
+    assert type(fork.io_device) is StreamIODevice
+    assert sink.getvalue() == "+000002\n+000004\n"
+
+def test_fork_with_device(uvsim):
+    device = ScriptedIODevice([3])
+    fork = uvsim.fork(io_device=device)
+    fork.execute(preview=False)
+
+    assert fork.io_device is device
+    assert device.outputs == [6]
+
+#########
+# Async #
+#########
+
+## Counts up forever without doing any IO
+SPIN = [Opcode("+2003"), Opcode("+3003"), Opcode("+4099"), Opcode("+0001")]
+
+def async_uvsim(program, inputs=(), outputs=None, errors=None):
+    lines = iter(inputs)
+
+    async def reader():
+        return next(lines, None)
+
+    async def writer(data):
+        outputs.append(data.numeric)
+
+    async def err(data):
+        errors.append(data)
+
+    uvsim = UVSim(io_device=AsyncIODevice(reader, writer, err))
+    uvsim.mem.clear(list(program))
+    return uvsim
+
+def test_execute_async():
+    outputs, errors = [], []
+    uvsim = async_uvsim(DOUBLE, ["abc", "+0021"], outputs, errors)
+
+    steps = asyncio.run(uvsim.execute_async())
+
+    assert steps == 6
+    assert outputs == [42]
+    assert len(errors) == 1
+    assert uvsim.cpu.halted
+
+def test_execute_async_exhausted():
+    uvsim = async_uvsim(DOUBLE)
+    with pytest.raises(InputExhausted):
+        asyncio.run(uvsim.execute_async())
+
+def test_execute_async_step_limit():
+    uvsim = async_uvsim([Opcode("+4000")] * 2) ## Branches back to 01 forever
+    with pytest.raises(StepLimitExceeded):
+        asyncio.run(uvsim.execute_async(max_steps=100))
+
+def test_budget_shares_the_loop():
+    async def sessions():
+        outputs = []
+        busy = asyncio.create_task(async_uvsim(SPIN).execute_async(budget=50))
+        quick = async_uvsim(DOUBLE, ["+0004"], outputs, [])
+        await quick.execute_async(budget=50)
+
+        assert not busy.done()
+        busy.cancel()
+        return outputs
+
+    assert asyncio.run(sessions()) == [8]
+
+def test_tcp_sessions():
+    """
+    Serve one VM per connection over a local socket and run several clients at once.
+    """
+    async def serve(reader, writer):
+        async def send(data):
+            writer.write(f"{data}\n".encode())
+            await writer.drain()
+
+        uvsim = UVSim(io_device=AsyncIODevice(reader.readline, send, send), memory=ArrayMemory())
+        uvsim.mem.clear(list(DOUBLE))
+        uvsim.mem.predecode()
+        try:
+            await uvsim.execute_async()
+        finally:
+            writer.close()
+
+    async def client(port, value):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"{value:+05d}\n".encode())
+        await writer.drain()
+        answer = await reader.readline()
+        writer.close()
+        return int(answer)
+
+    async def sessions():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await asyncio.gather(*(client(port, value) for value in range(-20, 20)))
+
+    assert asyncio.run(sessions()) == [2 * value for value in range(-20, 20)]
@@ -1,21 +1,43 @@
 #!/usr/bin/env python3
 
 from src.cpu import CPU
+from src.compiler import BlockCompiler
 from src.memory import Memory
 from src.io_device import IODevice
 from src.opcodes import Opcode
+from src.snapshot import Snapshot
+from src.image import ProgramImage
+from src.converter import Converter
 
 class UVSim:
     """
     An abstraction representing the UVSim virtual machine. It represents the current state of the virtual machine and creates its memory, register, and CPU.
     """
-    def __init__(self, reader=None, writer=None):
+    ENGINES = ("interpreter", "compiled")
+
+    def __init__(self, reader=None, writer=None, err=None, memory=None, engine="interpreter", io_device=None, cache=None):
         """
         Initialize and create a UVSim VM
+
+        Args:
+            reader, writer, err: Optional functions for the VM's `IODevice`.
+            memory (Memory): Optional memory to use, e.g. an `ArrayMemory`. Defaults to an empty `Memory`.
+            engine (str): "interpreter" executes one instruction at a time on the CPU,
+                "compiled" runs basic blocks compiled to Python by a `BlockCompiler`.
+            io_device (IODevice): Optional device to use instead of one built from reader, writer and err,
+                e.g. a `StreamIODevice`.
+            cache (ProgramCache): Optional cache `load` takes programs from. VMs sharing a cache also share the
+                blocks compiled for each program, so with the compiled engine a cache belongs to one thread.
         """
-        self.__memory = Memory()
-        self.__io  = IODevice(reader, writer)
+        if engine not in UVSim.ENGINES:
+            raise ValueError(f"Unknown engine {engine}. Expected one of {UVSim.ENGINES}")
+
+        self.__memory = memory if memory is not None else Memory()
+        self.__io  = io_device if io_device is not None else IODevice(reader, writer, err)
         self.__cpu = CPU()
+        self.engine = engine
+        self.__compiler = BlockCompiler() if engine == "compiled" else None
+        self.cache = cache
 
     @property
     def mem(self):
@@ -29,10 +51,70 @@ class UVSim:
     def io_device(self):
         return self.__io
 
+    def snapshot(self):
+        """
+        Capture the memory, registers and IO state of the VM, e.g. in the middle of a run.
+
+        Taking a snapshot doesn't copy memory when it is an `ArrayMemory`, see `ArrayMemory.snapshot`.
+
+        Returns:
+            Snapshot: Pass to `restore` or `fork`.
+        """
+        words, extent = self.mem.snapshot()
+        return Snapshot(words, extent, self.cpu.snapshot(), self.io_device.snapshot())
+
+    def restore(self, snapshot):
+        """
+        Put the VM back in the state captured by `snapshot`.
+        """
+        self.mem.restore(snapshot.words, snapshot.extent)
+        self.cpu.restore(snapshot.cpu)
+        self.io_device.restore(snapshot.io)
+
+    def fork(self, snapshot=None, reader=None, writer=None, err=None, io_device=None):
+        """
+        Create a new VM in the state captured by `snapshot`, or this VM's current state.
+
+        The new VM has the same kind of memory, engine and cache as this one. Give it its own IO
+        functions, e.g. to feed every fork different input, or a whole `io_device`. Otherwise it
+        gets a device of the same type as this VM's, in the state the snapshot recorded, see `IODevice.fork`.
+
+        Returns:
+            UVSim: The new VM.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+
+        if io_device is None:
+            if reader is None and writer is None and err is None:
+                io_device = self.io_device.fork(snapshot.io) ## Positioned where the snapshot was taken, not where this VM is now
+            else:
+                io_device = IODevice(reader, writer, err)
+
+        uvsim = UVSim(memory=type(self.mem)(), engine=self.engine, io_device=io_device, cache=self.cache)
+        uvsim.restore(snapshot)
+        return uvsim
+
     def load(self, filename):
         """
         Given a filename load its contents into memory starting at location `00`
+
+        Files ending in `ProgramImage.EXTENSION` are loaded with `load_image`. With a `cache`, a file
+        whose contents were loaded before is not parsed again.
         """
+        if self.cache is not None:
+            program = self.cache.load(filename)
+            self.mem.restore(program.words, program.extent, program.decoded)
+            if self.__compiler is not None:
+                if program.compiler is None:
+                    program.compiler = BlockCompiler()
+                self.__compiler = program.compiler ## Blocks compiled by earlier runs of the program are reused
+            return
+
+        if str(filename).endswith(ProgramImage.EXTENSION):
+            self.load_image(filename)
+            return
+
         self.mem.clear()
         with open(filename) as program:
             #if len(program) > 100: ## TODO: write a check here for memory bounds
@@ -42,18 +124,63 @@ class UVSim:
                 opcode = Opcode(line)
                 self.mem.writenext(opcode)
 
-    def execute(self):
+        self.mem.predecode()
+
+    def load_image(self, filename, use_mmap=False):
+        """
+        Load a binary program image, see `ProgramImage`. No text is parsed, and with an `ArrayMemory`
+        the words are taken over as they are instead of being written one at a time. See `ProgramImage.load` for `use_mmap`.
+
+        Returns:
+            ProgramImage: The image, with its symbols and debug information if it has any.
+
+        Raises:
+            ImageError: If the file is not a valid image.
+        """
+        image = ProgramImage.load(filename, use_mmap)
+        self.mem.restore(image.words, image.extent) ## Decoded on first fetch, most programs only execute a few of their words
+        return image
+
+    def save_image(self, filename, symbols=None, debug=None):
+        """
+        Save memory as a binary program image, optionally with a symbol table and line numbers.
+        """
+        ProgramImage.from_memory(self.mem, symbols, debug).save(filename)
+
+    def execute(self, preview=True, trace=0, max_steps=None, timeout=None, resume=False):
         """
         Walk through the contents of memory and hand each instruction to the CPU
+
+        Returns the number of instructions executed. See `CPU.run` for the options.
+        With `resume` execution continues from the CPU's current address instead of `00`, e.g. after `restore`.
+        The compiled engine has no per-instruction preview, journal or profiler, so asking for one uses the interpreter.
         """
         #if len(self.mem) == 0:
         #pass ## TODO: define this behavior
         #else:
+        address = self.cpu.current if resume else 0
         try:
-            self.cpu.run(self.mem, self.io_device, preview=True)
+            if self.__compiler is not None and not preview and not trace and self.cpu.journal is None and self.cpu.profiler is None:
+                return self.__compiler.run(self.cpu, self.mem, self.io_device, address, max_steps=max_steps, timeout=timeout)
+
+            return self.cpu.run(self.mem, self.io_device, address, preview=preview, trace=trace, max_steps=max_steps, timeout=timeout)
         except KeyboardInterrupt:
             print("\nAborting...")
             exit(0)
+        finally:
+            self.io_device.flush() ## Buffered output is written when the program halts or fails
+
+    async def execute_async(self, budget=CPU.ASYNC_BUDGET, max_steps=None, timeout=None, resume=False):
+        """
+        Run the program as a coroutine on the current event loop, see `CPU.run_async`.
+
+        The VM's IO device has to be an `AsyncIODevice`. Programs always run on the interpreter,
+        whatever the engine, because a compiled block can't pause to await input.
+
+        Returns the number of instructions executed.
+        """
+        address = self.cpu.current if resume else 0
+        return await self.cpu.run_async(self.mem, self.io_device, address, budget=budget, max_steps=max_steps, timeout=timeout)
 
     def store(self, filename):
         """
@@ -79,45 +206,14 @@ class UVSim:
             
     def convert(self, filename):
         """
-        Convert the contents of memory to a binary file
-        """
-        op_list = [10, 11, 20, 21, 30, 31, 32, 33, 40, 41, 42, 43]
-        new_list = []
-        file_content = []
-        def detect_sign(line):
-            sign = "+"
-            if line[0] == "-":
-                line = line[1:]
-                sign = "-"
-            elif line[0] == "+":
-                line = line[1:]
-            return line, sign
-        def write_file(filename, new_list):
-            with open(filename, 'w') as file:
-                for line in range(len(new_list)-1):
-                    file.write(new_list[line])
-                file.write(new_list[-1].strip())
-                print('Program converted successfully')
-        #check if file was provided
+        Convert a program file from the 4-digit format to the 6-digit one in place, see `Converter`.
+        """
         if filename == "":
             print("Filename not provided")
             return
-        file_content = []
-        with open(filename, 'r') as file:
-            file_content = file.readlines()
-        for line in file_content:
-            current = line.strip()
-            current, sign = detect_sign(current)
-            #Prefills with 0s if any code is less than 4 digits
-            if len(current) <= 3:
-                for i in range(4-len(current)):
-                    current = "0" + current
-            #raises error if incopatible code is found
-            elif len(current) > 4:
-                raise Exception("File contains invalid opcodes")
-            if int(current[:2]) in op_list:
-                current = f"{sign}0{current[0:2]}0{current[2:]}\n"
-            else:
-                current = f"{sign}00{current}\n"
-            new_list.append(current)
-        write_file(filename, new_list)
\ No newline at end of file
+
+        status, _ = Converter.convert_file(filename)
+        if status == Converter.SKIPPED:
+            print('Program is already in the 6-digit format')
+        else:
+            print('Program converted successfully')